@@ -13,20 +13,37 @@ import asyncio
 
 from django.core.asgi import get_asgi_application
 from api.task_queue import task_queue
+from api.habr_parser import parser
+from api.swr_cache import latest_articles_cache
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'MTSSummarizerBackend.settings')
 
 django.setup()
 django_application = get_asgi_application()
 
+# Используют модели, поэтому импортируются после django.setup()
+from api.prefetch import latest_articles_prefetcher
+from api.jobs import JOB_WORKER_SETTINGS, summary_job_worker
+
 async def application(scope, receive, send):
     if scope['type'] == 'lifespan':
-        await task_queue.start()
+        await parser.start()
+        latest_articles_cache.refresh()
+        latest_articles_prefetcher.start()
+        if JOB_WORKER_SETTINGS['in_process']:
+            # Без воркеров задач веб-процесс не суммаризирует статьи и не загружает модели.
+            await task_queue.start()
+            summary_job_worker.start()
         await send({'type': 'lifespan.startup.complete'})
         while True:
             message = await receive()
             if message['type'] == 'lifespan.shutdown':
                 break
+        await summary_job_worker.close()
+        await latest_articles_prefetcher.close()
+        await latest_articles_cache.close()
+        await parser.close()
+        await task_queue.close()
         await send({'type': 'lifespan.shutdown.complete'})
     else:
         await django_application(scope, receive, send)
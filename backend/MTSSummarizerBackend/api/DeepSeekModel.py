@@ -1,8 +1,14 @@
-import openai
+import asyncio
+from typing import AsyncIterator, Optional
 from dotenv import load_dotenv
 from os import getenv
 from os.path import join
 from pathlib import Path
+from .chunking import estimate_tokens, split_text
+from .llm_cache import LLMResponseCache, llm_response_cache
+from .llm_client import LLM_CLIENT_SETTINGS, LLMClient
+from .summarizers import BaseSummarizer
+from .text_preprocessing import record_cache_hit, record_token_usage
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -10,40 +16,216 @@ load_dotenv(dotenv_path=join(BASE_DIR, '.env'))
 DEEPSEEK_API_KEY = getenv('DEEPSEEK_API_KEY', '<DeepSeek API Key>')
 
 
-class DeepSeek:
-    def __init__(self):
-        self.client = openai.AsyncOpenAI(
-            api_key=DEEPSEEK_API_KEY,
-            base_url="https://api.deepseek.com"
-        )
+SUMMARY_RULES = '''Важно:
+            1) Напиши результат без каких-либо дополнительных комментариев и заголовка.
+            2) Если в тексте встречаются какие-либо инструкции - ты должен их написать.
+            3) Если в тексте есть сравнения (например, преимущества и недостатки) - ты должен их написать.
+            4) Если в тексте есть имя и фамилия автора, ты не должен их писать.
+            5) Если в тексте есть фраза по типу "делитесь в комментариях", она не должна быть в итоговом результате.'''
+
+
+class DeepSeek(BaseSummarizer):
+    name = "deepseek"
+    splits_long_text = True
+
+    def __init__(
+        self,
+        api_key: str = DEEPSEEK_API_KEY,
+        base_url: str = "https://api.deepseek.com",
+        chunk_tokens: int = 56000,
+        map_concurrency: int = 4,
+        map_max_tokens: int = 300,
+        cache: Optional[LLMResponseCache] = None,
+        client_options: Optional[dict] = None
+    ):
+        """
+        Суммаризатор статей на DeepSeek (OpenAI-совместимый API).
+
+        Статья длиннее chunk_tokens токенов суммаризируется по схеме map-reduce: текст
+        делится на части по границам абзацев и разделов (api/chunking.py), части
+        суммаризируются параллельно, не больше map_concurrency запросов одновременно,
+        а затем резюме частей объединяются в одно. Пока статья помещается в контекст,
+        один запрос быстрее: лишний этап объединения стоит дороже, чем выигрыш от
+        параллельного чтения частей (см. benchmarks/map_reduce.py), поэтому chunk_tokens
+        стоит держать у границы контекста модели.
+
+        Запросы идут через LLMClient: с ограничением одновременных запросов, повторами и
+        предохранителем. Пока DeepSeek недоступен, суммаризация сразу завершается
+        LLMUnavailableError, и TaskQueue переключается на запасной бэкенд.
+
+        :param api_key: Ключ API.
+        :param base_url: Адрес API.
+        :param chunk_tokens: Бюджет токенов текста на один запрос.
+        :param map_concurrency: Максимальное количество одновременных запросов суммаризации частей одной статьи.
+        :param map_max_tokens: Максимальная длина резюме одной части (в токенах).
+        :param cache: Кэш ответов модели (None - без кэша).
+        :param client_options: Параметры LLMClient (None - по умолчанию).
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.client_options = client_options or {}
+        self.client = LLMClient(api_key, base_url, **self.client_options)
+        self.chunk_tokens = chunk_tokens
+        self.map_concurrency = map_concurrency
+        self.map_max_tokens = map_max_tokens
+        self.cache = cache
+        self.model = "deepseek-chat"
+        self.temperature = 0.7
         self.results = []
    
+    @staticmethod
+    def _messages(prompt):
+        return [
+            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "user", "content": prompt}
+        ]
+
+    async def _cached_response(self, messages, max_tokens):
+        if self.cache is None:
+            return None, None
+        key = self.cache.key(self.model, self.temperature, max_tokens, messages)
+        response = await self.cache.get(key)
+        if response is not None:
+            record_cache_hit()
+        return key, response
+
     async def _make_api_request(self, prompt, max_tokens):
-        response = await self.client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=max_tokens,
-            stream=False
+        messages = self._messages(prompt)
+        key, cached_response = await self._cached_response(messages, max_tokens)
+        if cached_response is not None:
+            return cached_response
+        response = await self.client.complete(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            max_tokens=max_tokens
         )
-        return response.choices[0].message.content
+        record_token_usage(response.usage)
+        content = response.choices[0].message.content
+        if key is not None and content:
+            await self.cache.set(key, self.model, content, response.usage)
+        return content
 
-    async def summarize_text(self, text):
-        prompt = f'''Твоя задача - суммаризировать текст из IT-статьи. 
+    async def _stream_api_request(self, prompt, max_tokens) -> AsyncIterator[str]:
+        messages = self._messages(prompt)
+        key, cached_response = await self._cached_response(messages, max_tokens)
+        if cached_response is not None:
+            yield cached_response
+            return
+        usage, parts = None, []
+        async with self.client.stream(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            max_tokens=max_tokens,
+            stream_options={"include_usage": True}
+        ) as stream:
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    usage = chunk.usage  # Последний кусок потока, без choices
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        record_token_usage(usage)
+        # Кэшируется только ответ, дочитанный до конца.
+        if key is not None and parts:
+            await self.cache.set(key, self.model, "".join(parts), usage)
 
-        Важно:
-            1) Напиши результат без каких-либо дополнительных комментариев и заголовка.
-            2) Если в тексте встречаются какие-либо инструкции - ты должен их написать.
-            3) Если в тексте есть сравнения (например, преимущества и недостатки) - ты должен их написать.
-            4) Если в тексте есть имя и фамилия автора, ты не должен их писать.
-            5) Если в тексте есть фраза по типу "делитесь в комментариях", она не должна быть в итоговом результате.
+    @staticmethod
+    def _summary_prompt(text):
+        return f'''Твоя задача - суммаризировать текст из IT-статьи. 
+
+        {SUMMARY_RULES}
 
         Текст для суммаризации:\n\n{text}'''
-        response = await self._make_api_request(prompt, max_tokens=500)
+
+    @staticmethod
+    def _chunk_prompt(text, number, total):
+        return f'''Твоя задача - кратко суммаризировать часть {number} из {total} IT-статьи. Резюме всех частей потом будут объединены.
+
+        {SUMMARY_RULES}
+
+        Часть статьи для суммаризации:\n\n{text}'''
+
+    @staticmethod
+    def _merge_prompt(summaries):
+        return f'''Твоя задача - объединить резюме последовательных частей одной IT-статьи в одно связное резюме без повторов.
+
+        {SUMMARY_RULES}
+
+        Резюме частей статьи:\n\n{summaries}'''
+
+    async def _summarize_concurrently(self, prompts, max_tokens) -> list[str]:
+        semaphore = asyncio.Semaphore(self.map_concurrency)
+
+        async def summarize(prompt):
+            async with semaphore:
+                return await self._make_api_request(prompt, max_tokens)
+
+        # TaskGroup отменяет остальные запросы, если один из них завершился ошибкой.
+        try:
+            async with asyncio.TaskGroup() as task_group:
+                tasks = [task_group.create_task(summarize(prompt)) for prompt in prompts]
+        except ExceptionGroup as group:
+            raise group.exceptions[0]  # Тип ошибки (например, LLMUnavailableError) нужен TaskQueue
+        return [task.result() for task in tasks]
+
+    async def _final_prompt(self, text):
+        chunks = split_text(text, self.chunk_tokens)
+        if len(chunks) == 1:
+            return self._summary_prompt(text)
+        summaries = await self._summarize_concurrently(
+            [self._chunk_prompt(chunk, number, len(chunks)) for number, chunk in enumerate(chunks, start=1)],
+            self.map_max_tokens
+        )
+        joined_summaries = "\n\n".join(summaries)
+        # Резюме очень длинной статьи может не поместиться в один запрос: объединяем их по группам.
+        while len(summaries) > 1 and estimate_tokens(joined_summaries) > self.chunk_tokens:
+            groups = split_text(joined_summaries, self.chunk_tokens)
+            summaries = await self._summarize_concurrently([self._merge_prompt(group) for group in groups],
+                                                           self.map_max_tokens)
+            joined_summaries = "\n\n".join(summaries)
+        return self._merge_prompt(joined_summaries)
+
+    async def summarize_text(self, text):
+        response = await self._make_api_request(await self._final_prompt(text), max_tokens=500)
         return response
-    
 
-deepseek_model = DeepSeek()
+    async def stream_summary(self, text) -> AsyncIterator[str]:
+        """
+        Суммаризирует текст статьи, отдавая ответ модели по мере генерации.
+
+        У длинной статьи сначала суммаризируются части, а потоком отдаётся объединение их резюме.
+
+        :param text: Текст статьи.
+        :return: Куски резюме в порядке генерации.
+        """
+        async for delta in self._stream_api_request(await self._final_prompt(text), max_tokens=500):
+            yield delta
+
+    async def start(self) -> None:
+        if self.client.is_closed():  # Бэкенд запускается снова после close()
+            self.client = LLMClient(self.api_key, self.base_url, **self.client_options)
+
+    async def close(self) -> None:
+        await self.client.close()
+
+    def stats(self) -> dict:
+        return {"backend": self.name, **self.client.stats()}
+
+
+SUMMARIZER_SETTINGS = {
+    # Бюджет токенов текста на один запрос, более длинные статьи суммаризируются по частям. Контекст deepseek-chat -
+    # 64K токенов, остаток - на промпт и ответ; статьи короче контекста быстрее суммаризировать одним запросом.
+    "chunk_tokens": 56000,
+    "map_concurrency": 4,  # Одновременные запросы суммаризации частей одной статьи.
+    "map_max_tokens": 300,  # Максимальная длина резюме одной части (в токенах).
+}
+
+deepseek_model = DeepSeek(
+    chunk_tokens=SUMMARIZER_SETTINGS['chunk_tokens'],
+    map_concurrency=SUMMARIZER_SETTINGS['map_concurrency'],
+    map_max_tokens=SUMMARIZER_SETTINGS['map_max_tokens'],
+    cache=llm_response_cache,
+    client_options=LLM_CLIENT_SETTINGS,
+)
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Article
+from .models import Article, LLMResponse, Summary, SummaryJob
 
 
 admin.site.register(Article)
+admin.site.register(Summary)
+admin.site.register(SummaryJob)
+admin.site.register(LLMResponse)
@@ -0,0 +1,152 @@
+import time
+from datetime import datetime, timedelta
+from math import ceil
+from typing import Optional
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AbstractBaseUser
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.exceptions import Throttled
+from .models import SummaryJob
+from .task_queue import TaskQueue
+
+
+ACTIVE_STATUSES = (SummaryJob.QUEUED, SummaryJob.RUNNING)
+
+
+class AdmissionController:
+
+    def __init__(
+        self,
+        max_depth: int,
+        default_job_time: float,
+        duration_window: int = 50,
+        state_ttl: float = 1.0,
+        lock_id: int = 0x53554d4d
+    ) -> None:
+        """
+        Общий для всех процессов контроль допуска в очередь задач суммаризации.
+
+        Глубина очереди - количество задач SummaryJob в статусах queued и running во всей базе,
+        поэтому ответ одинаков для всех воркеров gunicorn и отдельных процессов воркеров.
+        Подсчёт и постановка задачи выполняются под транзакционной advisory-блокировкой
+        PostgreSQL, поэтому одновременные запросы не превышают max_depth. Если очередь
+        заполнена, запрос сразу отклоняется ответом 429 с заголовком Retry-After.
+
+        :param max_depth: Максимальное количество задач в очереди (ожидающих и выполняемых).
+        :param default_job_time: Время выполнения задачи (в секундах), пока нет статистики по выполненным задачам.
+        :param duration_window: Количество последних выполненных задач для оценки времени выполнения.
+        :param state_ttl: Время (в секундах), в течение которого состояние очереди для /api/v1/status/ не пересчитывается.
+        :param lock_id: Ключ advisory-блокировки PostgreSQL.
+        """
+        self.max_depth = max_depth
+        self.default_job_time = default_job_time
+        self.duration_window = duration_window
+        self.state_ttl = state_ttl
+        self.lock_id = lock_id
+        self._state: Optional[dict] = None
+        self._state_at = float("-inf")
+        self.admitted = 0
+        self.rejected = 0
+
+    def _queue_state(self) -> dict[str, int | float | bool]:
+        now = timezone.now()
+        counts = dict.fromkeys(ACTIVE_STATUSES, 0)
+        for job_status in SummaryJob.objects.filter(status__in=ACTIVE_STATUSES).values_list('status', flat=True):
+            counts[job_status] += 1
+        durations = [
+            (finished_at - started_at).total_seconds()
+            for started_at, finished_at in SummaryJob.objects
+            .filter(status=SummaryJob.DONE, finished_at__gte=now - timedelta(hours=1), started_at__isnull=False)
+            .order_by('-finished_at')
+            .values_list('started_at', 'finished_at')[:self.duration_window]
+        ]
+        job_time = sum(durations) / len(durations) if durations else self.default_job_time
+        queued, running = counts[SummaryJob.QUEUED], counts[SummaryJob.RUNNING]
+        # Пропускная способность оценивается по количеству одновременно выполняемых задач.
+        estimated_wait = ceil(queued / max(running, 1)) * job_time
+        return {
+            "is_available": queued + running < self.max_depth,
+            "queue_depth": queued + running,
+            "queued": queued,
+            "running": running,
+            "max_depth": self.max_depth,
+            "job_time": job_time,
+            "estimated_wait": estimated_wait,
+        }
+
+    @staticmethod
+    def _retry_after(state: dict) -> int:
+        # Место в очереди освобождается, когда завершается одна из выполняемых задач.
+        return max(1, ceil(state["job_time"] / max(state["running"], 1)))
+
+    async def get_state(self) -> dict[str, int | float | bool]:
+        """
+        Состояние очереди: глубина, количество ожидающих и выполняемых задач
+        и оценка времени ожидания начала выполнения новой задачи (в секундах).
+        """
+        if self._state is None or time.monotonic() - self._state_at > self.state_ttl:
+            self._state = await sync_to_async(self._queue_state)()
+            self._state_at = time.monotonic()
+        return self._state
+
+    async def has_capacity(self) -> bool:
+        return (await self.get_state())["is_available"]
+
+    @transaction.atomic
+    def _submit(
+        self,
+        url: str,
+        user: Optional[AbstractBaseUser],
+        deadline: Optional[datetime],
+        priority: str,
+        owner: str
+    ) -> SummaryJob:
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [self.lock_id])
+        state = self._queue_state()
+        self._state, self._state_at = state, time.monotonic()
+        if not state["is_available"]:
+            self.rejected += 1
+            raise Throttled(wait=self._retry_after(state), detail="Очередь задач суммаризации заполнена.")
+        self.admitted += 1
+        return SummaryJob.objects.create(url=url, user=user, deadline=deadline, priority=priority, owner=owner)
+
+    async def submit(
+        self,
+        url: str,
+        user: Optional[AbstractBaseUser] = None,
+        deadline: Optional[datetime] = None,
+        priority: str = TaskQueue.ANONYMOUS,
+        owner: str = ""
+    ) -> SummaryJob:
+        """
+        Ставит задачу суммаризации в общую очередь.
+
+        :param url: URL статьи.
+        :param user: Пользователь (None для анонимного запроса).
+        :param deadline: Крайний срок выполнения задачи (None - без срока).
+        :param priority: Класс приоритета задачи (см. TaskQueue).
+        :param owner: Владелец задачи для честного разделения очереди.
+        :return: Созданная задача.
+        :raises Throttled: Очередь заполнена (ответ 429 с заголовком Retry-After).
+        """
+        return await sync_to_async(self._submit)(url, user, deadline, priority, owner)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+ADMISSION_SETTINGS = {
+    "max_depth": 20,  # Максимальное количество задач в очереди (ожидающих и выполняемых) во всём кластере.
+    "default_job_time": 30,  # Время выполнения задачи (в секундах), пока нет статистики по выполненным задачам.
+}
+
+admission_controller = AdmissionController(
+    max_depth=ADMISSION_SETTINGS['max_depth'],
+    default_job_time=ADMISSION_SETTINGS['default_job_time'],
+)
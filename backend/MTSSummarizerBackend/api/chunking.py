@@ -0,0 +1,73 @@
+import re
+from math import ceil
+
+
+CHARS_PER_TOKEN = 3.0  # Средняя длина токена DeepSeek для русского текста статей (оценка)
+SENTENCE_END_PATTERN = re.compile(r'(?<=[.!?…])\s+')
+SECTION_END_CHARACTERS = ('.', '!', '?', '…', ':', ';', ',')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Оценивает количество токенов текста по его длине.
+
+    :param text: Текст.
+    :return: Оценка количества токенов.
+    """
+    return ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _is_heading(paragraph: str) -> bool:
+    # Заголовки разделов после get_text(separator='\n') - короткие строки без знака препинания в конце.
+    paragraph = paragraph.strip()
+    return 0 < len(paragraph) <= 80 and not paragraph.endswith(SECTION_END_CHARACTERS)
+
+
+def _split_paragraph(paragraph: str, max_tokens: int) -> list[str]:
+    # Абзац длиннее бюджета делится по предложениям, а слишком длинное предложение (например, код) - по символам.
+    max_chars = int(max_tokens * CHARS_PER_TOKEN)
+    parts, current = [], ""
+    for sentence in SENTENCE_END_PATTERN.split(paragraph):
+        for start in range(0, len(sentence), max_chars):
+            piece = sentence[start:start + max_chars]
+            if current and estimate_tokens(f"{current} {piece}") > max_tokens:
+                parts.append(current)
+                current = piece
+            else:
+                current = f"{current} {piece}" if current else piece
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_text(text: str, max_tokens: int) -> list[str]:
+    """
+    Делит текст статьи на части не длиннее max_tokens токенов (по оценке estimate_tokens).
+
+    Части собираются из целых абзацев. Если часть заполнена хотя бы наполовину,
+    новая часть начинается с заголовка раздела, чтобы раздел не разрывался между частями.
+    Абзац длиннее бюджета делится по предложениям.
+
+    :param text: Текст статьи (абзацы разделены переводом строки).
+    :param max_tokens: Бюджет токенов на одну часть.
+    :return: Части текста в исходном порядке (текст целиком, если он помещается в бюджет).
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    chunks, current, current_tokens = [], [], 0
+    for paragraph in text.split('\n'):
+        if not paragraph.strip():
+            continue
+        starts_section = _is_heading(paragraph) and current_tokens >= max_tokens // 2
+        pieces = [paragraph] if estimate_tokens(paragraph) <= max_tokens else _split_paragraph(paragraph, max_tokens)
+        for piece in pieces:
+            tokens = estimate_tokens(piece) + 1  # Перевод строки между абзацами
+            if current and (current_tokens + tokens > max_tokens or starts_section):
+                chunks.append('\n'.join(current))
+                current, current_tokens = [], 0
+            starts_section = False
+            current.append(piece)
+            current_tokens += tokens
+    if current:
+        chunks.append('\n'.join(current))
+    return chunks
@@ -0,0 +1,290 @@
+import logging
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolax - необязательная зависимость, без неё работает BeautifulSoup
+    LexborHTMLParser = None
+
+try:
+    from lxml.etree import HTMLPullParser
+except ImportError:  # lxml - необязательная зависимость, без неё потоковый парсинг идёт на html.parser
+    HTMLPullParser = None
+
+
+ARTICLE_TITLE_SELECTOR = "head > title"
+ARTICLE_BODY_SELECTOR = "div.article-formatted-body"
+COMMENT_BODY_CLASS = "tm-comment__body-content_v2"
+COMMENT_SELECTOR = f"div.{COMMENT_BODY_CLASS} p"
+LATEST_ARTICLE_CLASS = "tm-articles-list__item"
+LATEST_ARTICLE_TITLE_CLASS = "tm-title__link"
+HABR_URL = "https://habr.com"
+
+
+class BaseExtractor(ABC):
+    """
+    Бэкенд извлечения данных из HTML-страниц Хабра.
+
+    Методы синхронные и не трогают сеть: HabrParser вызывает их в отдельном потоке,
+    чтобы разбор больших страниц не блокировал event loop.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def article(self, html: str) -> dict[str, str]:
+        """
+        Извлекает заголовок и текст статьи.
+
+        :param html: HTML-страница статьи.
+        :return: Словарь с ключами 'title' и 'text'.
+        """
+
+    @abstractmethod
+    def comments_stream_parser(self) -> "CommentsStreamParser | LxmlCommentsStreamParser":
+        """
+        Возвращает инкрементальный парсер страницы комментариев для этого бэкенда.
+
+        Страница комментариев популярной статьи бывает очень большой, поэтому она всегда
+        разбирается потоково, по мере скачивания (см. HabrParser._iter_comments).
+
+        :return: Новый парсер с методами feed() и close().
+        """
+
+    @abstractmethod
+    def latest_articles(self, html: str, limit: int, base_url: str = HABR_URL) -> list[dict[str, str]]:
+        """
+        Извлекает последние статьи из списка статей компании.
+
+        :param html: HTML-страница со списком статей.
+        :param limit: Максимальное количество статей.
+        :param base_url: Адрес сайта, относительно которого строятся ссылки на статьи.
+        :return: Список словарей с ключами 'title', 'publish_time' и 'url'.
+        """
+
+
+class BeautifulSoupExtractor(BaseExtractor):
+    """
+    Эталонный бэкенд: полное DOM-дерево BeautifulSoup на встроенном html.parser.
+    """
+
+    name = "bs4"
+
+    def article(self, html: str) -> dict[str, str]:
+        soup = BeautifulSoup(html, "html.parser")
+        article_title = soup.select_one(ARTICLE_TITLE_SELECTOR).get_text().split(" / ")[0].strip()
+        article_text = soup.select_one(ARTICLE_BODY_SELECTOR).get_text(separator='\n').strip()
+        return {"title": article_title, "text": article_text}
+
+    def comments_stream_parser(self) -> "CommentsStreamParser":
+        # Тот же встроенный html.parser, на котором работает BeautifulSoup.
+        return CommentsStreamParser()
+
+    def latest_articles(self, html: str, limit: int, base_url: str = HABR_URL) -> list[dict[str, str]]:
+        soup = BeautifulSoup(html, "html.parser")
+        latest_articles = []
+        for article in soup.find_all(class_=LATEST_ARTICLE_CLASS, limit=limit):
+            title_with_link = article.find(class_=LATEST_ARTICLE_TITLE_CLASS)
+            latest_articles.append({
+                'title': title_with_link.string,
+                'publish_time': article.find("time").string,
+                'url': urljoin(base_url, title_with_link["href"])
+            })
+        return latest_articles
+
+
+class SelectolaxExtractor(BaseExtractor):
+    """
+    Быстрый бэкенд на C-парсере lexbor (пакет selectolax).
+
+    Дерево строится и обходится CSS-селекторами на стороне C, в Python
+    попадают только нужные узлы.
+    """
+
+    name = "selectolax"
+
+    def __init__(self) -> None:
+        if LexborHTMLParser is None:
+            raise ImportError("Для SelectolaxExtractor необходимо установить пакет selectolax.")
+
+    def article(self, html: str) -> dict[str, str]:
+        tree = LexborHTMLParser(html)
+        article_title = tree.css_first(ARTICLE_TITLE_SELECTOR).text().split(" / ")[0].strip()
+        article_text = tree.css_first(ARTICLE_BODY_SELECTOR).text(separator='\n').strip()
+        return {"title": article_title, "text": article_text}
+
+    def comments_stream_parser(self) -> "CommentsStreamParser | LxmlCommentsStreamParser":
+        # У lexbor нет потокового режима: берём C-парсер libxml2, если lxml установлен.
+        if HTMLPullParser is not None:
+            return LxmlCommentsStreamParser()
+        return CommentsStreamParser()
+
+    def latest_articles(self, html: str, limit: int, base_url: str = HABR_URL) -> list[dict[str, str]]:
+        tree = LexborHTMLParser(html)
+        latest_articles = []
+        for article in tree.css(f".{LATEST_ARTICLE_CLASS}")[:limit]:
+            title_with_link = article.css_first(f".{LATEST_ARTICLE_TITLE_CLASS}")
+            latest_articles.append({
+                'title': title_with_link.text(),
+                'publish_time': article.css_first("time").text(),
+                'url': urljoin(base_url, title_with_link.attributes["href"])
+            })
+        return latest_articles
+
+
+class CommentsStreamParser(HTMLParser):
+    """
+    Инкрементальный парсер страницы комментариев на встроенном html.parser.
+
+    Принимает HTML кусками через feed() и сразу отдаёт готовые комментарии,
+    не строя DOM-дерево и не держа в памяти страницу целиком: в памяти
+    находятся только текущий кусок и текст текущего абзаца. Комментарий -
+    непустой абзац (COMMENT_SELECTOR) внутри тела комментария.
+
+    Пример использования:
+        stream_parser = CommentsStreamParser()
+        for chunk in chunks:
+            for comment in stream_parser.feed(chunk):
+                ...
+        remaining_comments = stream_parser.close()
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self._body_depth = 0  # Глубина вложенных div внутри тела комментария
+        self._paragraph_depth = 0
+        self._paragraph_parts = []
+        self._ready = []
+
+    def feed(self, data: str) -> list[str]:
+        """
+        Передаёт парсеру очередной кусок HTML.
+
+        :param data: Кусок HTML-страницы.
+        :return: Комментарии, полностью прочитанные к этому моменту.
+        """
+        super().feed(data)
+        return self._drain()
+
+    def close(self) -> list[str]:
+        """
+        Завершает разбор страницы.
+
+        :return: Оставшиеся комментарии.
+        """
+        super().close()
+        return self._drain()
+
+    def _drain(self) -> list[str]:
+        ready, self._ready = self._ready, []
+        return ready
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str]]) -> None:
+        if tag == "div":
+            if self._body_depth:
+                self._body_depth += 1
+            elif COMMENT_BODY_CLASS in (dict(attrs).get("class") or "").split():
+                self._body_depth = 1
+        elif tag == "p" and self._body_depth:
+            self._paragraph_depth += 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "div" and self._body_depth:
+            self._body_depth -= 1
+        elif tag == "p" and self._paragraph_depth:
+            self._paragraph_depth -= 1
+            if not self._paragraph_depth:
+                comment = "".join(self._paragraph_parts).strip()
+                self._paragraph_parts = []
+                if comment:
+                    self._ready.append(comment)
+
+    def handle_data(self, data: str) -> None:
+        if self._paragraph_depth:
+            self._paragraph_parts.append(data)
+
+
+class LxmlCommentsStreamParser:
+    """
+    Инкрементальный парсер страницы комментариев на C-парсере libxml2 (пакет lxml).
+
+    Интерфейс тот же, что у CommentsStreamParser. Уже разобранные элементы
+    удаляются из дерева, поэтому память ограничена текущим куском и текущим комментарием.
+    """
+
+    def __init__(self) -> None:
+        if HTMLPullParser is None:
+            raise ImportError("Для LxmlCommentsStreamParser необходимо установить пакет lxml.")
+        self._parser = HTMLPullParser(events=("start", "end"))
+        self._body_depth = 0  # Количество открытых тел комментариев
+        self._paragraph_depth = 0
+
+    def feed(self, data: str) -> list[str]:
+        """
+        Передаёт парсеру очередной кусок HTML.
+
+        :param data: Кусок HTML-страницы.
+        :return: Комментарии, полностью прочитанные к этому моменту.
+        """
+        self._parser.feed(data)
+        return self._read_comments()
+
+    def close(self) -> list[str]:
+        """
+        Завершает разбор страницы.
+
+        :return: Оставшиеся комментарии.
+        """
+        self._parser.close()
+        return self._read_comments()
+
+    def _read_comments(self) -> list[str]:
+        comments = []
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if element.tag == "div" and COMMENT_BODY_CLASS in (element.get("class") or "").split():
+                    self._body_depth += 1
+                elif element.tag == "p" and self._body_depth:
+                    self._paragraph_depth += 1
+                continue
+            if element.tag == "p" and self._paragraph_depth:
+                self._paragraph_depth -= 1
+                if not self._paragraph_depth:
+                    comment = "".join(element.itertext()).strip()
+                    if comment:
+                        comments.append(comment)
+            elif element.tag == "div" and COMMENT_BODY_CLASS in (element.get("class") or "").split():
+                self._body_depth -= 1
+            if not self._paragraph_depth:
+                # Элемент разобран целиком: освобождаем его и предыдущих соседей.
+                element.clear(keep_tail=True)
+                parent = element.getparent()
+                while parent is not None and element.getprevious() is not None:
+                    del parent[0]
+        return comments
+
+
+EXTRACTORS = {
+    BeautifulSoupExtractor.name: BeautifulSoupExtractor,
+    SelectolaxExtractor.name: SelectolaxExtractor,
+}
+
+
+def get_extractor(name: str = "auto") -> BaseExtractor:
+    """
+    Возвращает бэкенд извлечения по имени.
+
+    :param name: 'bs4', 'selectolax' или 'auto' (selectolax, если он установлен, иначе bs4).
+    :return: Экземпляр бэкенда.
+    """
+    if name == "auto":
+        name = SelectolaxExtractor.name if LexborHTMLParser is not None else BeautifulSoupExtractor.name
+    try:
+        extractor_class = EXTRACTORS[name]
+    except KeyError:
+        raise ValueError(f"Неизвестный бэкенд извлечения: {name}. Доступны: {', '.join(EXTRACTORS)}.")
+    logging.info(f"Бэкенд извлечения HTML: {name}.")
+    return extractor_class()
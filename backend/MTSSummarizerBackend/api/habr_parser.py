@@ -1,11 +1,23 @@
+import asyncio
+import codecs
 import logging
-import random
+import re
 import aiohttp
-from asyncio.exceptions import TimeoutError, CancelledError
-from aiohttp_retry import RetryClient, ExponentialRetry
-from typing import List, Optional, Tuple
-from bs4 import BeautifulSoup
+from contextlib import asynccontextmanager
+from itertools import chain
+from math import ceil
+from urllib.parse import urljoin
+from tempfile import gettempdir
+from os.path import join
+from asyncio.exceptions import TimeoutError
+from aiohttp_retry import RetryClient, ExponentialRetry, RequestParams
+from typing import AsyncIterator, Iterable, List, Optional
 from fake_useragent import UserAgent
+from concurrent.futures import ThreadPoolExecutor
+from .habr_extractors import BaseExtractor, get_extractor
+from .http_cache import CacheEntry, DiskHTTPCache
+from .proxy_pool import ProxyPool
+from .rate_limiter import HostRateLimiter, retry_after_delay
 
 
 logging.basicConfig(
@@ -15,6 +27,37 @@ logging.basicConfig(
 )
 
 
+# Инкрементальные парсеры (libxml2) нельзя передавать между потоками,
+# поэтому весь потоковый разбор комментариев идёт в одном выделенном потоке.
+STREAM_PARSER_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="comments-stream-parser")
+
+ARTICLE_URL_PATTERN = re.compile(r"/(articles|news)/(\d+)(?:/|$)")
+
+
+def normalize_article_url(article_url: str) -> str:
+    """
+    Приводит URL статьи Хабра к каноническому виду https://habr.com/ru/{articles|news}/{номер}/.
+
+    Одна и та же статья доступна по нескольким адресам (в блоге компании и в общей ленте,
+    с query-параметрами и якорями), а ключом сохранённых резюме должен быть один адрес.
+
+    :param article_url: URL статьи.
+    :return: Канонический URL статьи (если номер статьи не найден - исходный URL без query и якоря).
+    """
+    article_url = article_url.split("#")[0].split("?")[0]
+    match = ARTICLE_URL_PATTERN.search(article_url)
+    if match is None:
+        return article_url
+    section, article_id = match.groups()
+    return f"https://habr.com/ru/{section}/{article_id}/"
+
+
+class HabrParseError(Exception):
+    """
+    Страницу Хабра не удалось скачать за отведённое время.
+    """
+
+
 class HabrParser:
 
     def __init__(
@@ -23,7 +66,26 @@ class HabrParser:
         attemps: int = 10,
         statuses: Optional[List[int]] = None,
         exceptions: Optional[List[Exception]] = None,
-        timeout: int = 0
+        timeout: int = 0,
+        connections_limit: int = 100,
+        connections_limit_per_host: int = 10,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 30,
+        batch_concurrency: int = 5,
+        extractor: str = "auto",
+        stream_chunk_size: int = 64 * 1024,
+        http_cache_dir: Optional[str] = None,
+        http_cache_max_size: int = 256 * 1024 * 1024,
+        latest_articles_url: str = "https://habr.com/ru/companies/ru_mts/articles/",
+        latest_articles_amount: int = 5,
+        latest_articles_per_page: int = 20,
+        proxy_rate: float = 1.0,
+        proxy_burst: float = 5,
+        proxy_eject_after: int = 3,
+        proxy_eject_time: float = 30,
+        host_rate: Optional[float] = 5.0,
+        host_burst: float = 10,
+        max_retry_after: float = 60
     ) -> None:
         """
         Инициализация парсера.
@@ -33,30 +95,198 @@ class HabrParser:
         :param statuses: Список HTTP-статусов, при которых повторять запрос.
         :param exceptions: Список исключений, при которых повторять запрос.
         :param timeout: Таймаут для HTTP-запросов.
+        :param connections_limit: Максимальное число открытых соединений в пуле.
+        :param connections_limit_per_host: Максимальное число соединений к одному хосту.
+        :param dns_cache_ttl: Время жизни записей DNS-кэша (в секундах).
+        :param keepalive_timeout: Время удержания простаивающего keep-alive соединения (в секундах).
+        :param batch_concurrency: Количество статей, одновременно обрабатываемых в parsing_articles.
+        :param extractor: Бэкенд извлечения данных из HTML ('bs4', 'selectolax' или 'auto').
+        :param stream_chunk_size: Размер куска (в байтах) при потоковом чтении страницы комментариев.
+        :param http_cache_dir: Каталог HTTP-кэша страниц Хабра (None - кэш отключён).
+        :param http_cache_max_size: Максимальный размер HTTP-кэша (в байтах).
+        :param latest_articles_url: URL первой страницы списка статей для parsing_latest_articles.
+        :param latest_articles_amount: Количество последних статей по умолчанию.
+        :param latest_articles_per_page: Количество статей на одной странице списка.
+        :param proxy_rate: Максимальная частота запросов через один прокси (в секунду).
+        :param proxy_burst: Допустимый всплеск запросов через один прокси.
+        :param proxy_eject_after: Количество ошибок подряд, после которого прокси временно исключается.
+        :param proxy_eject_time: Время первого исключения прокси (в секундах).
+        :param host_rate: Максимальная частота запросов к одному хосту без прокси (в секунду, None - без ограничения).
+        :param host_burst: Допустимый всплеск запросов к одному хосту.
+        :param max_retry_after: Максимальная пауза по заголовку Retry-After (в секундах).
         """
         self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.connections_limit = connections_limit
+        self.connections_limit_per_host = connections_limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.batch_concurrency = batch_concurrency
+        self.stream_chunk_size = stream_chunk_size
+        self.latest_articles_url = latest_articles_url
+        self.latest_articles_amount = latest_articles_amount
+        self.latest_articles_per_page = latest_articles_per_page
         self.proxies = proxies
+        self.proxy_pool: Optional[ProxyPool] = None
+        if proxies:
+            self.proxy_pool = ProxyPool(
+                proxies,
+                rate=proxy_rate,
+                burst=proxy_burst,
+                eject_after=proxy_eject_after,
+                eject_time=proxy_eject_time
+            )
+        self.max_retry_after = max_retry_after
+        self.host_limiter: Optional[HostRateLimiter] = None
+        if host_rate is not None:
+            self.host_limiter = HostRateLimiter(host_rate, host_burst, max_retry_after=max_retry_after)
         self.retry_options = ExponentialRetry(
             attempts=attemps,
             statuses=statuses,
             exceptions=exceptions
         )
         self.ua = UserAgent()  # Генератор случайных User-Agent
-    
+        self.extractor: BaseExtractor = get_extractor(extractor)
+        self.http_cache: Optional[DiskHTTPCache] = None
+        if http_cache_dir is not None:
+            self.http_cache = DiskHTTPCache(http_cache_dir, http_cache_max_size)
+        self._client_session: Optional[aiohttp.ClientSession] = None
+        self._retry_session: Optional[RetryClient] = None
+
+    async def start(self) -> None:
+        """
+        Открывает общий пул соединений, который переиспользуется всеми запросами парсера.
+
+        Вызывается при старте приложения (ASGI lifespan). Повторный вызов ничего не делает.
+        """
+        if self._retry_session is not None and not self._client_session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.connections_limit,
+            limit_per_host=self.connections_limit_per_host,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        self._client_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=self.timeout,
+            raise_for_status=False,
+            trace_configs=[self._get_trace_config()]
+        )
+        self._retry_session = RetryClient(client_session=self._client_session, retry_options=self.retry_options)
+        logging.info("Пул соединений парсера открыт.")
+
+    async def close(self) -> None:
+        """
+        Закрывает общий пул соединений. Вызывается при остановке приложения (ASGI lifespan).
+        """
+        if self._retry_session is None:
+            return
+        retry_session, self._retry_session, self._client_session = self._retry_session, None, None
+        await retry_session.close()
+        logging.info("Пул соединений парсера закрыт.")
+
+    def _get_trace_config(self) -> aiohttp.TraceConfig:
+        """
+        Хуки aiohttp, вызываемые на каждую попытку запроса (в том числе на повторные попытки RetryClient):
+        ожидание лимита частоты прокси (или хоста, если запрос идёт без прокси), паузы по Retry-After и учёт задержки и ошибок прокси в пуле.
+        """
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_request_end.append(self._on_request_end)
+        trace_config.on_request_exception.append(self._on_request_exception)
+        return trace_config
+
+    async def _on_request_start(self, session, context, params: aiohttp.TraceRequestStartParams) -> None:
+        context.proxy = (context.trace_request_ctx or {}).get("proxy")
+        # Частоту запросов через прокси ограничивает его собственный лимит: хост видит их с разных IP,
+        # и общий лимит хоста свёл бы пропускную способность всего пула прокси к host_rate.
+        if context.proxy is not None:
+            await context.proxy.bucket.acquire()
+        elif self.host_limiter is not None:
+            await self.host_limiter.acquire(params.url.host)
+        context.started = asyncio.get_running_loop().time()
+
+    async def _on_request_end(self, session, context, params: aiohttp.TraceRequestEndParams) -> None:
+        response = params.response
+        retry_after = response.headers.get("Retry-After")
+        if response.status == 429 or (response.status == 503 and retry_after is not None):
+            # Ограничивают частоту запросов с IP прокси, если он есть, иначе - с нашего собственного.
+            if context.proxy is not None:
+                context.proxy.bucket.pause(retry_after_delay(retry_after, 1.0, self.max_retry_after))
+            elif self.host_limiter is not None:
+                self.host_limiter.pause(params.url.host, retry_after)
+        if context.proxy is not None:
+            latency = asyncio.get_running_loop().time() - context.started
+            ok = response.status < 500 and response.status != 429
+            self.proxy_pool.report(context.proxy, latency, ok)
+
+    async def _on_request_exception(self, session, context, params: aiohttp.TraceRequestExceptionParams) -> None:
+        if context.proxy is not None:
+            self.proxy_pool.report(context.proxy, None, ok=False)
+
+    async def _get_session(self) -> RetryClient:
+        """
+        Возвращает общую сессию, открывая пул соединений при первом обращении.
+
+        :return: Сессия для выполнения HTTP-запросов.
+        """
+        if self._retry_session is None or self._client_session.closed:
+            await self.start()
+        return self._retry_session
+
     async def parsing_article(self, article_url: str) -> list[list[dict[str, str], list[str]]]:
         """
         Парсинг текста статей и комментариев (опционально) по списку URL статей.
 
         :param article_url: URL статьи для парсинга.
         :return: Список, состоящий из словаря с данными статьи и списка с комментариями к данной статье.
+        :raises HabrParseError: Таймаут при скачивании статьи или комментариев.
         """
-        async with aiohttp.ClientSession(timeout=self.timeout, raise_for_status=False) as client_session:
-            async with RetryClient(client_session=client_session, retry_options=self.retry_options) as retry_session:
-                comment_url = f"{article_url}comments/"
-                article_result = await self._get_text_from_article(retry_session, article_url)
-                comment_result = await self.parsing_comment(comment_url)
+        session = await self._get_session()
+        comment_url = f"{article_url}comments/"
+        article_result, comment_result = await asyncio.gather(
+            self._get_text_from_article(session, article_url),
+            self._get_text_from_comments(session, comment_url)
+        )
 
-                return article_result, comment_result
+        return article_result, comment_result
+
+    async def parsing_articles(
+        self,
+        article_urls: Iterable[str],
+        concurrency: Optional[int] = None
+    ) -> AsyncIterator[tuple[str, tuple[dict[str, str], list[str]]]]:
+        """
+        Парсит пачку статей с ограничением на количество одновременно обрабатываемых статей
+        и отдаёт результаты по мере готовности (не в порядке article_urls).
+
+        :param article_urls: URL статей для парсинга.
+        :param concurrency: Количество статей, обрабатываемых одновременно (по умолчанию batch_concurrency).
+        :return: Асинхронный генератор пар (URL статьи, результат parsing_article).
+                 Если статью не удалось скачать, результат равен (None, None).
+
+        Пример использования:
+            async for url, (article, comments) in parser.parsing_articles(urls, concurrency=10):
+                ...
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.batch_concurrency)
+
+        async def parse(article_url: str) -> tuple[str, tuple[dict[str, str], list[str]]]:
+            async with semaphore:
+                try:
+                    return article_url, await self.parsing_article(article_url)
+                except Exception as e:  # Ошибка одной статьи (сеть, таймаут, разбор HTML) не прерывает остальные
+                    logging.warning(f"Не удалось спарсить статью {article_url}: {e!r}.")
+                    return article_url, (None, None)
+
+        tasks = [asyncio.create_task(parse(article_url)) for article_url in article_urls]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
             
     
     async def parsing_comment(self, comment_url: str) -> list[str]:
@@ -72,19 +302,98 @@ class HabrParser:
         Пример использования:
             await parsing_comment("http://example.com/comment1")
         """
-        async with aiohttp.ClientSession(timeout=self.timeout, raise_for_status=False) as client_session:
-            async with RetryClient(client_session=client_session, retry_options=self.retry_options) as retry_session:
-                return await self._get_text_from_comments(retry_session, comment_url)
+        session = await self._get_session()
+        return await self._get_text_from_comments(session, comment_url)
+
+    async def parsing_comment_stream(self, comment_url: str) -> AsyncIterator[str]:
+        """
+        Потоково парсит комментарии: страница читается кусками и комментарии отдаются
+        по мере разбора, поэтому потребление памяти не зависит от размера страницы.
+
+        :param comment_url: URL-адрес страницы с комментариями.
+        :return: Асинхронный генератор текстов комментариев.
+
+        Пример использования:
+            async for comment in parser.parsing_comment_stream("https://habr.com/ru/articles/1/comments/"):
+                ...
+        """
+        session = await self._get_session()
+        async for comment in self._iter_comments(session, comment_url):
+            yield comment
             
 
-    async def _get_soup(self, response: aiohttp.ClientResponse) -> BeautifulSoup:
+    @asynccontextmanager
+    async def _fetch(self, session: RetryClient, url: str) -> AsyncIterator[tuple[str, AsyncIterator[bytes]]]:
+        """
+        Выполняет GET-запрос и отдаёт кодировку и куски тела ответа.
+
+        Если включён HTTP-кэш, запрос отправляется с If-None-Match / If-Modified-Since,
+        ответ 304 отдаётся из кэша, а новый ответ 200 сохраняется в кэш по мере чтения.
+
+        :param session: Сессия для выполнения HTTP-запросов.
+        :param url: URL страницы.
+        :return: Кортеж из кодировки и асинхронного итератора кусков тела ответа.
+        """
+        headers = {"User-Agent": self.ua.random}
+        cache_entry = await self.http_cache.lookup(url) if self.http_cache is not None else None
+        if cache_entry is not None:
+            headers.update(cache_entry.validators())
+        async with self._request(session, url, headers) as response:
+            if cache_entry is not None and response.status == 304:
+                yield cache_entry.charset, self._iter_cached_body(cache_entry)
+                return
+            charset = response.charset or "utf-8"
+            chunks = response.content.iter_chunked(self.stream_chunk_size)
+            if self.http_cache is not None and response.status == 200:
+                chunks = self.http_cache.store_stream(url, response.headers, charset, chunks)
+            yield charset, chunks
+
+    def _request(self, session: RetryClient, url: str, headers: dict[str, str]):
+        """
+        Создаёт GET-запрос с повторными попытками. Если задан пул прокси, каждая попытка
+        идёт через свой прокси, выбранный по здоровью.
+
+        :param session: Сессия для выполнения HTTP-запросов.
+        :param url: URL страницы.
+        :param headers: Заголовки запроса.
+        :return: Контекстный менеджер запроса RetryClient.
+        """
+        if self.proxy_pool is None:
+            return session.get(url, headers=headers)
+        proxies = self.proxy_pool.select(self.retry_options.attempts or 1)
+        return session.requests(params_list=[
+            RequestParams(
+                method="GET",
+                url=url,
+                headers=headers,
+                trace_request_ctx={"proxy": proxy},
+                kwargs={"proxy": proxy.url, "proxy_auth": proxy.auth}
+            )
+            for proxy in proxies
+        ])
+
+    async def _iter_cached_body(self, cache_entry: CacheEntry) -> AsyncIterator[bytes]:
+        """
+        Отдаёт закэшированное тело ответа кусками по stream_chunk_size байт.
         """
-        Преобразует ответ от сервера в объект BeautifulSoup для парсинга HTML.
+        async for chunk in self.http_cache.iter_body(cache_entry, self.stream_chunk_size):
+            yield chunk
 
-        :param response: Ответ от сервера.
-        :return: Объект BeautifulSoup.
+    async def _extract(self, session: RetryClient, url: str, method: str, *args):
+        """
+        Скачивает HTML-страницу и извлекает из неё данные бэкендом self.extractor.
+
+        Разбор HTML выполняется в отдельном потоке, чтобы не блокировать event loop.
+
+        :param session: Сессия для выполнения HTTP-запросов.
+        :param url: URL страницы.
+        :param method: Имя метода бэкенда извлечения ('article' или 'latest_articles').
+        :param args: Дополнительные аргументы метода бэкенда.
+        :return: Результат метода бэкенда.
         """
-        return BeautifulSoup(await response.text(), "html.parser")
+        async with self._fetch(session, url) as (charset, chunks):
+            html = b"".join([chunk async for chunk in chunks]).decode(charset, errors="replace")
+        return await asyncio.to_thread(getattr(self.extractor, method), html, *args)
     
 
     async def _get_text_from_article(self, session: RetryClient, article_page: str) -> dict[str, str]:
@@ -94,20 +403,16 @@ class HabrParser:
         :param session: Сессия для выполнения HTTP-запросов.
         :param article_page: URL статьи для парсинга.
         :return: Словарь, в котором содержится заголовок и текст статьи.
+        :raises HabrParseError: Таймаут при скачивании статьи.
         """
-        headers = {"User-Agent": self.ua.random}
-        proxy, proxy_auth = await self._get_proxy()
         article_num = article_page.split('/')[-2]
         try:
-            async with session.get(article_page, proxy=proxy, proxy_auth=proxy_auth, headers=headers) as response:
-                print(response.status)
-                soup = await self._get_soup(response)
-                article_title = soup.select_one("head > title").get_text().split(" / ")[0].strip()
-                article_text = soup.select_one("div.article-formatted-body").get_text(separator='\n').strip()
-                logging.info(f"Article={article_num}. Заголовок и текст статьи успешно спарсились.")
-                return {"title": article_title, "text": article_text}
-        except (TimeoutError, CancelledError):
+            article = await self._extract(session, article_page, "article")
+            logging.info(f"Article={article_num}. Заголовок и текст статьи успешно спарсились.")
+            return article
+        except TimeoutError as e:
             logging.warning(f"Ошибка в обработке текста статьи, article_num={article_num}.")
+            raise HabrParseError(f"Таймаут при скачивании статьи {article_page}.") from e
 
 
     async def _get_text_from_comments(self, session: RetryClient, comment_url: str) -> list[str]:
@@ -117,77 +422,90 @@ class HabrParser:
         :param session: Сессия для выполнения HTTP-запросов.
         :param comment_url: URL страницы с комментариями.
         :return: Список комментариев.
+        :raises HabrParseError: Таймаут при скачивании комментариев.
         """
-        headers = {"User-Agent": self.ua.random}
-        proxy, proxy_auth = await self._get_proxy()
         article_num = comment_url.split('/')[-3]
         try:
-            async with session.get(comment_url, proxy=proxy, proxy_auth=proxy_auth, headers=headers) as response:
-                soup = await self._get_soup(response)
-                comments = [comment.text.strip() for comment in soup.select("div.tm-comment__body-content_v2 p") if comment.text.strip()]
-                logging.info(f"Article_num={article_num}. Успешный парсинг комментария.")
-                return comments
-        except (TimeoutError, CancelledError):
+            comments = [comment async for comment in self._iter_comments(session, comment_url)]
+            logging.info(f"Article_num={article_num}. Успешный парсинг комментария.")
+            return comments
+        except TimeoutError as e:
             logging.warning(f"Ошибка подключения или лимит таймаута комментариев, {article_num=}.")
+            raise HabrParseError(f"Таймаут при скачивании комментариев {comment_url}.") from e
 
-
-    async def _get_proxy(self) -> Tuple[Optional[str], Optional[str]]:
+    async def _iter_comments(self, session: RetryClient, comment_url: str) -> AsyncIterator[str]:
         """
-        Возвращает случайный прокси из списка, если он задан.
+        Читает страницу комментариев кусками по stream_chunk_size байт, передаёт их
+        инкрементальному парсеру бэкенда self.extractor (в потоке STREAM_PARSER_EXECUTOR) и отдаёт комментарии
+        по мере готовности.
 
-        :return: Кортеж из прокси и данных для аутентификации (если есть).
+        :param session: Сессия для выполнения HTTP-запросов.
+        :param comment_url: URL страницы с комментариями.
+        :return: Асинхронный генератор текстов комментариев.
         """
-        if self.proxies is None:
-            return None, None
-        return random.choice(self.proxies)
-    
+        async with self._fetch(session, comment_url) as (charset, chunks):
+            decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+            loop = asyncio.get_running_loop()
+            stream_parser = await loop.run_in_executor(STREAM_PARSER_EXECUTOR, self.extractor.comments_stream_parser)
+            async for chunk in chunks:
+                for comment in await loop.run_in_executor(STREAM_PARSER_EXECUTOR, stream_parser.feed, decoder.decode(chunk)):
+                    yield comment
+            tail = decoder.decode(b"", final=True)
+            for comment in await loop.run_in_executor(STREAM_PARSER_EXECUTOR, self._close_stream_parser, stream_parser, tail):
+                yield comment
+
+    @staticmethod
+    def _close_stream_parser(stream_parser, tail: str) -> list[str]:
+        """Дочитывает остаток страницы и завершает разбор."""
+        return stream_parser.feed(tail) + stream_parser.close()
 
-    async def parsing_latest_articles(self) -> list[dict[str, str]]:
+
+    async def parsing_latest_articles(self, articles_amount: Optional[int] = None) -> list[dict[str, str]]:
         """
         Получает последние статьи с Хабра (habr.com).
 
+        :param articles_amount: Количество статей (по умолчанию latest_articles_amount).
         :returns: Список словарей, в котором содержится заголовок, время публикации и  url статьи.
         """
-        async with aiohttp.ClientSession(timeout=self.timeout, raise_for_status=False) as client_session:
-            async with RetryClient(client_session=client_session, retry_options=self.retry_options) as retry_session:
-                latest_articles_result = await self._get_latest_articles_data(retry_session)
-                return latest_articles_result
+        session = await self._get_session()
+        latest_articles_result = await self._get_latest_articles_data(session, articles_amount or self.latest_articles_amount)
+        return latest_articles_result
     
     
-    async def _get_latest_articles_data(self, session: RetryClient) -> list[dict[str, str]]:
+    async def _get_latest_articles_data(self, session: RetryClient, articles_amount: int) -> list[dict[str, str]]:
         """
-        Парсит HTML-страницу https://habr.com/ru/companies/ru_mts/articles/,
-        извлекает данные о последних статьях с помощью BeautifulSoup.
+        Парсит HTML-страницы списка статей (по умолчанию https://habr.com/ru/companies/ru_mts/articles/),
+        извлекает данные о последних статьях с помощью бэкенда self.extractor.
+        Если статей нужно больше, чем помещается на одной странице, страницы скачиваются параллельно.
 
         :param session: Сессия для выполнения HTTP-запросов.
+        :param articles_amount: Количество статей.
         :returns:
             list[dict[str, str]]: Список словарей, где каждый словарь содержит:
                 - 'title' (str): Заголовок статьи.
                 - 'publish_time' (str): Время публикации в формате строки.
                 - 'url' (str): URL статьи.
+        :raises HabrParseError: Таймаут при скачивании списка статей.
         """
-        articles_amount = 5
-        url = 'https://habr.com/ru/companies/ru_mts/articles/'
-        headers = {"User-Agent": self.ua.random}
-        proxy, proxy_auth = await self._get_proxy()
+        pages_amount = ceil(articles_amount / self.latest_articles_per_page)
+        urls = [self.latest_articles_url] + [f"{self.latest_articles_url}page{page}/" for page in range(2, pages_amount + 1)]
+        base_url = urljoin(self.latest_articles_url, "/")
         try:
-            async with session.get(url, proxy=proxy, proxy_auth=proxy_auth, headers=headers) as response:
-                soup = await self._get_soup(response)
-                latest_articles = []
-                for article in soup.find_all(class_="tm-articles-list__item", limit=articles_amount):
-                    publish_time = article.find("time").string
-                    title_with_link = article.find(class_="tm-title__link")
-                    title = title_with_link.string
-                    article_url = 'https://habr.com' + title_with_link["href"]
-                    latest_articles.append({
-                        'title': title,
-                        'publish_time': publish_time,
-                        'url': article_url
-                    })
-                logging.info("Успешно спарсили последние статьи с Хабра.")
-                return latest_articles
-        except (TimeoutError, CancelledError):
+            pages = await asyncio.gather(*(
+                self._extract(session, url, "latest_articles", articles_amount, base_url) for url in urls
+            ))
+            # Пока скачивались страницы, новая статья могла сдвинуть список: убираем повторы.
+            latest_articles, seen_urls = [], set()
+            for article in chain.from_iterable(pages):
+                if article['url'] not in seen_urls:
+                    seen_urls.add(article['url'])
+                    latest_articles.append(article)
+            latest_articles = latest_articles[:articles_amount]
+            logging.info("Успешно спарсили последние статьи с Хабра.")
+            return latest_articles
+        except TimeoutError as e:
             logging.warning("Ошибка или таймаут при получении списка последних статей.")
+            raise HabrParseError("Таймаут при скачивании списка последних статей.") from e
 
 
 PARSER_SETTINGS = {
@@ -196,6 +514,25 @@ PARSER_SETTINGS = {
     "attemps": None,  # Количество попыток повторного запроса при возникновении ошибок.
     "proxies": None,  # Список прокси для использования в запросах (например, [("http://proxy1", BasicAuth("login", "password")), ...]
     "timeout": None,  # Таймаут для HTTP-запросов (в секундах).
+    "connections_limit": 100,  # Максимальное число открытых соединений в общем пуле.
+    "connections_limit_per_host": 10,  # Максимальное число соединений к одному хосту (habr.com).
+    "dns_cache_ttl": 300,  # Время жизни записей DNS-кэша (в секундах).
+    "keepalive_timeout": 30,  # Время удержания простаивающего keep-alive соединения (в секундах).
+    "batch_concurrency": 5,  # Количество статей, одновременно обрабатываемых в parsing_articles.
+    "extractor": "auto",  # Бэкенд извлечения HTML: "bs4", "selectolax" или "auto" (selectolax, если установлен).
+    "stream_chunk_size": 64 * 1024,  # Размер куска (в байтах) при потоковом чтении страницы комментариев.
+    "http_cache_dir": join(gettempdir(), "habr_http_cache"),  # Каталог HTTP-кэша страниц Хабра (None - кэш отключён).
+    "http_cache_max_size": 256 * 1024 * 1024,  # Максимальный размер HTTP-кэша (в байтах), старые записи вытесняются (LRU).
+    "latest_articles_url": "https://habr.com/ru/companies/ru_mts/articles/",  # Первая страница списка последних статей.
+    "latest_articles_amount": 5,  # Количество последних статей, отдаваемых /api/v1/latest/.
+    "latest_articles_per_page": 20,  # Количество статей на одной странице списка Хабра.
+    "proxy_rate": 1.0,  # Максимальная частота запросов через один прокси (в секунду).
+    "proxy_burst": 5,  # Допустимый всплеск запросов через один прокси.
+    "proxy_eject_after": 3,  # Количество ошибок подряд, после которого прокси временно исключается из пула.
+    "proxy_eject_time": 30,  # Время первого исключения прокси (в секундах), при повторных исключениях удваивается.
+    "host_rate": 5.0,  # Максимальная частота запросов к одному хосту без прокси (в секунду), None - без ограничения.
+    "host_burst": 10,  # Допустимый всплеск запросов к одному хосту.
+    "max_retry_after": 60,  # Максимальная пауза (в секундах) по заголовку Retry-After ответов 429/503.
 }
 
 parser = HabrParser(
@@ -203,4 +540,23 @@ parser = HabrParser(
         exceptions=PARSER_SETTINGS['exceptions'],
         timeout=PARSER_SETTINGS['timeout'],
         attemps=PARSER_SETTINGS['attemps'],
+        connections_limit=PARSER_SETTINGS['connections_limit'],
+        connections_limit_per_host=PARSER_SETTINGS['connections_limit_per_host'],
+        dns_cache_ttl=PARSER_SETTINGS['dns_cache_ttl'],
+        keepalive_timeout=PARSER_SETTINGS['keepalive_timeout'],
+        batch_concurrency=PARSER_SETTINGS['batch_concurrency'],
+        extractor=PARSER_SETTINGS['extractor'],
+        stream_chunk_size=PARSER_SETTINGS['stream_chunk_size'],
+        http_cache_dir=PARSER_SETTINGS['http_cache_dir'],
+        http_cache_max_size=PARSER_SETTINGS['http_cache_max_size'],
+        latest_articles_url=PARSER_SETTINGS['latest_articles_url'],
+        latest_articles_amount=PARSER_SETTINGS['latest_articles_amount'],
+        latest_articles_per_page=PARSER_SETTINGS['latest_articles_per_page'],
+        proxy_rate=PARSER_SETTINGS['proxy_rate'],
+        proxy_burst=PARSER_SETTINGS['proxy_burst'],
+        proxy_eject_after=PARSER_SETTINGS['proxy_eject_after'],
+        proxy_eject_time=PARSER_SETTINGS['proxy_eject_time'],
+        host_rate=PARSER_SETTINGS['host_rate'],
+        host_burst=PARSER_SETTINGS['host_burst'],
+        max_retry_after=PARSER_SETTINGS['max_retry_after'],
 )
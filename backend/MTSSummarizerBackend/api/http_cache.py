@@ -0,0 +1,219 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Mapping, Optional
+
+
+@dataclass
+class CacheEntry:
+    """
+    Метаданные закэшированного ответа.
+    """
+    key: str
+    url: str
+    charset: str
+    size: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def validators(self) -> dict[str, str]:
+        """
+        Заголовки условного запроса (If-None-Match / If-Modified-Since) для ревалидации.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class DiskHTTPCache:
+    """
+    Дисковый HTTP-кэш с условными запросами и LRU-вытеснением по суммарному размеру.
+
+    Тело ответа хранится в файле <key>.body, метаданные - в <key>.json, где key - sha256 от URL.
+    Файлы записываются через временный файл и os.replace, поэтому каталог можно
+    разделять между несколькими воркерами. Состояние кэша берётся из самого каталога:
+    запись ищется по файлу метаданных, а размер и порядок LRU (время изменения тела,
+    обновляется при попадании) пересчитываются по файлам перед вытеснением, поэтому
+    записи других воркеров учитываются и вытесняются наравне со своими.
+
+    Вся работа с файлами выполняется в потоках (asyncio.to_thread) и не блокирует
+    event loop. Каталог создаётся при первой записи.
+
+    :param directory: Каталог для хранения кэша.
+    :param max_size: Максимальный суммарный размер тел ответов (в байтах).
+    """
+
+    def __init__(self, directory: str, max_size: int) -> None:
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.entries = 0  # Записей в каталоге при последнем пересчёте
+        self.size = 0  # Размер тел ответов в каталоге при последнем пересчёте
+        self.hits = 0  # Ответ 304, тело отдано из кэша
+        self.misses = 0  # Тело скачано целиком
+        self.stores = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def _body_path(self, key: str) -> Path:
+        return self.directory / f"{key}.body"
+
+    def _metadata_path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    async def lookup(self, url: str) -> Optional[CacheEntry]:
+        """
+        Возвращает запись для URL, если она есть в кэше.
+        """
+        return await asyncio.to_thread(self._read_entry, self._key(url))
+
+    def _read_entry(self, key: str) -> Optional[CacheEntry]:
+        try:
+            entry = CacheEntry(**json.loads(self._metadata_path(key).read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError):
+            return None
+        # Тело могло вытеснить другой воркер, разделяющий каталог кэша.
+        return entry if self._body_path(key).exists() else None
+
+    async def iter_body(self, entry: CacheEntry, chunk_size: int) -> AsyncIterator[bytes]:
+        """
+        Отдаёт закэшированное тело кусками и помечает запись как недавно использованную.
+        """
+        self.hits += 1
+        self.bytes_saved += entry.size
+        body_file = await asyncio.to_thread(self._open_body, entry.key)
+        try:
+            while chunk := await asyncio.to_thread(body_file.read, chunk_size):
+                yield chunk
+        finally:
+            body_file.close()
+
+    def _open_body(self, key: str) -> BinaryIO:
+        body_path = self._body_path(key)
+        os.utime(body_path)
+        return open(body_path, "rb")
+
+    async def store_stream(
+        self,
+        url: str,
+        headers: Mapping[str, str],
+        charset: str,
+        chunks: AsyncIterator[bytes]
+    ) -> AsyncIterator[bytes]:
+        """
+        Пропускает через себя куски тела ответа, параллельно записывая их в кэш.
+
+        Запись попадает в кэш, только если тело прочитано до конца и у ответа есть
+        ETag или Last-Modified. Ответы больше max_size не кэшируются.
+
+        :param url: URL запроса.
+        :param headers: Заголовки ответа.
+        :param charset: Кодировка тела ответа.
+        :param chunks: Куски тела ответа.
+        :return: Те же куски тела ответа.
+        """
+        self.misses += 1
+        etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+        if not etag and not last_modified:
+            async for chunk in chunks:
+                yield chunk
+            return
+        key = self._key(url)
+        body_file, temporary_path = await asyncio.to_thread(self._create_temporary)
+        size, completed = 0, False
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size <= self.max_size:
+                    await asyncio.to_thread(body_file.write, chunk)
+                yield chunk
+            completed = size <= self.max_size
+        finally:
+            await asyncio.to_thread(body_file.close)
+            if completed:
+                await asyncio.to_thread(self._commit, CacheEntry(key, url, charset, size, etag, last_modified),
+                                        temporary_path)
+            else:
+                await asyncio.to_thread(os.unlink, temporary_path)
+
+    def _create_temporary(self) -> tuple[BinaryIO, str]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        return os.fdopen(descriptor, "wb"), temporary_path
+
+    def _commit(self, entry: CacheEntry, temporary_path: str) -> None:
+        os.replace(temporary_path, self._body_path(entry.key))
+        # Метаданные тоже заменяются атомарно: другой воркер не прочитает недописанный JSON.
+        descriptor, metadata_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as metadata_file:
+                json.dump(asdict(entry), metadata_file)
+            os.replace(metadata_path, self._metadata_path(entry.key))
+        except BaseException:
+            os.unlink(metadata_path)
+            raise
+        self.stores += 1
+        self._evict()
+
+    def _scan(self) -> list[tuple[float, int, str]]:
+        """
+        Пересчитывает записи кэша по каталогу: (время использования, размер, key) для каждого тела.
+        """
+        bodies = []
+        with os.scandir(self.directory) as directory_entries:
+            for directory_entry in directory_entries:
+                if not directory_entry.name.endswith(".body"):
+                    continue
+                try:
+                    stat = directory_entry.stat()
+                except FileNotFoundError:
+                    continue  # Вытеснено другим воркером во время обхода
+                bodies.append((stat.st_mtime, stat.st_size, directory_entry.name.removesuffix(".body")))
+        return bodies
+
+    def _evict(self) -> None:
+        bodies = self._scan()
+        size = sum(body_size for _, body_size, _ in bodies)
+        bodies.sort()
+        evicted = 0
+        while size > self.max_size and evicted < len(bodies):
+            _, body_size, key = bodies[evicted]
+            evicted += 1
+            size -= body_size
+            for path in (self._body_path(key), self._metadata_path(key)):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass  # Уже вытеснено другим воркером
+        self.evictions += evicted
+        self.entries, self.size = len(bodies) - evicted, size
+        if evicted:
+            logging.info(f"HTTP-кэш: вытеснено {evicted} записей, осталось {self.entries} записей, {self.size} байт.")
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Счётчики кэша для подбора его размера.
+        """
+        requests = self.hits + self.misses
+        return {
+            "entries": self.entries,
+            "size": self.size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "bytes_saved": self.bytes_saved,
+        }
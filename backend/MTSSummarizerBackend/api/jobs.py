@@ -0,0 +1,418 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from os import getenv
+from typing import Optional
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, transaction
+from django.db.models import Case, Q, Value, When
+from django.contrib.auth.models import AbstractBaseUser
+from django.utils import timezone
+from rest_framework.exceptions import APIException, status
+from rest_framework.request import Request
+from rest_framework.throttling import AnonRateThrottle
+from .admission import admission_controller
+from .habr_parser import normalize_article_url
+from .models import Article, SummaryJob
+from .progress import summary_progress
+from .services import get_summary
+from .task_queue import TaskQueue
+
+
+class DeadlineExceeded(APIException):
+    status_code = status.HTTP_504_GATEWAY_TIMEOUT
+    default_detail = 'Резюме не готово к крайнему сроку запроса.'
+    default_code = 'deadline_exceeded'
+
+
+class SummaryJobWorker:
+
+    def __init__(
+        self,
+        concurrency: int,
+        poll_interval: float,
+        lease_time: float,
+        max_attempts: int,
+        progress_interval: float = 0.25
+    ) -> None:
+        """
+        Воркеры долговременной очереди задач суммаризации (таблица SummaryJob).
+
+        Задачи забираются из базы запросом SELECT ... FOR UPDATE SKIP LOCKED, поэтому
+        воркеры могут работать в любом количестве процессов (веб-процессы и отдельная
+        команда run_summary_workers) и не мешают друг другу. Задача, взятая воркером,
+        арендуется на lease_time секунд, и аренда продлевается каждые lease_time / 3 секунд,
+        пока задача выполняется (в том числе пока ждёт свободного воркера TaskQueue): если
+        процесс воркера упал, после окончания аренды задачу заберёт другой воркер. Номер
+        попытки служит меткой владельца: продление аренды и запись результата проходят, только
+        пока задача числится за этой попыткой, поэтому воркер, потерявший аренду, прекращает
+        обработку и не перезаписывает результат нового владельца.
+
+        Задача с истёкшим крайним сроком снимается, не начавшись, а выполняемая задача
+        прерывается по крайнему сроку или при отмене (статус cancelled в базе, например,
+        после отключения клиента) - вместе с исходящими запросами к моделям.
+
+        Промежуточные результаты (куски резюме по мере генерации, анализ комментариев)
+        записываются в поле progress задачи не чаще раза в progress_interval секунд,
+        откуда их читает поток событий задачи в любом процессе.
+
+        :param concurrency: Количество задач, одновременно обрабатываемых в процессе.
+        :param poll_interval: Период опроса таблицы задач, если задач нет (в секундах).
+        :param lease_time: Время аренды задачи воркером (в секундах).
+        :param max_attempts: Максимальное количество попыток выполнения задачи.
+        :param progress_interval: Минимальный интервал записи промежуточных результатов в базу (в секундах).
+        """
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_time = lease_time
+        self.max_attempts = max_attempts
+        self.progress_interval = progress_interval
+        self._workers: list[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._watcher: Optional[asyncio.Task] = None
+        self._running: dict[uuid.UUID, asyncio.Task] = {}
+        self.processed = 0
+        self.failed = 0
+        self.retried = 0
+        self.cancelled = 0  # Задачи, отменённые во время выполнения
+        self.expired = 0  # Задачи, снятые по крайнему сроку
+
+    def start(self) -> None:
+        """
+        Запускает воркеры. Вызывается при старте приложения (ASGI lifespan) или командой run_summary_workers.
+        """
+        if self._workers:
+            return
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+        self._watcher = asyncio.create_task(self._watch_cancelled())
+        logging.info(f"Воркеры задач суммаризации запущены: {self.concurrency}.")
+
+    async def close(self) -> None:
+        """
+        Останавливает воркеры. Незавершённые задачи возвращаются в очередь.
+        """
+        if self._watcher is not None:
+            self._watcher.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, *filter(None, (self._watcher,)), return_exceptions=True)
+        self._workers, self._watcher = [], None
+
+    def notify(self) -> None:
+        """
+        Будит воркеры этого процесса, не дожидаясь следующего опроса (после постановки новой задачи).
+        """
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def cancel(self, job_id: uuid.UUID) -> bool:
+        """
+        Прерывает обработку задачи, если она выполняется в этом процессе.
+
+        :param job_id: Идентификатор задачи.
+        :return: Выполнялась ли задача в этом процессе.
+        """
+        processing = self._running.get(job_id)
+        if processing is None:
+            return False
+        processing.cancel()
+        return True
+
+    async def _watch_cancelled(self) -> None:
+        # Задачу могли отменить в другом процессе: проверяем статусы выполняемых задач.
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self._running:
+                continue
+            try:
+                cancelled_ids = [job_id async for job_id in SummaryJob.objects
+                                 .filter(pk__in=list(self._running), status=SummaryJob.CANCELLED)
+                                 .values_list('id', flat=True)]
+            except Exception as e:
+                logging.warning(f"Не удалось проверить отмену задач суммаризации: {e!r}.")
+                continue
+            for job_id in cancelled_ids:
+                self.cancel(job_id)
+
+    async def _claim(self) -> Optional[SummaryJob]:
+        claiming = asyncio.ensure_future(sync_to_async(self._claim_job)())
+        try:
+            return await asyncio.shield(claiming)
+        except asyncio.CancelledError:
+            # Остановка воркера во время захвата: задача уже может быть помечена выполняемой.
+            job = await claiming
+            if job is not None:
+                await self._owned(job).aupdate(status=SummaryJob.QUEUED, attempts=job.attempts - 1)
+            raise
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Закрываем соединение с базой, сломанное ошибкой (например, после перезапуска PostgreSQL).
+                await sync_to_async(close_old_connections)()
+                job = await self._claim()
+            except Exception as e:
+                logging.warning(f"Не удалось получить задачу суммаризации: {e!r}.")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._process(job)
+
+    @transaction.atomic
+    def _claim_job(self) -> Optional[SummaryJob]:
+        now = timezone.now()
+        while True:
+            job = (SummaryJob.objects
+                   .select_for_update(skip_locked=True)
+                   .filter(Q(status=SummaryJob.QUEUED) | Q(status=SummaryJob.RUNNING, lease_expires_at__lt=now))
+                   # Задачи предзагрузки берутся после задач пользователей, порядок остальных определяет TaskQueue.
+                   .order_by(Case(When(priority=TaskQueue.PREFETCH, then=Value(1)), default=Value(0)), 'created_at')
+                   .first())
+            if job is None:
+                return None
+            if job.deadline is not None and job.deadline <= now:
+                # Результат уже никто не ждёт: снимаем задачу, не начиная её.
+                job.status, job.error, job.finished_at = SummaryJob.CANCELLED, "Истёк крайний срок выполнения.", now
+                job.save(update_fields=('status', 'error', 'finished_at'))
+                self.expired += 1
+                continue
+            if job.attempts < self.max_attempts:
+                break
+            # Воркер, выполнявший задачу, упал на последней попытке.
+            job.status, job.error, job.finished_at = SummaryJob.FAILED, "Превышено количество попыток.", now
+            job.save(update_fields=('status', 'error', 'finished_at'))
+            self.failed += 1
+        job.status = SummaryJob.RUNNING
+        job.attempts += 1
+        job.started_at = now
+        job.lease_expires_at = now + timedelta(seconds=self.lease_time)
+        job.progress = {}
+        job.save(update_fields=('status', 'attempts', 'started_at', 'lease_expires_at', 'progress'))
+        return job
+
+    @staticmethod
+    def _owned(job: SummaryJob):
+        """
+        Задача, если она всё ещё выполняется этой попыткой (не отменена и не забрана другим воркером).
+        """
+        return SummaryJob.objects.filter(pk=job.pk, status=SummaryJob.RUNNING, attempts=job.attempts)
+
+    async def _renew_lease(self, job: SummaryJob, processing: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(self.lease_time / 3)
+            try:
+                renewed = await self._owned(job).aupdate(
+                    lease_expires_at=timezone.now() + timedelta(seconds=self.lease_time))
+            except Exception as e:
+                logging.warning(f"Не удалось продлить аренду задачи суммаризации {job.id}: {e!r}.")
+                continue
+            if not renewed:
+                # Задачу отменили или, пока аренда не продлевалась, её забрал другой воркер.
+                logging.warning(f"Задача суммаризации {job.id} больше не числится за этим воркером, обработка прервана.")
+                processing.cancel()
+                return
+
+    @transaction.atomic
+    def _complete_job(self, job: SummaryJob, summary) -> bool:
+        if not self._owned(job).select_for_update().exists():
+            return False
+        if job.user_id is not None:
+            job.article = Article.objects.create(url=job.url, title=summary.title, summary=summary, user_id=job.user_id)
+        job.status, job.summary, job.error, job.finished_at = SummaryJob.DONE, summary, "", timezone.now()
+        job.save(update_fields=('status', 'summary', 'article', 'error', 'finished_at'))
+        return True
+
+    async def _save_progress(self, job: SummaryJob, key: str, changed: asyncio.Event) -> None:
+        while True:
+            await changed.wait()
+            changed.clear()
+            await SummaryJob.objects.filter(pk=job.pk).aupdate(progress=summary_progress.get(key))
+            await asyncio.sleep(self.progress_interval)
+
+    async def _process(self, job: SummaryJob) -> None:
+        processing = asyncio.create_task(get_summary(job.url, job.priority, job.owner or None))
+        self._running[job.id] = processing
+        deadline = None
+        if job.deadline is not None:
+            deadline = asyncio.get_running_loop().time() + (job.deadline - timezone.now()).total_seconds()
+        deadline_timeout = asyncio.timeout_at(deadline)
+        progress_key = normalize_article_url(job.url)
+        try:
+            with summary_progress.subscribe(progress_key) as changed:
+                saving_progress = asyncio.create_task(self._save_progress(job, progress_key, changed))
+                renewing_lease = asyncio.create_task(self._renew_lease(job, processing))
+                try:
+                    async with deadline_timeout:
+                        summary = await processing
+                finally:
+                    saving_progress.cancel()
+                    renewing_lease.cancel()
+        except asyncio.CancelledError:
+            if not asyncio.current_task().cancelling():
+                # Задача отменена (например, клиент отключился), её статус уже записан в базу.
+                self.cancelled += 1
+                logging.info(f"Задача суммаризации {job.id} отменена.")
+                return
+            # Остановка воркера: возвращаем задачу в очередь, не засчитывая попытку.
+            await asyncio.shield(self._owned(job).aupdate(status=SummaryJob.QUEUED, attempts=job.attempts - 1))
+            raise
+        except Exception as e:
+            if isinstance(e, TimeoutError) and deadline_timeout.expired():
+                await self._owned(job).aupdate(status=SummaryJob.CANCELLED, error="Истёк крайний срок выполнения.",
+                                               finished_at=timezone.now())
+                self.expired += 1
+                logging.info(f"Задача суммаризации {job.id} прервана по крайнему сроку.")
+                return
+            if job.attempts < self.max_attempts:
+                await self._owned(job).aupdate(status=SummaryJob.QUEUED, error=str(e))
+                self.retried += 1
+                logging.warning(f"Задача суммаризации {job.id} будет повторена: {e!r}.")
+            else:
+                await self._owned(job).aupdate(status=SummaryJob.FAILED, error=str(e), finished_at=timezone.now())
+                self.failed += 1
+                logging.warning(f"Задача суммаризации {job.id} завершилась ошибкой: {e!r}.")
+            return
+        finally:
+            del self._running[job.id]
+        if not await sync_to_async(self._complete_job)(job, summary):
+            logging.warning(f"Результат задачи суммаризации {job.id} не записан: задача больше не числится за этим воркером.")
+            return
+        self.processed += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "workers": len(self._workers),
+            "processed": self.processed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "expired": self.expired,
+            "running": len(self._running),
+        }
+
+
+JOB_WORKER_SETTINGS = {
+    # Запускать ли воркеры внутри веб-процессов. При False задачи обрабатывает только команда run_summary_workers.
+    "in_process": getenv('SUMMARY_JOB_WORKERS_IN_PROCESS', 'true').lower() == 'true',
+    # Количество задач, одновременно обрабатываемых в одном процессе. Больше числа воркеров TaskQueue,
+    # чтобы порядок суммаризации ожидающих задач определял её планировщик, а не порядок постановки.
+    "concurrency": 16,
+    "poll_interval": 1.0,  # Период опроса таблицы задач, если задач нет (в секундах).
+    # Время аренды задачи воркером (в секундах), продлевается, пока задача выполняется.
+    # Задачу воркера, который упал, не вернув её в очередь, другой воркер заберёт после окончания аренды.
+    "lease_time": 60,
+    "max_attempts": 3,  # Максимальное количество попыток выполнения задачи.
+    # Крайний срок синхронного запроса на суммаризацию (в секундах), меньше proxy_read_timeout nginx (500 с).
+    "request_deadline": 480,
+    "progress_interval": 0.25,  # Минимальный интервал записи промежуточных результатов задачи в базу (в секундах).
+}
+
+summary_job_worker = SummaryJobWorker(
+    concurrency=JOB_WORKER_SETTINGS['concurrency'],
+    poll_interval=JOB_WORKER_SETTINGS['poll_interval'],
+    lease_time=JOB_WORKER_SETTINGS['lease_time'],
+    max_attempts=JOB_WORKER_SETTINGS['max_attempts'],
+    progress_interval=JOB_WORKER_SETTINGS['progress_interval'],
+)
+
+
+def request_deadline() -> datetime:
+    """
+    Крайний срок для задачи, результат которой ждёт HTTP-запрос (см. JOB_WORKER_SETTINGS['request_deadline']).
+    """
+    return timezone.now() + timedelta(seconds=JOB_WORKER_SETTINGS['request_deadline'])
+
+
+def request_owner(request: Request) -> str:
+    """
+    Владелец задачи для честного разделения очереди: id пользователя, а для анонимного
+    запроса - IP клиента (так же, как его определяет ограничение частоты запросов DRF).
+    """
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    return f"ip:{AnonRateThrottle().get_ident(request)}"[:SummaryJob._meta.get_field('owner').max_length]
+
+
+async def submit_job(
+    url: str,
+    user: Optional[AbstractBaseUser] = None,
+    deadline: Optional[datetime] = None,
+    priority: Optional[str] = None,
+    owner: str = ""
+) -> SummaryJob:
+    """
+    Ставит задачу суммаризации в общую очередь (с контролем допуска) и будит воркеры этого процесса.
+
+    :param url: URL статьи.
+    :param user: Пользователь (None для анонимного запроса).
+    :param deadline: Крайний срок выполнения задачи (None - без срока).
+    :param priority: Класс приоритета задачи (см. TaskQueue), по умолчанию AUTHENTICATED или ANONYMOUS по user.
+    :param owner: Владелец задачи для честного разделения очереди (см. request_owner),
+                  по умолчанию - пользователь, а без него все задачи класса приоритета разделяют одну очередь.
+    :return: Созданная задача.
+    :raises Throttled: Очередь заполнена (ответ 429 с заголовком Retry-After).
+    """
+    if priority is None:
+        priority = TaskQueue.AUTHENTICATED if user is not None else TaskQueue.ANONYMOUS
+    if not owner and user is not None:
+        owner = f"user:{user.pk}"
+    job = await admission_controller.submit(url, user, deadline, priority, owner)
+    summary_job_worker.notify()
+    return job
+
+
+async def cancel_job(job: SummaryJob, reason: str) -> bool:
+    """
+    Отменяет задачу суммаризации, если она ещё не завершена.
+
+    Воркер этого процесса прерывает обработку сразу, воркеры других процессов -
+    при следующей проверке статусов выполняемых задач.
+
+    :param job: Задача.
+    :param reason: Причина отмены (сохраняется в поле error).
+    :return: Была ли задача отменена (False, если она уже завершилась).
+    """
+    cancelled = await (SummaryJob.objects
+                       .filter(pk=job.pk, status__in=(SummaryJob.QUEUED, SummaryJob.RUNNING))
+                       .aupdate(status=SummaryJob.CANCELLED, error=reason, finished_at=timezone.now()))
+    if cancelled:
+        summary_job_worker.cancel(job.pk)
+    return bool(cancelled)
+
+
+async def wait_for_job(job: SummaryJob, poll_interval: float = 0.5) -> SummaryJob:
+    """
+    Дожидается завершения задачи суммаризации (её может выполнить воркер любого процесса).
+
+    Если ожидание прервано (клиент отключился) или наступил крайний срок задачи,
+    задача отменяется, чтобы не тратить вызовы моделей на ненужный результат.
+
+    :param job: Задача.
+    :param poll_interval: Период проверки статуса задачи (в секундах).
+    :return: Выполненная задача с загруженными резюме и статьёй.
+    :raises APIException: Задача завершилась ошибкой.
+    :raises DeadlineExceeded: Задача не выполнена к крайнему сроку.
+    """
+    try:
+        while job.status not in SummaryJob.FINISHED_STATUSES:
+            if job.deadline is not None and timezone.now() >= job.deadline:
+                if await cancel_job(job, "Истёк крайний срок выполнения."):
+                    raise DeadlineExceeded()
+            else:
+                await asyncio.sleep(poll_interval)
+            job = await SummaryJob.objects.select_related('summary', 'article__summary').aget(pk=job.pk)
+    except asyncio.CancelledError:
+        await asyncio.shield(cancel_job(job, "Клиент отключился, не дождавшись результата."))
+        raise
+    if job.status == SummaryJob.FAILED:
+        raise APIException(f"Program got some issues during summary: {job.error}")
+    if job.status == SummaryJob.CANCELLED:
+        raise DeadlineExceeded(job.error)
+    return job
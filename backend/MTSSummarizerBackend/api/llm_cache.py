@@ -0,0 +1,156 @@
+import hashlib
+import json
+import logging
+from datetime import timedelta
+from os import getenv
+from typing import Any, Optional
+from django.db import DatabaseError
+from django.db.models import F, Sum
+from django.utils import timezone
+
+
+class LLMResponseCache:
+
+    def __init__(self, ttl: float, max_size: int, evict_interval: int = 100) -> None:
+        """
+        Кэш ответов LLM в PostgreSQL (модель LLMResponse), общий для всех процессов и воркеров.
+
+        Ключ - SHA-256 от модели, temperature, max_tokens и сообщений запроса, поэтому
+        одинаковый запрос (повтор задачи после сбоя API моделей, повторная суммаризация
+        неизменившейся статьи или той же части длинной статьи, одна статья от разных
+        пользователей) не уходит в API повторно. Ответ старше ttl считается промахом и
+        удаляется. Каждые evict_interval записей удаляются устаревшие ответы, а если
+        суммарный размер ответов больше max_size, - давно не использованные.
+
+        Ошибка базы данных не ломает суммаризацию: запрос просто идёт в API.
+
+        :param ttl: Время жизни ответа (в секундах).
+        :param max_size: Максимальный суммарный размер ответов (в байтах).
+        :param evict_interval: Через сколько записей запускать вытеснение.
+        """
+        self.ttl = timedelta(seconds=ttl)
+        self.max_size = max_size
+        self.evict_interval = evict_interval
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stores = 0
+        self.evictions = 0
+        self.errors = 0
+        self.tokens_saved = 0
+        self._stores_since_eviction = 0
+
+    @staticmethod
+    def _model():
+        # Импорт при первом обращении: модуль импортируется из DeepSeekModel, который нужен и без Django (бенчмарки).
+        from .models import LLMResponse
+        return LLMResponse
+
+    @staticmethod
+    def key(model: str, temperature: float, max_tokens: int, messages: list[dict[str, str]]) -> str:
+        """
+        Отпечаток запроса к модели.
+        """
+        fingerprint = json.dumps([model, temperature, max_tokens, messages], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(fingerprint.encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Возвращает закэшированный ответ или None.
+        """
+        model = self._model()
+        try:
+            entry = await model.objects.filter(key=key).only('created_at', 'response', 'prompt_tokens',
+                                                            'completion_tokens').afirst()
+            if entry is not None and entry.created_at < timezone.now() - self.ttl:
+                await model.objects.filter(key=key).adelete()
+                self.expired += 1
+                entry = None
+            if entry is not None:
+                await model.objects.filter(key=key).aupdate(last_used_at=timezone.now(), hits=F('hits') + 1)
+        except DatabaseError as e:
+            self.errors += 1
+            logging.warning(f"Кэш ответов LLM недоступен: {e}.")
+            return None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.tokens_saved += entry.prompt_tokens + entry.completion_tokens
+        return entry.response
+
+    async def set(self, key: str, model_name: str, response: str, usage: Any = None) -> None:
+        """
+        Сохраняет ответ модели.
+
+        :param key: Отпечаток запроса (см. key).
+        :param model_name: Модель.
+        :param response: Ответ модели.
+        :param usage: Поле usage ответа OpenAI-совместимого API (None, если API его не вернуло).
+        """
+        now = timezone.now()
+        try:
+            await self._model().objects.aupdate_or_create(key=key, defaults={
+                "model": model_name,
+                "response": response,
+                "prompt_tokens": usage.prompt_tokens if usage is not None else 0,
+                "completion_tokens": usage.completion_tokens if usage is not None else 0,
+                "size": len(response.encode()),
+                "created_at": now,
+                "last_used_at": now,
+            })
+            self.stores += 1
+            self._stores_since_eviction += 1
+            if self._stores_since_eviction >= self.evict_interval:
+                self._stores_since_eviction = 0
+                await self.evict()
+        except DatabaseError as e:
+            self.errors += 1
+            logging.warning(f"Не удалось сохранить ответ LLM в кэш: {e}.")
+
+    async def evict(self) -> None:
+        """
+        Удаляет устаревшие ответы, затем давно не использованные, пока размер кэша больше max_size.
+        """
+        model = self._model()
+        expired, _ = await model.objects.filter(created_at__lt=timezone.now() - self.ttl).adelete()
+        self.expired += expired
+        size = (await model.objects.aaggregate(size=Sum('size')))['size'] or 0
+        if size <= self.max_size:
+            return
+        evicted_keys = []
+        async for key, entry_size in model.objects.order_by('last_used_at').values_list('key', 'size'):
+            if size <= self.max_size:
+                break
+            evicted_keys.append(key)
+            size -= entry_size
+        evicted, _ = await model.objects.filter(key__in=evicted_keys).adelete()
+        self.evictions += evicted
+        logging.info(f"Из кэша ответов LLM вытеснено записей: {evicted}.")
+
+    def stats(self) -> dict[str, int | float]:
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+            "expired": self.expired,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            "tokens_saved": self.tokens_saved,
+        }
+
+
+LLM_CACHE_SETTINGS = {
+    "enabled": getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true',
+    "ttl": 7 * 24 * 60 * 60,  # Время жизни ответа (в секундах).
+    "max_size": 256 * 1024 * 1024,  # Максимальный суммарный размер ответов (в байтах).
+    "evict_interval": 100,  # Через сколько записей запускать вытеснение.
+}
+
+llm_response_cache = LLMResponseCache(
+    ttl=LLM_CACHE_SETTINGS['ttl'],
+    max_size=LLM_CACHE_SETTINGS['max_size'],
+    evict_interval=LLM_CACHE_SETTINGS['evict_interval'],
+) if LLM_CACHE_SETTINGS['enabled'] else None
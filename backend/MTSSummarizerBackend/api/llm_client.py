@@ -0,0 +1,264 @@
+import asyncio
+import logging
+import random
+import httpx
+import openai
+from contextlib import asynccontextmanager
+from time import monotonic
+from typing import AsyncIterator, Optional
+from .rate_limiter import retry_after_delay
+
+
+class LLMUnavailableError(Exception):
+    """
+    LLM недоступна: цепь разомкнута или повторы исчерпаны.
+    """
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        """
+        Предохранитель: после failure_threshold ошибок подряд запросы reset_timeout секунд
+        сразу отклоняются, не дожидаясь таймаутов недоступного API. Затем пропускается один
+        пробный запрос: успех замыкает цепь, ошибка размыкает её снова.
+
+        :param failure_threshold: Количество ошибок подряд, после которого цепь размыкается.
+        :param reset_timeout: Время (в секундах), через которое пропускается пробный запрос.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._retry_at = 0.0
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """
+        Можно ли отправить запрос.
+        """
+        if self.state == self.CLOSED:
+            return True
+        if monotonic() < self._retry_at:
+            self.rejected += 1
+            return False
+        # Пробный запрос. Если он не завершится (например, будет отменён), следующий пропустим через reset_timeout.
+        self.state, self._retry_at = self.HALF_OPEN, monotonic() + self.reset_timeout
+        return True
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logging.info("Цепь запросов к LLM замкнута.")
+        self.state, self._failures = self.CLOSED, 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self._failures >= self.failure_threshold):
+            self.state, self._retry_at = self.OPEN, monotonic() + self.reset_timeout
+            self.opened += 1
+            logging.warning(f"Цепь запросов к LLM разомкнута на {self.reset_timeout:.0f} с "
+                            f"после ошибок подряд: {self._failures}.")
+
+    def stats(self) -> dict[str, int | float | str]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "retry_in": max(0.0, self._retry_at - monotonic()) if self.state != self.CLOSED else 0.0,
+        }
+
+
+class LLMClient:
+    # Статусы, после которых запрос стоит повторить (перегрузка или временная ошибка API).
+    RETRY_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        max_in_flight: int = 8,
+        max_connections: int = 16,
+        timeout: float = 60,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20,
+        max_retry_after: float = 60,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30
+    ) -> None:
+        """
+        Клиент OpenAI-совместимого API с ограничением нагрузки и защитой от сбоев.
+
+        Одновременно выполняется не больше max_in_flight запросов (остальные ждут своей
+        очереди, а не перегружают API), соединения берутся из пула на max_connections.
+        Таймаут, обрыв соединения и ответы 408/409/429/5xx повторяются до max_retries раз
+        с паузой со случайным разбросом (full jitter) от 0 до backoff_base * 2^попытка, но не
+        больше backoff_max секунд. Ответ с заголовком Retry-After приостанавливает все
+        запросы клиента на указанное время. Ошибки, кроме 429, считает предохранитель
+        (CircuitBreaker): пока цепь разомкнута, запросы сразу завершаются LLMUnavailableError,
+        и вызывающий код может отдать резюме из кэша или запасного бэкенда.
+
+        Ошибки запроса (400, 401 и т.п.) не повторяются и выбрасываются как есть.
+
+        :param api_key: Ключ API.
+        :param base_url: Адрес API.
+        :param max_in_flight: Максимальное количество одновременных запросов.
+        :param max_connections: Размер пула соединений.
+        :param timeout: Таймаут одного запроса (в секундах).
+        :param max_retries: Максимальное количество повторов запроса.
+        :param backoff_base: Базовая пауза перед повтором (в секундах).
+        :param backoff_max: Максимальная пауза перед повтором (в секундах).
+        :param max_retry_after: Максимальная пауза по заголовку Retry-After (в секундах).
+        :param failure_threshold: Количество ошибок подряд, после которого цепь размыкается.
+        :param reset_timeout: Время (в секундах), на которое размыкается цепь.
+        """
+        self.client = openai.AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=timeout,
+            max_retries=0,  # Повторы выполняет сам клиент: с паузой по Retry-After для всех запросов и предохранителем
+            http_client=openai.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+            )
+        )
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._paused_until = 0.0
+        self.in_flight = 0
+        self.waiting = 0
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+
+    @asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _create(self, **kwargs):
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise LLMUnavailableError("цепь запросов к LLM разомкнута после серии ошибок")
+            if self._paused_until > monotonic():
+                await asyncio.sleep(self._paused_until - monotonic())
+            self.requests += 1
+            try:
+                response = await self.client.chat.completions.create(**kwargs)
+            except openai.APIStatusError as e:
+                if e.status_code not in self.RETRY_STATUSES:
+                    self.breaker.record_success()  # API отвечает, ошибка в самом запросе
+                    raise
+                error, retry_after = e, e.response.headers.get("Retry-After")
+            except openai.APIConnectionError as e:  # В том числе APITimeoutError
+                error, retry_after = e, None
+            else:
+                self.breaker.record_success()
+                return response
+            delay = self._backoff(attempt)
+            if retry_after is not None:
+                delay = retry_after_delay(retry_after, delay, self.max_retry_after)
+                self._paused_until = max(self._paused_until, monotonic() + delay)
+            if getattr(error, "status_code", None) == 429:
+                self.throttled += 1  # API перегружено, но доступно: предохранитель не трогаем
+            else:
+                self.failures += 1
+                self.breaker.record_failure()
+            if attempt >= self.max_retries:
+                raise LLMUnavailableError(f"запрос к LLM не удался после повторов: {attempt}") from error
+            attempt += 1
+            self.retries += 1
+            logging.warning(f"Запрос к LLM не удался ({error!r}), повтор {attempt} через {delay:.1f} с.")
+            await asyncio.sleep(delay)
+
+    async def complete(self, **kwargs):
+        """
+        Выполняет запрос chat.completions.create с повторами.
+
+        :param kwargs: Параметры chat.completions.create.
+        :return: Ответ API.
+        :raises LLMUnavailableError: Цепь разомкнута или повторы исчерпаны.
+        """
+        async with self._slot():
+            return await self._create(**kwargs)
+
+    @asynccontextmanager
+    async def stream(self, **kwargs) -> AsyncIterator[openai.AsyncStream]:
+        """
+        Открывает поток chat.completions.create(stream=True) с повторами.
+
+        Повторяется только открытие потока: после обрыва начало ответа уже отдано, и
+        повтор начал бы его заново. Обрыв соединения или таймаут посреди потока считает
+        предохранитель, и поток завершается LLMUnavailableError, как после исчерпанных повторов.
+        Место среди max_in_flight запросов занято, пока поток не закрыт.
+
+        :param kwargs: Параметры chat.completions.create.
+        :return: Поток кусков ответа.
+        :raises LLMUnavailableError: Цепь разомкнута, повторы исчерпаны или поток оборвался.
+        """
+        async with self._slot():
+            stream = await self._create(stream=True, **kwargs)
+            try:
+                async with stream:
+                    yield stream
+            except (httpx.TransportError, openai.APIConnectionError) as e:  # Поток читается напрямую из httpx
+                self.failures += 1
+                self.breaker.record_failure()
+                raise LLMUnavailableError(f"поток ответа LLM оборвался: {e!r}") from e
+
+    def is_closed(self) -> bool:
+        return self.client.is_closed()
+
+    async def close(self) -> None:
+        await self.client.close()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_in_flight": self.max_in_flight,
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "failures": self.failures,
+            "paused_for": max(0.0, self._paused_until - monotonic()),
+            "circuit": self.breaker.stats(),
+        }
+
+
+LLM_CLIENT_SETTINGS = {
+    "max_in_flight": 8,  # Одновременные запросы к DeepSeek на процесс.
+    "max_connections": 16,  # Размер пула соединений с DeepSeek.
+    # Таймаут одного запроса (в секундах). Все попытки с паузами между ними (до timeout * (max_retries + 1)
+    # + ~4 с) должны укладываться в TASK_QUEUE_SETTINGS['stage_timeouts']['llm'].
+    "timeout": 60,
+    "max_retries": 3,  # Повторы запроса после таймаута, обрыва соединения и ответов 408/409/429/5xx.
+    "backoff_base": 0.5,  # Базовая пауза перед повтором (в секундах), удваивается с каждой попыткой.
+    "backoff_max": 20,  # Максимальная пауза перед повтором (в секундах).
+    "max_retry_after": 60,  # Максимальная пауза (в секундах) по заголовку Retry-After.
+    "failure_threshold": 5,  # Ошибок подряд, после которых цепь размыкается.
+    "reset_timeout": 30,  # На сколько секунд размыкается цепь.
+}
@@ -0,0 +1,38 @@
+import asyncio
+import logging
+import signal
+from django.core.management.base import BaseCommand
+from api.habr_parser import parser as habr_parser
+from api.jobs import JOB_WORKER_SETTINGS, summary_job_worker
+from api.task_queue import task_queue
+
+
+class Command(BaseCommand):
+    help = 'Запускает воркеры очереди задач суммаризации отдельно от веб-процессов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=JOB_WORKER_SETTINGS['concurrency'],
+                            help='Количество задач, одновременно обрабатываемых процессом.')
+
+    def handle(self, *args, **options):
+        asyncio.run(self._run(options['concurrency']))
+
+    async def _run(self, concurrency: int):
+        # Тот же воркер, что и в веб-процессах (настройки JOB_WORKER_SETTINGS), отличается только concurrency.
+        summary_job_worker.concurrency = concurrency
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGTERM, signal.SIGINT):
+            # docker compose stop/restart шлёт SIGTERM: выполняемые задачи возвращаются в очередь сразу,
+            # а не ждут окончания аренды.
+            loop.add_signal_handler(signal_number, stop.set)
+        await task_queue.start()
+        await habr_parser.start()
+        summary_job_worker.start()
+        try:
+            await stop.wait()
+            logging.info("Остановка воркеров задач суммаризации.")
+        finally:
+            await summary_job_worker.close()
+            await habr_parser.close()
+            await task_queue.close()
@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-18 15:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_alter_article_options_remove_article_summary_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Summary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=128, unique=True, verbose_name='Канонический URL статьи')),
+                ('title', models.CharField(max_length=128, verbose_name='Название статьи')),
+                ('article_summary', models.TextField(verbose_name='Резюме статьи')),
+                ('comments_summary', models.TextField(verbose_name='Резюме комментариев')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата и время создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата и время обновления')),
+            ],
+            options={
+                'verbose_name': 'Резюме',
+                'verbose_name_plural': 'Резюме',
+                'ordering': ('-updated_at',),
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='summary',
+            name='text_hash',
+            field=models.CharField(default='', max_length=64, verbose_name='SHA-256 текста статьи'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='summary',
+            name='checked_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата и время последней проверки текста статьи'),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='summary',
+            name='url',
+            field=models.URLField(db_index=True, max_length=128, verbose_name='Канонический URL статьи'),
+        ),
+        migrations.AddConstraint(
+            model_name='summary',
+            constraint=models.UniqueConstraint(fields=('url', 'text_hash'), name='unique_summary_url_text_hash'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='summary',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='articles', to='api.summary', verbose_name='Резюме'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+import hashlib
+import re
+from django.db import migrations
+
+
+# Копия api.habr_parser.normalize_article_url: миграции не должны зависеть от текущего кода приложения.
+ARTICLE_URL_PATTERN = re.compile(r"/(articles|news)/(\d+)(?:/|$)")
+
+
+def normalize_article_url(article_url):
+    article_url = article_url.split("#")[0].split("?")[0]
+    match = ARTICLE_URL_PATTERN.search(article_url)
+    if match is None:
+        return article_url
+    section, article_id = match.groups()
+    return f"https://habr.com/ru/{section}/{article_id}/"
+
+
+def move_summaries_to_store(apps, schema_editor):
+    """
+    Переносит резюме из строк Article в общее хранилище Summary.
+
+    Текст статей не сохранялся, поэтому для старых резюме вместо хэша текста
+    используется хэш самого резюме: одинаковые резюме одной статьи объединяются,
+    а при следующей проверке статья получит хэш настоящего текста.
+    """
+    Article = apps.get_model('api', 'Article')
+    Summary = apps.get_model('api', 'Summary')
+    for summary in Summary.objects.filter(text_hash=''):
+        summary.checked_at = summary.updated_at
+        summary.save(update_fields=('checked_at',))
+    for article in Article.objects.filter(summary__isnull=True).iterator():
+        text_hash = hashlib.sha256(f"{article.article_summary}\n{article.comments_summary}".encode()).hexdigest()
+        summary, _ = Summary.objects.get_or_create(
+            url=normalize_article_url(article.url),
+            text_hash=text_hash,
+            defaults={
+                'title': article.title,
+                'article_summary': article.article_summary,
+                'comments_summary': article.comments_summary,
+                'checked_at': article.created_at,
+            }
+        )
+        article.summary = summary
+        article.save(update_fields=('summary',))
+
+
+def move_summaries_to_articles(apps, schema_editor):
+    """
+    Копирует резюме обратно в строки Article и оставляет по одному (последнему проверенному)
+    резюме на URL, как было до появления хэша текста.
+    """
+    Article = apps.get_model('api', 'Article')
+    Summary = apps.get_model('api', 'Summary')
+    for article in Article.objects.select_related('summary').iterator():
+        article.article_summary = article.summary.article_summary
+        article.comments_summary = article.summary.comments_summary
+        article.summary = None
+        article.save(update_fields=('article_summary', 'comments_summary', 'summary'))
+    seen_urls = set()
+    for summary in Summary.objects.order_by('url', '-checked_at').iterator():
+        if summary.url in seen_urls:
+            summary.delete()
+        seen_urls.add(summary.url)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_summary_text_hash_article_summary_fk'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_summaries_to_store, move_summaries_to_articles),
+    ]
@@ -0,0 +1,37 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_move_article_summaries'),
+    ]
+
+    operations = [
+        # blank=True: при откате миграции поля добавляются обратно с пустым значением по умолчанию,
+        # а затем заполняются обратной функцией 0005_move_article_summaries.
+        migrations.AlterField(
+            model_name='article',
+            name='article_summary',
+            field=models.TextField(blank=True, verbose_name='Резюме статьи'),
+        ),
+        migrations.AlterField(
+            model_name='article',
+            name='comments_summary',
+            field=models.TextField(blank=True, verbose_name='Резюме комментариев'),
+        ),
+        migrations.RemoveField(
+            model_name='article',
+            name='article_summary',
+        ),
+        migrations.RemoveField(
+            model_name='article',
+            name='comments_summary',
+        ),
+        migrations.AlterField(
+            model_name='article',
+            name='summary',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='articles', to='api.summary', verbose_name='Резюме'),
+        ),
+    ]
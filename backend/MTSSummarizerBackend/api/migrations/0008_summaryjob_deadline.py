@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_summaryjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='summaryjob',
+            name='deadline',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Крайний срок выполнения'),
+        ),
+        migrations.AlterField(
+            model_name='summaryjob',
+            name='status',
+            field=models.CharField(choices=[('queued', 'В очереди'), ('running', 'Выполняется'), ('done', 'Готово'), ('failed', 'Ошибка'), ('cancelled', 'Отменена')], default='queued', max_length=16, verbose_name='Статус'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 16:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_summaryjob_deadline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='summaryjob',
+            name='progress',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Промежуточный результат'),
+        ),
+    ]
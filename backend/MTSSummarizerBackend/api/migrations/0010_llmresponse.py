@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 16:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_summaryjob_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMResponse',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='SHA-256 модели, параметров и текста запроса')),
+                ('model', models.CharField(max_length=64, verbose_name='Модель')),
+                ('response', models.TextField(verbose_name='Ответ модели')),
+                ('prompt_tokens', models.PositiveIntegerField(default=0, verbose_name='Токенов в запросе')),
+                ('completion_tokens', models.PositiveIntegerField(default=0, verbose_name='Токенов в ответе')),
+                ('size', models.PositiveIntegerField(verbose_name='Размер ответа (в байтах)')),
+                ('hits', models.PositiveIntegerField(default=0, verbose_name='Количество попаданий')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата и время создания')),
+                ('last_used_at', models.DateTimeField(db_index=True, verbose_name='Дата и время последнего использования')),
+            ],
+            options={
+                'verbose_name': 'Ответ LLM',
+                'verbose_name_plural': 'Ответы LLM',
+                'ordering': ('-last_used_at',),
+            },
+        ),
+    ]
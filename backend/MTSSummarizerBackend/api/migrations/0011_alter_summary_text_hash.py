@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 16:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_llmresponse'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='summary',
+            name='text_hash',
+            field=models.CharField(max_length=64, verbose_name='SHA-256 текста статьи и комментариев'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 16:52
+
+from django.db import migrations, models
+from django.db.models import Value
+from django.db.models.functions import Cast, Concat
+
+
+def set_user_jobs_priority(apps, schema_editor):
+    """
+    Задачи авторизованных пользователей, созданные до появления полей, получают их класс приоритета и владельца.
+    """
+    SummaryJob = apps.get_model('api', 'SummaryJob')
+    SummaryJob.objects.filter(user__isnull=False).update(
+        priority='authenticated',
+        owner=Concat(Value('user:'), Cast('user_id', models.CharField())),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_alter_summary_text_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='summaryjob',
+            name='owner',
+            field=models.CharField(blank=True, max_length=64, verbose_name='Владелец для честного разделения очереди'),
+        ),
+        migrations.AddField(
+            model_name='summaryjob',
+            name='priority',
+            field=models.CharField(default='anonymous', max_length=16, verbose_name='Класс приоритета (см. TaskQueue)'),
+        ),
+        migrations.RunPython(set_user_jobs_priority, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 16:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_summaryjob_priority_owner'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='summary',
+            name='is_partial',
+            field=models.BooleanField(default=False, verbose_name='Часть стадий обработки комментариев не выполнена'),
+        ),
+    ]
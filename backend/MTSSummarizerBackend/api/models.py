@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 from django.contrib.auth import get_user_model
 
@@ -5,11 +6,34 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 
-class Article(models.Model):
-    url = models.URLField('Ссылка на статью', max_length=128)
+class Summary(models.Model):
+    url = models.URLField('Канонический URL статьи', max_length=128, db_index=True)
+    text_hash = models.CharField('SHA-256 текста статьи и комментариев', max_length=64)
     title = models.CharField('Название статьи', max_length=128)
     article_summary = models.TextField('Резюме статьи')
     comments_summary = models.TextField('Резюме комментариев')
+    is_partial = models.BooleanField('Часть стадий обработки комментариев не выполнена', default=False)
+    created_at = models.DateTimeField('Дата и время создания', auto_now_add=True)
+    updated_at = models.DateTimeField('Дата и время обновления', auto_now=True)
+    checked_at = models.DateTimeField('Дата и время последней проверки текста статьи')
+
+    def __str__(self):
+        return self.title
+
+    class Meta:
+        verbose_name = 'Резюме'
+        verbose_name_plural = 'Резюме'
+        ordering = ('-updated_at',)
+        constraints = (
+            models.UniqueConstraint(fields=('url', 'text_hash'), name='unique_summary_url_text_hash'),
+        )
+
+
+class Article(models.Model):
+    url = models.URLField('Ссылка на статью', max_length=128)
+    title = models.CharField('Название статьи', max_length=128)
+    summary = models.ForeignKey(Summary, on_delete=models.PROTECT,
+                                related_name='articles', verbose_name='Резюме')
     user = models.ForeignKey(User, on_delete=models.CASCADE,
                              related_name='articles', verbose_name='Пользователь')
     created_at = models.DateTimeField('Дата и время создания', auto_now_add=True)
@@ -21,3 +45,70 @@ class Article(models.Model):
         verbose_name = 'Статья'
         verbose_name_plural = 'Статьи'
         ordering = ('-created_at',)
+
+
+class SummaryJob(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+        (CANCELLED, 'Отменена'),
+    )
+    FINISHED_STATUSES = (DONE, FAILED, CANCELLED)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    url = models.URLField('Ссылка на статью', max_length=128)
+    status = models.CharField('Статус', max_length=16, choices=STATUSES, default=QUEUED)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True,
+                             related_name='summary_jobs', verbose_name='Пользователь')
+    priority = models.CharField('Класс приоритета (см. TaskQueue)', max_length=16, default='anonymous')
+    owner = models.CharField('Владелец для честного разделения очереди', max_length=64, blank=True)
+    summary = models.ForeignKey(Summary, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='jobs', verbose_name='Резюме')
+    article = models.ForeignKey(Article, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='jobs', verbose_name='Статья')
+    error = models.TextField('Ошибка', blank=True)
+    attempts = models.PositiveSmallIntegerField('Количество попыток', default=0)
+    lease_expires_at = models.DateTimeField('Срок аренды задачи воркером', null=True, blank=True)
+    deadline = models.DateTimeField('Крайний срок выполнения', null=True, blank=True)
+    progress = models.JSONField('Промежуточный результат', default=dict, blank=True)
+    created_at = models.DateTimeField('Дата и время создания', auto_now_add=True)
+    started_at = models.DateTimeField('Дата и время начала', null=True, blank=True)
+    finished_at = models.DateTimeField('Дата и время завершения', null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.url} ({self.status})'
+
+    class Meta:
+        verbose_name = 'Задача суммаризации'
+        verbose_name_plural = 'Задачи суммаризации'
+        ordering = ('-created_at',)
+        indexes = (
+            models.Index(fields=('status', 'created_at'), name='summary_job_status_created'),
+        )
+
+
+class LLMResponse(models.Model):
+    key = models.CharField('SHA-256 модели, параметров и текста запроса', max_length=64, primary_key=True)
+    model = models.CharField('Модель', max_length=64)
+    response = models.TextField('Ответ модели')
+    prompt_tokens = models.PositiveIntegerField('Токенов в запросе', default=0)
+    completion_tokens = models.PositiveIntegerField('Токенов в ответе', default=0)
+    size = models.PositiveIntegerField('Размер ответа (в байтах)')
+    hits = models.PositiveIntegerField('Количество попаданий', default=0)
+    created_at = models.DateTimeField('Дата и время создания', auto_now_add=True)
+    last_used_at = models.DateTimeField('Дата и время последнего использования', db_index=True)
+
+    def __str__(self):
+        return f'{self.model} {self.key[:12]}'
+
+    class Meta:
+        verbose_name = 'Ответ LLM'
+        verbose_name_plural = 'Ответы LLM'
+        ordering = ('-last_used_at',)
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from contextlib import AbstractAsyncContextManager, nullcontext
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+
+@dataclass
+class Stage:
+    """
+    Стадия конвейера обработки.
+
+    :param name: Имя стадии.
+    :param function: Корутинная функция стадии, принимает результаты стадий из depends_on (в том же порядке).
+    :param timeout: Таймаут выполнения стадии (в секундах, None - без таймаута).
+    :param required: Обязательная ли стадия: ошибка обязательной стадии завершает весь конвейер,
+                     ошибка необязательной даёт результат None.
+    :param depends_on: Имена стадий, результаты которых нужны этой стадии.
+    """
+    name: str
+    function: Callable[..., Awaitable[Any]]
+    timeout: Optional[float] = None
+    required: bool = True
+    depends_on: tuple[str, ...] = ()
+
+
+async def run_stage_graph(
+    stages: list[Stage],
+    guard: Callable[[str], AbstractAsyncContextManager] = lambda name: nullcontext()
+) -> tuple[dict[str, Any], dict[str, str]]:
+    """
+    Выполняет граф стадий: независимые стадии идут одновременно, зависимая стадия
+    запускается, как только готовы все её зависимости.
+
+    Если необязательная стадия завершилась ошибкой или по таймауту, её результат
+    равен None, а зависящие от неё стадии пропускаются (их результат тоже None).
+    Ошибка обязательной стадии отменяет остальные стадии и пробрасывается дальше.
+
+    :param stages: Стадии графа.
+    :param guard: Фабрика контекстного менеджера, в котором выполняется стадия
+                  (например, ограничение одновременных запросов к сервису).
+    :return: Результаты стадий по именам и описания ошибок необязательных стадий.
+    """
+    tasks: dict[str, asyncio.Task] = {}
+    errors: dict[str, str] = {}
+
+    async def run(stage: Stage) -> Any:
+        dependency_results = [await tasks[name] for name in stage.depends_on]
+        if any(result is None for result in dependency_results):
+            errors[stage.name] = "Пропущена: нет результата стадии, от которой она зависит."
+            return None
+        try:
+            async with guard(stage.name):
+                return await asyncio.wait_for(stage.function(*dependency_results), stage.timeout)
+        except asyncio.TimeoutError:
+            if stage.required:
+                raise TimeoutError(f"Стадия {stage.name} не завершилась за {stage.timeout} с.")
+            errors[stage.name] = f"Таймаут {stage.timeout} с."
+        except Exception as e:
+            if stage.required:
+                raise
+            errors[stage.name] = f"{type(e).__name__}: {e}"
+        logging.warning(f"Стадия {stage.name} не выполнена, результат будет частичным: {errors[stage.name]}")
+        return None
+
+    for stage in stages:
+        tasks[stage.name] = asyncio.create_task(run(stage))
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+    return {name: task.result() for name, task in tasks.items()}, errors
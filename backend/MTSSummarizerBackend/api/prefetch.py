@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.exceptions import Throttled
+from .models import Summary
+from .habr_parser import normalize_article_url
+from .jobs import submit_job, wait_for_job
+from .swr_cache import latest_articles_cache
+from .task_queue import TaskQueue
+
+
+class LatestArticlesPrefetcher:
+
+    def __init__(self, interval: float, lock_id: int = 0x50524546) -> None:
+        """
+        Фоновая предзагрузка резюме новых статей блога МТС.
+
+        Раз в interval секунд берёт список последних статей (тот же, что отдаёт /api/v1/latest/)
+        и суммаризирует статьи, для которых ещё нет сохранённого резюме. Пользователь,
+        отправивший такую статью позже, получает ответ сразу из базы.
+
+        Статьи ставятся в общую очередь задач (таблица SummaryJob) по одной: следующая -
+        после выполнения предыдущей и только пока очередь не заполнена, поэтому предзагрузка
+        учитывается контролем допуска и не вытесняет запросы пользователей.
+
+        Предзагрузка запускается в каждом процессе, но выполняет её только один процесс
+        кластера - ведущий, удерживающий сессионную advisory-блокировку PostgreSQL на
+        отдельном соединении с базой. Если ведущий процесс остановится или упадёт,
+        блокировка снимается вместе с его соединением, и её захватит другой процесс
+        при следующем опросе.
+
+        :param interval: Период опроса списка последних статей (в секундах).
+        :param lock_id: Ключ advisory-блокировки PostgreSQL для выбора ведущего процесса.
+        """
+        self.interval = interval
+        self.lock_id = lock_id
+        self.is_leader = False
+        # Соединение с блокировкой используется только в одном потоке, как требует Django.
+        self._lock_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch-leader")
+        self._lock_connection = None
+        self._task: Optional[asyncio.Task] = None
+        self.rounds = 0
+        self.prefetched = 0
+        self.skipped = 0  # Статьи, отложенные до следующего опроса из-за заполненной очереди
+        self.errors = 0
+        self._last_round_at: Optional[float] = None
+
+    def start(self) -> None:
+        """
+        Запускает фоновый опрос. Вызывается при старте приложения (ASGI lifespan).
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logging.info("Предзагрузка резюме новых статей запущена.")
+
+    async def close(self) -> None:
+        """
+        Останавливает фоновый опрос. Вызывается при остановке приложения (ASGI lifespan).
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await asyncio.get_running_loop().run_in_executor(self._lock_executor, self._release_leadership)
+
+    def _acquire_leadership(self) -> bool:
+        if connections[DEFAULT_DB_ALIAS].vendor != 'postgresql':
+            self.is_leader = True  # Без PostgreSQL (локальная разработка) процесс один
+            return True
+        try:
+            if self._lock_connection is None:
+                self._lock_connection = connections.create_connection(DEFAULT_DB_ALIAS)
+            with self._lock_connection.cursor() as cursor:
+                if self.is_leader:
+                    cursor.execute("SELECT 1")  # Блокировка удерживается, пока живо соединение
+                else:
+                    cursor.execute("SELECT pg_try_advisory_lock(%s)", [self.lock_id])
+                    self.is_leader = cursor.fetchone()[0]
+                    if self.is_leader:
+                        logging.info("Процесс стал ведущим для предзагрузки резюме новых статей.")
+        except DatabaseError as e:
+            logging.warning(f"Соединение с блокировкой предзагрузки потеряно: {e!r}.")
+            self._release_leadership()
+        return self.is_leader
+
+    def _release_leadership(self) -> None:
+        lock_connection, self._lock_connection, self.is_leader = self._lock_connection, None, False
+        if lock_connection is not None:
+            lock_connection.close()  # Вместе с соединением снимается и блокировка
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                if await loop.run_in_executor(self._lock_executor, self._acquire_leadership):
+                    await self.prefetch()
+            except Exception as e:
+                logging.warning(f"Ошибка предзагрузки резюме новых статей: {e!r}.")
+            await asyncio.sleep(self.interval)
+
+    async def prefetch(self) -> int:
+        """
+        Суммаризирует статьи из списка последних статей, для которых ещё нет резюме.
+
+        :return: Количество новых резюме.
+        """
+        self.rounds += 1
+        self._last_round_at = time.monotonic()
+        latest_articles = await latest_articles_cache.get()
+        if not latest_articles:
+            return 0
+        urls = {normalize_article_url(article['url']): article['url'] for article in latest_articles}
+        known_urls = {url async for url in Summary.objects.filter(url__in=urls).values_list('url', flat=True)}
+        new_urls = [url for canonical_url, url in urls.items() if canonical_url not in known_urls]
+        prefetched = 0
+        for index, url in enumerate(new_urls):
+            try:
+                job = await submit_job(url, priority=TaskQueue.PREFETCH)
+            except Throttled:
+                self.skipped += len(new_urls) - index
+                logging.info("Очередь задач заполнена, предзагрузка отложена до следующего опроса.")
+                break
+            try:
+                await wait_for_job(job)
+            except Exception as e:
+                self.errors += 1
+                logging.warning(f"Не удалось предзагрузить резюме статьи {url}: {e!r}.")
+                continue
+            prefetched += 1
+            logging.info(f"Резюме статьи {url} предзагружено.")
+        self.prefetched += prefetched
+        return prefetched
+
+    def stats(self) -> dict[str, int | float | None]:
+        return {
+            "leader": self.is_leader,
+            "last_round_age": time.monotonic() - self._last_round_at if self._last_round_at is not None else None,
+            "rounds": self.rounds,
+            "prefetched": self.prefetched,
+            "skipped": self.skipped,
+            "errors": self.errors,
+        }
+
+
+PREFETCH_SETTINGS = {
+    "interval": 300,  # Период опроса списка последних статей блога МТС (в секундах).
+}
+
+latest_articles_prefetcher = LatestArticlesPrefetcher(interval=PREFETCH_SETTINGS['interval'])
@@ -0,0 +1,84 @@
+import asyncio
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+
+class SummaryProgress:
+
+    def __init__(self) -> None:
+        """
+        Промежуточные результаты суммаризации статей, ещё не сохранённые в базу.
+
+        Конвейер публикует события по каноническому URL статьи, подписчики (воркеры задач
+        этого процесса, ждущие ту же статью) получают уведомление об изменении и читают
+        накопленное состояние целиком. Поэтому подписчик, пришедший посреди генерации,
+        не теряет уже полученное начало резюме.
+
+        События:
+            - 'title': заголовок статьи;
+            - 'article_summary': очередной кусок резюме статьи (дописывается к предыдущим);
+            - 'analysis': результат анализа тональности комментариев;
+            - 'clusters': результат кластеризации комментариев.
+        """
+        self._state: dict[str, dict[str, Any]] = {}
+        self._subscribers: dict[str, set[asyncio.Event]] = {}
+        self.published = 0
+
+    def publish(self, key: str, event: str, data: Any) -> None:
+        """
+        Публикует промежуточный результат.
+
+        :param key: Канонический URL статьи.
+        :param event: Тип события.
+        :param data: Данные события.
+        """
+        state = self._state.setdefault(key, {})
+        if event == 'article_summary':
+            state[event] = state.get(event, "") + data
+        else:
+            state[event] = data
+        self.published += 1
+        for changed in self._subscribers.get(key, ()):
+            changed.set()
+
+    def get(self, key: str) -> dict[str, Any]:
+        """
+        Возвращает копию накопленного состояния статьи.
+        """
+        return dict(self._state.get(key, {}))
+
+    def finish(self, key: str) -> None:
+        """
+        Забывает состояние статьи после завершения обработки (результат уже в базе).
+        """
+        self._state.pop(key, None)
+
+    @contextmanager
+    def subscribe(self, key: str) -> Iterator[asyncio.Event]:
+        """
+        Подписка на изменения состояния статьи.
+
+        :param key: Канонический URL статьи.
+        :return: Событие, которое устанавливается при каждом изменении состояния.
+        """
+        changed = asyncio.Event()
+        if key in self._state:
+            changed.set()
+        self._subscribers.setdefault(key, set()).add(changed)
+        try:
+            yield changed
+        finally:
+            subscribers = self._subscribers[key]
+            subscribers.discard(changed)
+            if not subscribers:
+                del self._subscribers[key]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "in_progress": len(self._state),
+            "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "published": self.published,
+        }
+
+
+summary_progress = SummaryProgress()
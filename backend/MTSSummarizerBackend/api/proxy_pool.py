@@ -0,0 +1,135 @@
+import logging
+import random
+import time
+from aiohttp import BasicAuth
+from typing import Optional
+from .rate_limiter import TokenBucket
+
+
+class Proxy:
+
+    def __init__(self, url: str, auth: Optional[BasicAuth], rate: float, burst: float) -> None:
+        """
+        Прокси с собственной статистикой здоровья и ограничением частоты запросов.
+
+        :param url: URL прокси.
+        :param auth: Данные для аутентификации на прокси.
+        :param rate: Максимальная частота запросов через прокси (в секунду).
+        :param burst: Допустимый всплеск запросов.
+        """
+        self.url = url
+        self.auth = auth
+        self.bucket = TokenBucket(rate, burst)
+        self.latency: Optional[float] = None  # Экспоненциальное скользящее среднее (в секундах)
+        self.error_rate = 0.0  # Экспоненциальное скользящее среднее доли ошибок
+        self.consecutive_failures = 0
+        self.ejections_in_row = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.ejections = 0
+
+    def is_ejected(self, now: float) -> bool:
+        return now < self.ejected_until
+
+    def stats(self) -> dict[str, int | float | bool | None]:
+        return {
+            "latency": self.latency,
+            "error_rate": self.error_rate,
+            "ejected": self.is_ejected(time.monotonic()),
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejections": self.ejections,
+        }
+
+
+class ProxyPool:
+
+    def __init__(
+        self,
+        proxies: list[tuple[str, Optional[BasicAuth]]],
+        rate: float = 1.0,
+        burst: float = 5,
+        eject_after: int = 3,
+        eject_time: float = 30,
+        max_eject_time: float = 600,
+        smoothing: float = 0.2,
+        default_latency: float = 1.0
+    ) -> None:
+        """
+        Пул прокси с выбором по здоровью.
+
+        Для каждого прокси считается скользящее среднее задержки и доли ошибок;
+        вероятность выбора прокси пропорциональна (1 - доля ошибок)^2 / задержка
+        и уменьшается, если его лимит частоты запросов уже исчерпан. Прокси,
+        ошибившийся eject_after раз подряд, исключается из выбора на eject_time
+        секунд, при повторных исключениях время удваивается до max_eject_time.
+
+        :param proxies: Список пар (URL прокси, данные для аутентификации).
+        :param rate: Максимальная частота запросов через один прокси (в секунду).
+        :param burst: Допустимый всплеск запросов через один прокси.
+        :param eject_after: Количество ошибок подряд, после которого прокси исключается.
+        :param eject_time: Время первого исключения прокси (в секундах).
+        :param max_eject_time: Максимальное время исключения прокси (в секундах).
+        :param smoothing: Коэффициент скользящих средних (вес нового наблюдения).
+        :param default_latency: Задержка, предполагаемая для ещё не опробованного прокси (в секундах).
+        """
+        self.proxies = [Proxy(url, auth, rate, burst) for url, auth in proxies]
+        self.eject_after = eject_after
+        self.eject_time = eject_time
+        self.max_eject_time = max_eject_time
+        self.smoothing = smoothing
+        self.default_latency = default_latency
+
+    def _weight(self, proxy: Proxy) -> float:
+        latency = proxy.latency if proxy.latency is not None else self.default_latency
+        return (1 - proxy.error_rate) ** 2 / (latency + proxy.bucket.delay()) + 1e-6
+
+    def select(self, amount: int) -> list[Proxy]:
+        """
+        Выбирает прокси для запроса: по одному на каждую попытку, без повторов, пока хватает прокси.
+
+        :param amount: Количество попыток запроса.
+        :return: Список прокси в порядке использования.
+        """
+        now = time.monotonic()
+        candidates = [proxy for proxy in self.proxies if not proxy.is_ejected(now)]
+        if not candidates:
+            # Все прокси исключены: пробуем те, что вернутся раньше остальных.
+            candidates = sorted(self.proxies, key=lambda proxy: proxy.ejected_until)[:amount]
+        selected = []
+        while candidates and len(selected) < amount:
+            proxy = random.choices(candidates, weights=[self._weight(proxy) for proxy in candidates])[0]
+            candidates.remove(proxy)
+            selected.append(proxy)
+        return selected
+
+    def report(self, proxy: Proxy, latency: Optional[float], ok: bool) -> None:
+        """
+        Учитывает результат запроса через прокси.
+
+        :param proxy: Прокси, через который выполнялся запрос.
+        :param latency: Время до получения заголовков ответа (None, если ответа нет).
+        :param ok: Успешен ли запрос.
+        """
+        proxy.requests += 1
+        proxy.error_rate += self.smoothing * ((0.0 if ok else 1.0) - proxy.error_rate)
+        if latency is not None:
+            proxy.latency = latency if proxy.latency is None else proxy.latency + self.smoothing * (latency - proxy.latency)
+        if ok:
+            proxy.consecutive_failures = 0
+            proxy.ejections_in_row = 0
+            return
+        proxy.failures += 1
+        proxy.consecutive_failures += 1
+        if proxy.consecutive_failures >= self.eject_after:
+            eject_time = min(self.max_eject_time, self.eject_time * 2 ** proxy.ejections_in_row)
+            proxy.ejected_until = time.monotonic() + eject_time
+            proxy.ejections_in_row += 1
+            proxy.ejections += 1
+            # После возвращения в пул прокси исключается снова после первой же ошибки.
+            proxy.consecutive_failures = self.eject_after - 1
+            logging.warning(f"Прокси {proxy.url} исключён из пула на {eject_time:.0f} с.")
+
+    def stats(self) -> dict[str, dict]:
+        return {proxy.url: proxy.stats() for proxy in self.proxies}
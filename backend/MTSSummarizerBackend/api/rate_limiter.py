@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """
+        Асинхронный token bucket: в среднем не больше rate запросов в секунду
+        с допустимым всплеском до capacity запросов.
+
+        Токены резервируются в момент вызова acquire, поэтому ожидающие
+        обслуживаются в порядке очереди без блокировок.
+
+        :param rate: Скорость пополнения (токенов в секунду).
+        :param capacity: Ёмкость корзины (максимальный всплеск).
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()  # Во время паузы - момент её окончания
+        self._pauses = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def delay(self) -> float:
+        """
+        Через сколько секунд освободится токен (без его резервирования).
+        """
+        self._refill()
+        return self.paused_for() + max(0.0, (1 - self._tokens) / self.rate)
+
+    def paused_for(self) -> float:
+        """
+        Сколько секунд осталось до конца паузы (0, если паузы нет).
+        """
+        return max(0.0, self._updated - time.monotonic())
+
+    def pause(self, seconds: float) -> None:
+        """
+        Останавливает выдачу токенов на seconds секунд (например, по заголовку Retry-After).
+
+        Накопленный запас сгорает, поэтому после паузы запросы идут с обычной частотой, без всплеска.
+        """
+        self._refill()
+        self._tokens = min(self._tokens, 0.0)
+        self._updated = max(self._updated, time.monotonic() + seconds)
+        self._pauses += 1
+
+    async def acquire(self) -> float:
+        """
+        Забирает один токен, при необходимости дожидаясь его.
+
+        :return: Время ожидания (в секундах).
+        """
+        waited = 0.0
+        while True:
+            self._refill()
+            self._tokens -= 1
+            wait = self.paused_for() + max(0.0, -self._tokens / self.rate)
+            if not wait:
+                return waited
+            pauses = self._pauses
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self._tokens += 1  # Возвращаем зарезервированный токен
+                raise
+            waited += wait
+            if pauses == self._pauses:
+                return waited
+            # Пока ждали, выдачу токенов приостановили: встаём в очередь заново.
+            self._tokens += 1
+
+
+def retry_after_delay(value: Optional[str], default: float, maximum: float) -> float:
+    """
+    Переводит значение заголовка Retry-After (секунды или HTTP-дата) в секунды.
+
+    :param value: Значение заголовка (None, если заголовка нет).
+    :param default: Пауза, если заголовка нет или его не удалось разобрать.
+    :param maximum: Максимальная пауза (защита от слишком больших значений).
+    :return: Длительность паузы (в секундах).
+    """
+    delay = default
+    if value:
+        value = value.strip()
+        try:
+            delay = float(value) if value.isdigit() else (
+                parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            pass
+    return min(max(delay, 0.0), maximum)
+
+
+@dataclass
+class HostWaitStats:
+    """
+    Статистика ожидания в ограничителе частоты для одного хоста.
+    """
+    requests: int = 0
+    delayed: int = 0  # Запросы, которым пришлось ждать токен
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    throttled: int = 0  # Ответы 429/503 с паузой по Retry-After
+    recent_waits: deque = field(default_factory=lambda: deque(maxlen=1000))
+
+    def percentile(self, percent: float) -> float:
+        if not self.recent_waits:
+            return 0.0
+        waits = sorted(self.recent_waits)
+        return waits[min(len(waits) - 1, int(len(waits) * percent / 100))]
+
+
+class HostRateLimiter:
+
+    def __init__(self, rate: float, burst: float, default_retry_after: float = 1.0, max_retry_after: float = 60.0) -> None:
+        """
+        Общий ограничитель частоты исходящих запросов с отдельным token bucket на каждый хост.
+
+        Вместо того чтобы отправлять запросы сразу и уходить в экспоненциальные повторы
+        после ответов 429/503, запросы к хосту равномерно распределяются во времени.
+        Ответ 429 или 503 с заголовком Retry-After приостанавливает все запросы к хосту
+        на указанное время.
+
+        :param rate: Максимальная частота запросов к одному хосту (в секунду).
+        :param burst: Допустимый всплеск запросов к одному хосту.
+        :param default_retry_after: Пауза после ответа 429 без заголовка Retry-After (в секундах).
+        :param max_retry_after: Максимальная пауза по заголовку Retry-After (в секундах).
+        """
+        self.rate = rate
+        self.burst = burst
+        self.default_retry_after = default_retry_after
+        self.max_retry_after = max_retry_after
+        self._buckets: dict[str, TokenBucket] = {}
+        self._stats: dict[str, HostWaitStats] = {}
+
+    def _bucket(self, host: str) -> TokenBucket:
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate, self.burst)
+            self._stats[host] = HostWaitStats()
+        return self._buckets[host]
+
+    async def acquire(self, host: str) -> float:
+        """
+        Дожидается разрешения на запрос к хосту.
+
+        :param host: Хост запроса.
+        :return: Время ожидания (в секундах).
+        """
+        wait = await self._bucket(host).acquire()
+        host_stats = self._stats[host]
+        host_stats.requests += 1
+        host_stats.delayed += wait > 0
+        host_stats.wait_total += wait
+        host_stats.wait_max = max(host_stats.wait_max, wait)
+        host_stats.recent_waits.append(wait)
+        return wait
+
+    def pause(self, host: str, retry_after: Optional[str]) -> float:
+        """
+        Приостанавливает запросы к хосту после ответа 429/503.
+
+        :param host: Хост запроса.
+        :param retry_after: Значение заголовка Retry-After (None, если заголовка нет).
+        :return: Длительность паузы (в секундах).
+        """
+        delay = retry_after_delay(retry_after, self.default_retry_after, self.max_retry_after)
+        self._bucket(host).pause(delay)
+        self._stats[host].throttled += 1
+        logging.warning(f"Хост {host} ограничил частоту запросов, пауза {delay:.1f} с.")
+        return delay
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        """
+        Статистика ожидания по хостам для подбора rate и burst.
+        """
+        return {
+            host: {
+                "requests": host_stats.requests,
+                "delayed": host_stats.delayed,
+                "throttled": host_stats.throttled,
+                "wait_total": host_stats.wait_total,
+                "wait_avg": host_stats.wait_total / host_stats.requests if host_stats.requests else 0.0,
+                "wait_p50": host_stats.percentile(50),
+                "wait_p95": host_stats.percentile(95),
+                "wait_max": host_stats.wait_max,
+                "paused_for": self._buckets[host].paused_for(),
+            }
+            for host, host_stats in self._stats.items()
+        }
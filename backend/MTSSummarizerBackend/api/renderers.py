@@ -0,0 +1,21 @@
+import json
+from rest_framework.renderers import BaseRenderer
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Рендерер text/event-stream для представлений с потоком Server-Sent Events.
+
+    Сам поток событий отдаётся через StreamingHttpResponse в обход рендереров, но без
+    рендерера с этим типом DRF отвечает 406 на запросы с заголовком Accept: text/event-stream,
+    который отправляет EventSource. Ответы DRF (ошибки валидации, 404, 429) отдаются
+    одним событием error с данными в JSON.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return f"event: error\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode(self.charset)
@@ -1,11 +1,14 @@
 from rest_framework import serializers
 from adrf.serializers import ModelSerializer, Serializer
-from .models import Article
-from .habr_parser import parser
-from .task_queue import task_queue
+from .models import Article, Summary, SummaryJob
+from .jobs import request_deadline, submit_job, wait_for_job
+from .services import get_fresh_summary
 
 
 class ArticleDataBaseSerializer(ModelSerializer):
+    article_summary = serializers.CharField(source='summary.article_summary', read_only=True, help_text='Резюме статьи')
+    comments_summary = serializers.CharField(source='summary.comments_summary', read_only=True,
+                                             help_text='Резюме комментариев')
     
     class Meta:
         model = Article
@@ -15,13 +18,11 @@ class ArticleDataBaseSerializer(ModelSerializer):
     async def acreate(self, validated_data):
         url = validated_data['url']
         user = validated_data['user']
-        parsed_article, parsed_comments = await parser.parsing_article(url)
-        article_title = parsed_article['title']
-        article_text = parsed_article['text']
-        article_summary, comments_summary = await task_queue.process_task(article_text, parsed_comments)
-        return await Article.objects.acreate(url=url, title=article_title,
-                                             article_summary=article_summary, 
-                                             comments_summary=comments_summary, user=user)
+        summary = await get_fresh_summary(url)
+        if summary is None:
+            job = await wait_for_job(await submit_job(url, user, request_deadline()))
+            return job.article
+        return await Article.objects.acreate(url=url, title=summary.title, summary=summary, user=user)
     
     def validate_url(self, value):
         if 'habr.com' not in value or ('articles' not in value and 'news' not in value):
@@ -37,14 +38,15 @@ class ArticleSerialiser(Serializer):
 
     async def acreate(self, validated_data):
         url = validated_data['url']
-        parsed_article, parsed_comments = await parser.parsing_article(url)
-        article_title = parsed_article['title']
-        article_text = parsed_article['text']
-        article_summary, comments_summary = await task_queue.process_task(article_text, parsed_comments)
+        summary = await get_fresh_summary(url)
+        if summary is None:
+            job = await wait_for_job(await submit_job(url, deadline=request_deadline(),
+                                                      owner=validated_data.get('owner', '')))
+            summary = job.summary
         return {"url": url,
-               "title": article_title,
-               "article_summary": article_summary,
-               "comments_summary": comments_summary}
+                "title": summary.title,
+                "article_summary": summary.article_summary,
+                "comments_summary": summary.comments_summary}
     
     def validate_url(self, value):
         if 'habr.com' not in value or ('articles' not in value and 'news' not in value):
@@ -68,3 +70,44 @@ class ArticleLatestSerializer(Serializer):
 
 class QueueStatusSerializer(Serializer):
     is_available = serializers.BooleanField(help_text='Заполнена ли очередь')
+    queue_depth = serializers.IntegerField(help_text='Количество задач в очереди (ожидающих и выполняемых)')
+    queued = serializers.IntegerField(help_text='Количество ожидающих задач')
+    running = serializers.IntegerField(help_text='Количество выполняемых задач')
+    max_depth = serializers.IntegerField(help_text='Максимальное количество задач в очереди')
+    job_time = serializers.FloatField(help_text='Среднее время выполнения задачи (в секундах)')
+    estimated_wait = serializers.FloatField(help_text='Оценка времени ожидания начала выполнения новой задачи (в секундах)')
+
+
+class SummarySerializer(ModelSerializer):
+
+    class Meta:
+        model = Summary
+        fields = ('title', 'article_summary', 'comments_summary')
+        read_only_fields = ('title', 'article_summary', 'comments_summary')
+
+
+class SummaryJobSerializer(ModelSerializer):
+    summary = SummarySerializer(read_only=True, help_text='Резюме (когда задача выполнена)')
+
+    class Meta:
+        model = SummaryJob
+        fields = ('id', 'url', 'status', 'summary', 'progress', 'article', 'error', 'attempts',
+                  'created_at', 'started_at', 'finished_at')
+        read_only_fields = fields
+
+
+class SummaryJobCreateSerializer(ModelSerializer):
+
+    class Meta:
+        model = SummaryJob
+        fields = ('id', 'url', 'status', 'created_at')
+        read_only_fields = ('id', 'status', 'created_at')
+
+    async def acreate(self, validated_data):
+        return await submit_job(validated_data['url'], validated_data['user'], validated_data.get('deadline'),
+                                owner=validated_data.get('owner', ''))
+
+    def validate_url(self, value):
+        if 'habr.com' not in value or ('articles' not in value and 'news' not in value):
+            raise serializers.ValidationError('This is not Habr article.')
+        return value
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import logging
+from datetime import timedelta
+from functools import partial
+from typing import Hashable, Optional
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from .models import Summary
+from .habr_parser import HabrParseError, parser, normalize_article_url
+from .progress import summary_progress
+from .single_flight import SingleFlight
+from .task_queue import SummarizerUnavailable, TaskQueue, task_queue
+
+
+SUMMARY_SETTINGS = {
+    "fresh_for": 24 * 60 * 60,  # Сколько секунд резюме отдаётся без проверки, не изменился ли текст статьи.
+}
+
+summary_flights = SingleFlight()
+
+
+async def get_summary(url: str, priority: str = TaskQueue.ANONYMOUS, owner: Hashable = None) -> Summary:
+    """
+    Возвращает общее для всех пользователей резюме статьи из хранилища Summary.
+
+    Резюме хранятся по каноническому URL и SHA-256 текста статьи и комментариев к ней.
+    Свежее резюме (проверенное не раньше чем fresh_for секунд назад) отдаётся без парсинга.
+    Иначе статья парсится заново (через HTTP-кэш это обычно ответ 304), и если
+    ни текст, ни комментарии не изменились, отдаётся сохранённое резюме без обращения
+    к моделям. Модели вызываются только для новой статьи, изменившегося текста или новых
+    комментариев (неизменившийся текст статьи при этом берётся из кэша ответов LLM).
+    Неполное резюме (анализ комментариев завершился ошибкой, см. поле errors) отдаётся,
+    но не считается свежим и не переиспользуется: следующий запрос повторит обработку.
+    Если модель суммаризации недоступна (ответ 503 от TaskQueue), отдаётся прежнее
+    резюме статьи, если оно есть, хотя текст статьи с тех пор изменился.
+    Одновременные запросы одной и той же статьи разделяют одну обработку
+    (с приоритетом первого из них).
+    Пока модели работают, промежуточные результаты (заголовок, куски резюме,
+    анализ комментариев) публикуются в summary_progress.
+
+    :param url: URL статьи.
+    :param priority: Класс приоритета задачи в очереди суммаризации (см. TaskQueue).
+    :param owner: Владелец задачи для честного разделения очереди (например, id пользователя).
+    :return: Резюме статьи.
+    """
+    canonical_url = normalize_article_url(url)
+    return await summary_flights.run(canonical_url, _get_summary, url, canonical_url, priority, owner)
+
+
+async def get_fresh_summary(url: str) -> Optional[Summary]:
+    """
+    Возвращает свежее резюме статьи из хранилища без парсинга (None, если его нет или оно устарело).
+
+    :param url: URL статьи.
+    :return: Резюме статьи или None.
+    """
+    summary = await (Summary.objects.filter(url=normalize_article_url(url), is_partial=False)
+                     .order_by('-checked_at').afirst())
+    if summary is not None and timezone.now() - summary.checked_at < timedelta(seconds=SUMMARY_SETTINGS['fresh_for']):
+        return summary
+    return None
+
+
+def _content_hash(text: str, comments: Optional[list[str]]) -> str:
+    """
+    SHA-256 текста статьи и комментариев к ней (отпечаток, по которому резюме переиспользуется).
+    """
+    content_hash = hashlib.sha256(text.encode())
+    for comment in comments or ():
+        content_hash.update(b"\0" + comment.encode())
+    return content_hash.hexdigest()
+
+
+async def _get_summary(url: str, canonical_url: str, priority: str, owner: Hashable) -> Summary:
+    fresh_summary = await get_fresh_summary(canonical_url)
+    if fresh_summary is not None:
+        logging.info(f"Резюме статьи {canonical_url} взято из базы.")
+        return fresh_summary
+    try:
+        parsed_article, parsed_comments = await parser.parsing_article(url)
+    except HabrParseError as e:
+        raise APIException(f"Program got some issues during parsing the article: {e}")
+    text_hash = _content_hash(parsed_article['text'], parsed_comments)
+    summary = await Summary.objects.filter(url=canonical_url, text_hash=text_hash, is_partial=False).afirst()
+    if summary is not None:
+        summary.checked_at = timezone.now()
+        await summary.asave(update_fields=('checked_at',))
+        logging.info(f"Текст и комментарии статьи {canonical_url} не изменились, резюме взято из базы.")
+        return summary
+    summary_progress.publish(canonical_url, 'title', parsed_article['title'])
+    try:
+        try:
+            article_summary, comments_summary = await task_queue.process_task(
+                parsed_article['text'], parsed_comments, priority, owner, partial(summary_progress.publish, canonical_url),
+                canonical_url
+            )
+        except SummarizerUnavailable:
+            # checked_at не обновляется: следующий запрос снова попробует суммаризировать новое содержимое.
+            stale_summary = await Summary.objects.filter(url=canonical_url).order_by('-checked_at').afirst()
+            if stale_summary is None:
+                raise
+            logging.warning(f"Модель суммаризации недоступна, для статьи {canonical_url} отдано прежнее резюме.")
+            return stale_summary
+        comments_errors = json.loads(comments_summary).get("errors") if comments_summary else None
+        is_partial = bool(comments_errors)
+        defaults = {
+            "title": parsed_article['title'],
+            "article_summary": article_summary,
+            "comments_summary": comments_summary,
+            "is_partial": is_partial,
+        }
+        if is_partial:
+            # checked_at не обновляется, а сама запись не переиспользуется: следующий запрос повторит обработку.
+            logging.warning(f"Резюме статьи {canonical_url} неполное: {comments_errors}.")
+        else:
+            defaults["checked_at"] = timezone.now()
+        summary, _ = await Summary.objects.aupdate_or_create(
+            url=canonical_url,
+            text_hash=text_hash,
+            defaults=defaults,
+            create_defaults=defaults | {"checked_at": timezone.now()}
+        )
+    finally:
+        summary_progress.finish(canonical_url)
+    return summary
@@ -0,0 +1,68 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+
+    def __init__(self) -> None:
+        """
+        Объединение одновременных одинаковых вызовов (single-flight).
+
+        Пока вызов с ключом key выполняется, все новые вызовы с тем же ключом
+        не запускают работу заново, а дожидаются результата (или исключения)
+        уже идущего вызова.
+        """
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+        self._waiters: dict[asyncio.Task, int] = {}
+        self.calls = 0
+        self.shared = 0  # Вызовы, получившие результат уже идущего вызова
+        self.cancelled = 0  # Общие вызовы, отменённые потому, что их результат больше никто не ждёт
+
+    async def run(self, key: Hashable, function: Callable[..., Awaitable[Any]], *args) -> Any:
+        """
+        Выполняет function(*args) или присоединяется к уже идущему вызову с тем же ключом.
+
+        Отмена одного из ожидающих (например, отключение клиента) не отменяет
+        общий вызов: остальные ожидающие получат результат. Если отменены все
+        ожидающие, общий вызов тоже отменяется, чтобы не тратить ресурсы на
+        результат, который никто не прочитает.
+
+        :param key: Ключ вызова.
+        :param function: Корутинная функция.
+        :param args: Аргументы функции.
+        :return: Результат функции.
+        """
+        self.calls += 1
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.create_task(function(*args))
+            self._tasks[key] = task
+            task.add_done_callback(lambda done_task: self._forget(key, done_task))
+        else:
+            self.shared += 1
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[task] == 1 and not task.done():
+                task.cancel()
+                self.cancelled += 1
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # Помечаем исключение как обработанное, даже если все ожидающие отменены
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "in_flight": len(self._tasks),
+            "calls": self.calls,
+            "shared": self.shared,
+            "cancelled": self.cancelled,
+        }
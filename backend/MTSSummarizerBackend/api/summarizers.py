@@ -0,0 +1,259 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from os import getenv
+from time import monotonic
+from typing import AsyncIterator, Optional
+from .chunking import estimate_tokens, split_text
+
+try:
+    import torch
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+except ImportError:  # torch и transformers - необязательные зависимости, нужны только локальному бэкенду
+    torch = None
+
+
+class BaseSummarizer(ABC):
+    """
+    Бэкенд суммаризации текста статьи.
+
+    TaskQueue вызывает только методы этого класса, поэтому бэкенды взаимозаменяемы
+    (см. get_summarizer).
+    """
+
+    name = "base"
+    splits_long_text = False  # Суммаризирует ли бэкенд длинный текст по частям (тогда предобработка его не сокращает)
+
+    @abstractmethod
+    async def summarize_text(self, text: str) -> str:
+        """
+        Суммаризирует текст статьи.
+
+        :param text: Текст статьи.
+        :return: Резюме статьи.
+        """
+
+    async def stream_summary(self, text: str) -> AsyncIterator[str]:
+        """
+        Суммаризирует текст статьи, отдавая резюме по мере генерации.
+
+        Бэкенд без потоковой генерации отдаёт резюме одним куском.
+
+        :param text: Текст статьи.
+        :return: Куски резюме в порядке генерации.
+        """
+        yield await self.summarize_text(text)
+
+    async def start(self) -> None:
+        """
+        Подготавливает бэкенд к работе (загружает модель и т.п.); вызывается из TaskQueue.start.
+        """
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": self.name}
+
+
+class LocalSummarizer(BaseSummarizer):
+    """
+    Локальный бэкенд: собственная seq2seq-модель суммаризации (models/summary_model.json) на CPU.
+
+    Одновременные запросы собираются в батчи динамически: батч уходит в модель, когда
+    набралось max_batch_size текстов или когда самый старый текст ждёт max_wait секунд.
+    Батчи выполняются по одному в отдельном потоке, чтобы генерация не блокировала
+    event loop, а все ядра доставались одному батчу (num_threads потоков torch).
+
+    Модель загружается в start() (или при первой суммаризации), а не при создании
+    объекта, поэтому процессы, которые не суммаризируют статьи, её не загружают.
+
+    Длина входа модели ограничена max_input_tokens токенами, длина резюме - max_new_tokens
+    токенами, поэтому время батча предсказуемо. Более длинная статья делится на части
+    (api/chunking.py), части суммаризируются в общих батчах, а их резюме объединяются и
+    суммаризируются снова, пока не поместятся во вход модели (map-reduce). С quantize=True
+    линейные слои модели динамически квантуются в int8, что ускоряет генерацию на CPU
+    ценой небольшой потери качества (см. benchmarks/local_summarizer.py).
+
+    :param model_path: Путь к модели (папка из Model_link в models/summary_model.json) или её id на Hugging Face Hub.
+    :param max_batch_size: Максимальный размер батча.
+    :param max_wait: Максимальное время ожидания батча (в секундах).
+    :param max_input_tokens: Максимальная длина входа модели (в токенах).
+    :param max_new_tokens: Максимальная длина резюме (в токенах).
+    :param num_beams: Количество лучей поиска (1 - жадная генерация).
+    :param quantize: Квантовать ли модель в int8.
+    :param num_threads: Количество потоков torch (None - по умолчанию torch).
+    """
+
+    name = "local"
+    splits_long_text = True
+
+    def __init__(
+        self,
+        model_path: str,
+        max_batch_size: int = 8,
+        max_wait: float = 0.05,
+        max_input_tokens: int = 512,
+        max_new_tokens: int = 128,
+        num_beams: int = 1,
+        quantize: bool = True,
+        num_threads: Optional[int] = None
+    ) -> None:
+        if not model_path:
+            raise ValueError("Не указан путь к локальной модели суммаризации (см. models/summary_model.json).")
+        self.model_path = model_path
+        self.tokenizer = None
+        self.model = None
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_input_tokens = max_input_tokens
+        self.max_new_tokens = max_new_tokens
+        self.num_beams = num_beams
+        self.quantize = quantize
+        self.num_threads = num_threads
+        self._loading = asyncio.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = ThreadPoolExecutor(max_workers=1,
+                                                                          thread_name_prefix="local-summarizer")
+        self._pending: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.summarized = 0
+        self.generation_time = 0.0
+        self.chunked = 0  # Статьи, не поместившиеся во вход модели
+
+    def _load(self) -> None:
+        if torch is None:
+            raise ImportError("Для LocalSummarizer необходимо установить пакеты torch и transformers "
+                              "(requirements-local.txt, образ собирается с LOCAL_SUMMARIZER=true).")
+        if self.num_threads is not None:
+            torch.set_num_threads(self.num_threads)
+        tokenizer = AutoTokenizer.from_pretrained(self.model_path)
+        model = AutoModelForSeq2SeqLM.from_pretrained(self.model_path)
+        model.eval()
+        if self.quantize:
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.tokenizer, self.model = tokenizer, model
+        logging.info(f"Локальная модель суммаризации загружена: {self.model_path}, int8: {self.quantize}.")
+
+    async def start(self) -> None:
+        async with self._loading:
+            if self._executor is None:  # Бэкенд запускается снова после close()
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-summarizer")
+            if self.model is None:
+                await asyncio.get_running_loop().run_in_executor(self._executor, self._load)
+
+    def _generate(self, texts: list[str]) -> list[str]:
+        inputs = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_input_tokens,
+                                return_tensors="pt")
+        with torch.inference_mode():
+            outputs = self.model.generate(**inputs, max_new_tokens=self.max_new_tokens, num_beams=self.num_beams)
+        return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+    async def _collect_batch(self) -> list[tuple[str, asyncio.Future]]:
+        batch = [await self._pending.get()]
+        deadline = monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(await asyncio.wait_for(self._pending.get(), deadline - monotonic()))
+            except TimeoutError:
+                break
+        return batch
+
+    async def _run_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [(text, future) for text, future in await self._collect_batch() if not future.done()]
+            if not batch:
+                continue  # Все ожидавшие запросы отменены
+            started = monotonic()
+            try:
+                summaries = await loop.run_in_executor(self._executor, self._generate, [text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.generation_time += monotonic() - started
+            self.batches += 1
+            self.summarized += len(batch)
+            for (_, future), summary in zip(batch, summaries):
+                if not future.done():
+                    future.set_result(summary)
+
+    async def _summarize_chunk(self, text: str) -> str:
+        if self._batcher is None or self._batcher.done():
+            self._pending = asyncio.Queue()
+            self._batcher = asyncio.create_task(self._run_batches())
+        future = asyncio.get_running_loop().create_future()
+        await self._pending.put((text, future))
+        return await future
+
+    async def summarize_text(self, text: str) -> str:
+        if self.model is None or self._executor is None:
+            await self.start()
+        if estimate_tokens(text) <= self.max_input_tokens:
+            return await self._summarize_chunk(text)
+        self.chunked += 1
+        chunks = split_text(text, self.max_input_tokens)
+        # Части одной статьи попадают в общие батчи, как тексты одновременных запросов.
+        summaries = await asyncio.gather(*(self._summarize_chunk(chunk) for chunk in chunks))
+        joined = "\n\n".join(summaries)
+        while len(summaries) > 1 and estimate_tokens(joined) > self.max_input_tokens:
+            summaries = await asyncio.gather(*(self._summarize_chunk(chunk)
+                                               for chunk in split_text(joined, self.max_input_tokens)))
+            joined = "\n\n".join(summaries)
+        logging.info(f"Статья не поместилась во вход локальной модели и суммаризирована по частям: {len(chunks)}.")
+        return await self._summarize_chunk(joined)
+
+    async def close(self) -> None:
+        if self._batcher is not None:
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, return_exceptions=True)
+            self._batcher = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "loaded": self.model is not None,
+            "quantized": self.quantize,
+            "chunked": self.chunked,
+            "queued": self._pending.qsize() if self._pending is not None else 0,
+            "batches": self.batches,
+            "summarized": self.summarized,
+            "avg_batch_size": self.summarized / self.batches if self.batches else 0.0,
+            "avg_batch_time": self.generation_time / self.batches if self.batches else 0.0,
+        }
+
+
+LOCAL_SUMMARIZER_SETTINGS = {
+    "model_path": getenv('LOCAL_SUMMARY_MODEL_PATH', ''),  # Папка модели из Model_link в models/summary_model.json.
+    "max_batch_size": 8,  # Максимальный размер батча.
+    "max_wait": 0.05,  # Сколько ждать заполнения батча (в секундах).
+    "max_input_tokens": 512,  # Длина входа модели (в токенах), длинная статья суммаризируется по частям.
+    "max_new_tokens": 128,  # Максимальная длина резюме (в токенах).
+    "num_beams": 1,  # Жадная генерация: самое предсказуемое время ответа.
+    "quantize": True,  # Динамическое квантование линейных слоёв в int8.
+    "num_threads": None,  # Потоки torch (None - по количеству ядер).
+}
+
+
+def get_summarizer(name: str = "deepseek") -> BaseSummarizer:
+    """
+    Возвращает бэкенд суммаризации по имени.
+
+    :param name: 'deepseek' (DeepSeek API) или 'local' (LocalSummarizer с настройками LOCAL_SUMMARIZER_SETTINGS).
+    :return: Экземпляр бэкенда.
+    """
+    if name == "deepseek":
+        from .DeepSeekModel import deepseek_model  # DeepSeekModel сам импортирует BaseSummarizer из этого модуля
+        summarizer = deepseek_model
+    elif name == LocalSummarizer.name:
+        summarizer = LocalSummarizer(**LOCAL_SUMMARIZER_SETTINGS)
+    else:
+        raise ValueError(f"Неизвестный бэкенд суммаризации: {name}. Доступны: deepseek, local.")
+    logging.info(f"Бэкенд суммаризации: {name}.")
+    return summarizer
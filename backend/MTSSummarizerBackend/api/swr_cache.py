@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+from .habr_parser import parser
+
+
+class StaleWhileRevalidateCache:
+
+    def __init__(self, loader: Callable[[], Awaitable[Any]], ttl: float, max_stale: float) -> None:
+        """
+        Кэш одного значения со стратегией stale-while-revalidate.
+
+        Свежее значение отдаётся сразу. Устаревшее значение тоже отдаётся сразу,
+        но запускает обновление в фоне. Если значения нет или оно устарело
+        больше чем на max_stale, запрос ждёт загрузки. Одновременные промахи
+        разделяют одну загрузку.
+
+        :param loader: Корутинная функция, загружающая значение. Результат None считается ошибкой загрузки.
+        :param ttl: Время (в секундах), в течение которого значение считается свежим.
+        :param max_stale: Время (в секундах) после истечения ttl, в течение которого устаревшее значение
+                          отдаётся без ожидания обновления.
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._value = None
+        self._loaded_at = float("-inf")
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    async def get(self) -> Any:
+        """
+        Возвращает значение из кэша, при необходимости обновляя его.
+        """
+        age = time.monotonic() - self._loaded_at
+        if self._value is not None and age < self.ttl:
+            self.hits += 1
+            return self._value
+        if self._value is not None and age < self.ttl + self.max_stale:
+            self.stale_hits += 1
+            self.refresh()
+            return self._value
+        self.misses += 1
+        # shield: отключение одного клиента не должно отменять общую загрузку.
+        return await asyncio.shield(self.refresh())
+
+    def refresh(self) -> asyncio.Task:
+        """
+        Запускает обновление в фоне, если оно ещё не идёт.
+
+        :return: Задача обновления, общая для всех одновременных вызовов.
+        """
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._load())
+        return self._refresh_task
+
+    async def _load(self) -> Any:
+        self.refreshes += 1
+        try:
+            value = await self.loader()
+        except Exception as e:
+            value = None
+            logging.warning(f"Ошибка обновления кэша: {e!r}.")
+        if value is None:
+            # Оставляем прежнее значение: лучше устаревшие данные, чем ошибка.
+            self.refresh_errors += 1
+            return self._value
+        self._value, self._loaded_at = value, time.monotonic()
+        return value
+
+    async def close(self) -> None:
+        """
+        Отменяет незавершённое обновление. Вызывается при остановке приложения (ASGI lifespan).
+        """
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+
+    def stats(self) -> dict[str, int | float | None]:
+        return {
+            "age": time.monotonic() - self._loaded_at if self._value is not None else None,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+        }
+
+
+LATEST_ARTICLES_CACHE_SETTINGS = {
+    "ttl": 300,  # Время (в секундах), в течение которого список последних статей считается свежим.
+    "max_stale": 3600,  # Сколько секунд после ttl отдавать устаревший список сразу, обновляя его в фоне.
+}
+
+latest_articles_cache = StaleWhileRevalidateCache(
+    parser.parsing_latest_articles,
+    ttl=LATEST_ARTICLES_CACHE_SETTINGS['ttl'],
+    max_stale=LATEST_ARTICLES_CACHE_SETTINGS['max_stale'],
+)
@@ -1,59 +1,508 @@
 from rest_framework.exceptions import APIException, status
-from asyncio import Queue, create_task, get_event_loop
+from asyncio import (CancelledError, Future, Semaphore, Task, TimeoutError, create_task, gather, get_event_loop,
+                     timeout, to_thread, wait)
 from aiohttp import ClientSession
-from typing import Callable
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from functools import partial
+from statistics import quantiles
+from time import monotonic
+from typing import Any, Callable, Hashable, Optional
 from json import dumps
+import logging
+from os import getenv
 from .DeepSeekModel import deepseek_model
+from .llm_client import LLMUnavailableError
+from .pipeline import Stage, run_stage_graph
+from .summarizers import BaseSummarizer, get_summarizer
+from .text_preprocessing import TextPreprocessor, text_preprocessor, track_token_usage
+
+
+class SummarizerUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Модель суммаризации временно недоступна."
+    default_code = "summarizer_unavailable"
+
+
+class FairScheduler:
+
+    def __init__(self, weights: dict[str, int], quantum: int, wait_window: int = 1000) -> None:
+        """
+        Планировщик задач с классами приоритета и честным обслуживанием владельцев.
+
+        Между классами задачи выбираются взвешенным циклическим обходом: за один круг
+        класс получает не больше weight задач, поэтому класс с большим весом обслуживается
+        чаще, но и класс с наименьшим весом не простаивает бесконечно. Внутри класса у
+        каждого владельца (пользователя) своя очередь, а очереди обслуживаются по алгоритму
+        deficit round robin: за визит владелец получает quantum единиц стоимости и может
+        потратить их на свои задачи. Пользователь, поставивший двадцать задач, получает
+        ту же долю, что и пользователь с одной задачей.
+
+        :param weights: Веса классов приоритета (задач за один круг обхода классов).
+        :param quantum: Стоимость задач, которую владелец может потратить за один визит.
+        :param wait_window: Количество последних задач каждого класса для статистики ожидания.
+        """
+        self.__weights = weights
+        self.__quantum = quantum
+        self.__classes = deque(weights)
+        self.__credits = dict(weights)
+        self.__owners: dict[str, OrderedDict[Hashable, deque]] = {priority: OrderedDict() for priority in weights}
+        self.__deficits: dict[tuple[str, Hashable], int] = {}
+        self.__visited: set[tuple[str, Hashable]] = set()  # Владельцы, уже получившие quantum в текущем визите
+        self.__available = Semaphore(0)
+        self.__size = 0
+        self.__stats = {priority: {"queued": 0, "dispatched": 0, "waits": deque(maxlen=wait_window)}
+                        for priority in weights}
+
+    def qsize(self) -> int:
+        return self.__size
+
+    def put(self, item: Any, priority: str, owner: Hashable = None, cost: int = 1) -> None:
+        """
+        Ставит задачу в очередь владельца.
+
+        :param item: Задача.
+        :param priority: Класс приоритета (один из ключей weights).
+        :param owner: Владелец задачи (например, id пользователя).
+        :param cost: Стоимость задачи в тех же единицах, что и quantum.
+        """
+        owners = self.__owners[priority]
+        if owner not in owners:
+            owners[owner] = deque()
+            self.__deficits[priority, owner] = 0
+        owners[owner].append((monotonic(), cost, item))
+        self.__stats[priority]["queued"] += 1
+        self.__size += 1
+        self.__available.release()
+
+    async def get(self) -> Any:
+        """
+        Дожидается и возвращает следующую задачу.
+        """
+        await self.__available.acquire()
+        priority = self.__next_class()
+        enqueued_at, _, item = self.__next_task(priority)
+        priority_stats = self.__stats[priority]
+        priority_stats["queued"] -= 1
+        priority_stats["dispatched"] += 1
+        priority_stats["waits"].append(monotonic() - enqueued_at)
+        self.__size -= 1
+        return item
+
+    def __next_class(self) -> str:
+        while True:
+            priority = self.__classes[0]
+            if self.__owners[priority] and self.__credits[priority] > 0:
+                self.__credits[priority] -= 1
+                return priority
+            self.__classes.rotate(-1)
+            self.__credits[self.__classes[0]] = self.__weights[self.__classes[0]]
+
+    def __next_task(self, priority: str) -> tuple[float, int, Any]:
+        owners = self.__owners[priority]
+        while True:
+            owner, tasks = next(iter(owners.items()))
+            flow = (priority, owner)
+            if flow not in self.__visited:
+                self.__visited.add(flow)
+                self.__deficits[flow] += self.__quantum
+            cost = tasks[0][1]
+            if self.__deficits[flow] >= cost:
+                self.__deficits[flow] -= cost
+                task = tasks.popleft()
+                if not tasks:
+                    del owners[owner], self.__deficits[flow]
+                    self.__visited.discard(flow)
+                return task
+            owners.move_to_end(owner)
+            self.__visited.discard(flow)
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        """
+        Статистика ожидания задач по классам приоритета (по последним wait_window задачам класса).
+        """
+        result = {}
+        for priority, priority_stats in self.__stats.items():
+            waits = sorted(priority_stats["waits"])
+            result[priority] = {
+                "weight": self.__weights[priority],
+                "queued": priority_stats["queued"],
+                "owners": len(self.__owners[priority]),
+                "dispatched": priority_stats["dispatched"],
+                "wait_avg": sum(waits) / len(waits) if waits else 0.0,
+                "wait_p50": waits[len(waits) // 2] if waits else 0.0,
+                "wait_p95": quantiles(waits, n=20, method="inclusive")[-1] if len(waits) > 1 else sum(waits),
+                "wait_max": waits[-1] if waits else 0.0,
+            }
+        return result
 
 
 class TaskQueue:
 
-    def __init__(self, maxsize: int=5):
-        self.__queue = Queue(maxsize=maxsize)
+    STAGES = ("llm", "sentiment", "clustering")
+
+    # Классы приоритета задач.
+    AUTHENTICATED = "authenticated"  # Интерактивный запрос авторизованного пользователя.
+    ANONYMOUS = "anonymous"  # Интерактивный запрос анонимного пользователя.
+    PREFETCH = "prefetch"  # Фоновая предзагрузка резюме.
+
+    def __init__(
+        self,
+        maxsize: int = 32,
+        workers: int = 4,
+        priority_weights: Optional[dict[str, int]] = None,
+        quantum: int = 50000,
+        stage_limits: Optional[dict[str, int]] = None,
+        stage_timeouts: Optional[dict[str, float]] = None,
+        sentiment_url: str = "http://sentiment-analyzer-model-api:8080/api/v1/analyze-comments-sentiment/",
+        clustering_url: str = "http://comments-clustering-model-api:8081/api/v1/get-comments-clusters/",
+        summarizer: BaseSummarizer = deepseek_model,
+        preprocessor: Optional[TextPreprocessor] = text_preprocessor,
+        fallback_summarizer: Optional[BaseSummarizer] = None
+    ):
+        """
+        Очередь задач суммаризации с пулом воркеров.
+
+        Задачи почти целиком состоят из сетевых запросов (DeepSeek и API моделей),
+        поэтому несколько воркеров обрабатывают задачи одновременно. Количество
+        одновременных запросов к каждому внешнему сервису ограничивается отдельно.
+
+        Внутри задачи суммаризация статьи, анализ тональности и кластеризация комментариев
+        независимы и выполняются одновременно, у каждой стадии свой таймаут. Если стадия
+        обработки комментариев завершилась ошибкой или по таймауту, задача возвращает
+        резюме статьи и частичный результат по комментариям.
+
+        Если вызвавший process_task отменён (клиент отключился или истёк крайний срок запроса),
+        ожидающая задача выбрасывается из очереди, не начавшись, а выполняемая отменяется
+        вместе с исходящими запросами к DeepSeek и API моделей.
+
+        Если вызвавший передал on_progress, резюме статьи запрашивается потоково, и
+        каждый кусок ответа модели, а затем результаты анализа тональности и кластеризации
+        передаются в on_progress сразу по готовности (см. SummaryProgress).
+
+        Ожидающие задачи выбираются не по FIFO, а планировщиком FairScheduler: по классам
+        приоритета (AUTHENTICATED, ANONYMOUS, PREFETCH) и честно между пользователями внутри
+        класса. Стоимость задачи - длина текста статьи в символах, quantum - в тех же единицах:
+        статья не длиннее quantum символов уходит в работу за один визит к её владельцу,
+        а более длинная ждёт лишних кругов пропорционально длине.
+
+        Перед суммаризацией текст статьи проходит предобработку (TextPreprocessor), а
+        токены на входе и выходе DeepSeek по каждой задаче пишутся в лог и суммируются в stats().
+
+        Если бэкенд суммаризации недоступен (LLMUnavailableError: разомкнут предохранитель
+        LLMClient, исчерпаны повторы, оборвался поток ответа или истёк таймаут стадии llm),
+        статья суммаризируется запасным бэкендом, а без него process_task завершается ответом 503.
+
+        :param maxsize: Максимальное количество задач, ожидающих свободного воркера.
+        :param workers: Количество воркеров (задач, обрабатываемых одновременно).
+        :param priority_weights: Веса классов приоритета (задач за один круг обхода классов).
+        :param quantum: Символов текста статей, которые пользователь может потратить за один визит планировщика.
+        :param stage_limits: Максимальное количество одновременных запросов к каждому сервису:
+                             'llm' (DeepSeek), 'sentiment' (анализ тональности), 'clustering' (кластеризация).
+        :param stage_timeouts: Таймауты стадий (в секундах), ключи те же, что у stage_limits.
+        :param sentiment_url: URL API анализа тональности комментариев.
+        :param clustering_url: URL API кластеризации комментариев.
+        :param summarizer: Бэкенд суммаризации текста статьи (DeepSeek, LocalSummarizer).
+        :param preprocessor: Предобработка текста статьи перед суммаризацией (None - без предобработки).
+        :param fallback_summarizer: Запасной бэкенд суммаризации на время недоступности основного (None - без него).
+        """
+        priority_weights = {self.AUTHENTICATED: 8, self.ANONYMOUS: 4, self.PREFETCH: 1} | (priority_weights or {})
+        self.__scheduler = FairScheduler(priority_weights, quantum)
+        self.__slots = Semaphore(maxsize)
         self.__started = False
+        self.__workers_amount = workers
+        self.__workers: list[Task] = []
+        self.__session: Optional[ClientSession] = None
+        self.__sentiment_url = sentiment_url
+        self.__clustering_url = clustering_url
+        self.__summarizer = summarizer
+        self.__preprocessor = preprocessor
+        self.__fallback_summarizer = fallback_summarizer
+        self.__fallbacks = 0
+        self.__tokens = {"article": 0, "prepared": 0, "prompt": 0, "completion": 0, "requests": 0, "cache_hits": 0}
+        stage_limits = {stage: workers for stage in self.STAGES} | (stage_limits or {})
+        self.__stage_limits = {stage: stage_limits[stage] for stage in self.STAGES}
+        self.__stage_semaphores = {stage: Semaphore(limit) for stage, limit in self.__stage_limits.items()}
+        self.__stage_timeouts = {stage: None for stage in self.STAGES} | (stage_timeouts or {})
+        self.__stage_stats = {stage: {"calls": 0, "in_flight": 0, "waiting": 0, "wait_total": 0.0,
+                                      "run_total": 0.0, "timeouts": 0, "failures": 0}
+                              for stage in self.STAGES}
+        self.__partial = 0
+        self.__busy_workers = 0
+        self.__processed = 0
+        self.__failed = 0
+        self.__dropped = 0  # Задачи, отменённые до начала выполнения
+        self.__cancelled = 0  # Задачи, отменённые во время выполнения
 
     async def start(self):
         if not self.__started:
-            create_task(self.__worker(self.__get_summary))
+            await self.__summarizer.start()
+            if self.__fallback_summarizer is not None:
+                await self.__fallback_summarizer.start()
+            self.__session = ClientSession()
+            self.__workers = [create_task(self.__worker(self.__get_summary)) for _ in range(self.__workers_amount)]
             self.__started = True
 
-    async def __get_summary(self, article_text: str, comments_list: list[str]) -> tuple[str, str]:
-        async with ClientSession() as session:
-            article_summary: str = await deepseek_model.summarize_text(article_text)
-            if len(comments_list) > 5:
-                async with session.post("http://sentiment-analyzer-model-api:8080/api/v1/analyze-comments-sentiment/",
-                                        json={"comments_list": comments_list}) as sentiment_analyzer_model_api_responce:
-                    analysis: dict[str, int] = await sentiment_analyzer_model_api_responce.json()
-                async with session.post("http://comments-clustering-model-api:8081/api/v1/get-comments-clusters/",
-                                        json={"comments_list": comments_list}) as comments_clustering_model_api_responce:
-                    clusters: list[dict[str, list[str]]] = await comments_clustering_model_api_responce.json()
-                comments_result: str = dumps({"analysis": analysis, "clusters": clusters}, ensure_ascii=False)
-            else: 
-                comments_result: str = ""
-            return article_summary, comments_result
+    async def close(self):
+        if not self.__started:
+            return
+        for worker in self.__workers:
+            worker.cancel()
+        await gather(*self.__workers, return_exceptions=True)
+        await self.__session.close()
+        await self.__summarizer.close()
+        if self.__fallback_summarizer is not None:
+            await self.__fallback_summarizer.close()
+        self.__workers, self.__session, self.__started = [], None, False
+
+    @asynccontextmanager
+    async def __stage(self, stage: str):
+        stage_stats, semaphore = self.__stage_stats[stage], self.__stage_semaphores[stage]
+        stage_stats["waiting"] += 1
+        started = monotonic()
+        try:
+            await semaphore.acquire()
+        finally:
+            stage_stats["waiting"] -= 1
+        stage_stats["wait_total"] += monotonic() - started
+        stage_stats["calls"] += 1
+        stage_stats["in_flight"] += 1
+        started = monotonic()
+        try:
+            yield
+        except TimeoutError:
+            stage_stats["timeouts"] += 1
+            raise
+        except Exception:
+            stage_stats["failures"] += 1
+            raise
+        finally:
+            stage_stats["run_total"] += monotonic() - started
+            stage_stats["in_flight"] -= 1
+            semaphore.release()
+
+    async def __post_comments(self, url: str, comments_list: list[str], event: str,
+                              on_progress: Optional[Callable[[str, Any], None]]):
+        async with self.__session.post(url, json={"comments_list": comments_list}) as model_api_responce:
+            model_api_responce.raise_for_status()
+            result = await model_api_responce.json()
+        if on_progress is not None:
+            on_progress(event, result)
+        return result
+
+    @staticmethod
+    async def __stream_summary(summarizer: BaseSummarizer, article_text: str,
+                               on_progress: Callable[[str, Any], None], parts: list[str]) -> str:
+        async for delta in summarizer.stream_summary(article_text):
+            parts.append(delta)
+            on_progress("article_summary", delta)
+        return "".join(parts)
+
+    async def __run_summarizer(self, summarizer: BaseSummarizer, text: str,
+                               on_progress: Optional[Callable[[str, Any], None]], parts: list[str]) -> str:
+        llm_timeout = self.__stage_timeouts["llm"]
+        try:
+            async with timeout(llm_timeout):
+                if on_progress is not None:
+                    return await self.__stream_summary(summarizer, text, on_progress, parts)
+                return await summarizer.summarize_text(text)
+        except TimeoutError:
+            self.__stage_stats["llm"]["timeouts"] += 1
+            raise LLMUnavailableError(f"бэкенд {summarizer.name} не ответил за {llm_timeout} с") from None
+
+    async def __summarize(self, article_text: str, on_progress: Optional[Callable[[str, Any], None]],
+                          label: Optional[str]) -> str:
+        prepared_text, original_tokens, prepared_tokens = article_text, None, None
+        if self.__preprocessor is not None:
+            # Регулярные выражения по тексту большой статьи - заметная работа CPU, выносим её из event loop.
+            # Бэкенд, который суммаризирует по частям, получает статью целиком, а не с вырезанной серединой.
+            prepared = await to_thread(self.__preprocessor.prepare, article_text,
+                                       not self.__summarizer.splits_long_text)
+            prepared_text, original_tokens, prepared_tokens = prepared.text, prepared.original_tokens, prepared.tokens
+            self.__tokens["article"] += original_tokens
+            self.__tokens["prepared"] += prepared_tokens
+        started, parts = monotonic(), []
+        with track_token_usage() as usage:
+            try:
+                try:
+                    return await self.__run_summarizer(self.__summarizer, prepared_text, on_progress, parts)
+                except LLMUnavailableError as e:
+                    # Если начало резюме уже отдано клиентам, ответ запасного бэкенда дописался бы к нему.
+                    if self.__fallback_summarizer is None or parts:
+                        raise
+                    self.__fallbacks += 1
+                    logging.warning(f"Бэкенд {self.__summarizer.name} недоступен ({e}), суммаризация {label or 'статьи'} "
+                                    f"передана запасному бэкенду {self.__fallback_summarizer.name}.")
+                    return await self.__run_summarizer(self.__fallback_summarizer, prepared_text, on_progress, parts)
+            finally:
+                self.__tokens["prompt"] += usage.prompt_tokens
+                self.__tokens["completion"] += usage.completion_tokens
+                self.__tokens["requests"] += usage.requests
+                self.__tokens["cache_hits"] += usage.cache_hits
+                logging.info(
+                    f"Токены суммаризации {label or 'статьи'}: текст {original_tokens} -> {prepared_tokens} "
+                    f"после предобработки (оценка), {self.__summarizer.name}: запросов {usage.requests}, из кэша {usage.cache_hits}, на входе "
+                    f"{usage.prompt_tokens}, на выходе {usage.completion_tokens}, {monotonic() - started:.1f} с."
+                )
+
+    async def __get_summary(
+        self,
+        article_text: str,
+        comments_list: list[str],
+        on_progress: Optional[Callable[[str, Any], None]] = None,
+        label: Optional[str] = None
+    ) -> tuple[str, str]:
+        summarize = partial(self.__summarize, article_text, on_progress, label)
+        # Таймаут стадии llm действует в __run_summarizer на каждый бэкенд отдельно, чтобы по таймауту
+        # основного бэкенда статья досталась запасному, а без него завершилась ответом 503.
+        stages = [Stage("llm", summarize)]
+        if len(comments_list) > 5:
+            stages += [
+                Stage("sentiment", partial(self.__post_comments, self.__sentiment_url, comments_list, "analysis", on_progress),
+                      self.__stage_timeouts["sentiment"], required=False),
+                Stage("clustering", partial(self.__post_comments, self.__clustering_url, comments_list, "clusters", on_progress),
+                      self.__stage_timeouts["clustering"], required=False),
+            ]
+        results, errors = await run_stage_graph(stages, self.__stage)
+        article_summary: str = results["llm"]
+        if len(comments_list) > 5:
+            comments_result = {"analysis": results["sentiment"], "clusters": results["clustering"]}
+            if errors:
+                comments_result["errors"] = errors
+                self.__partial += 1
+            comments_result: str = dumps(comments_result, ensure_ascii=False)
+        else: 
+            comments_result: str = ""
+        return article_summary, comments_result
+
+    @staticmethod
+    def __cancel_abandoned(task: Task, future: Future):
+        if future.cancelled():
+            task.cancel()
 
     async def __worker(self, function: Callable):
         while True:
-            article_text, comments_text, future = await self.__queue.get()
+            article_text, comments_text, on_progress, label, future = await self.__scheduler.get()
+            self.__slots.release()
+            if future.done():
+                # Ожидавший результата запрос отменён, пока задача стояла в очереди.
+                self.__dropped += 1
+                continue
+            self.__busy_workers += 1
+            task = create_task(function(article_text, comments_text, on_progress, label))
+            future.add_done_callback(partial(self.__cancel_abandoned, task))
             try:
-                result = await function(article_text, comments_text)
-                future.set_result(result)
-            except Exception as e:
-                future.set_exception(e)
+                await wait((task,))
+            except CancelledError:
+                task.cancel()
+                raise
             finally:
-                self.__queue.task_done()
+                self.__busy_workers -= 1
+            if task.cancelled():
+                self.__cancelled += 1
+            elif task.exception() is not None:
+                if not future.done():
+                    future.set_exception(task.exception())
+                self.__failed += 1
+            else:
+                if not future.done():
+                    future.set_result(task.result())
+                self.__processed += 1
 
     async def is_available(self) -> bool:
-        return not self.__queue.full()
+        return not self.__slots.locked()
+
+    async def process_task(
+        self,
+        article_text: str,
+        comments_text: str,
+        priority: str = ANONYMOUS,
+        owner: Hashable = None,
+        on_progress: Optional[Callable[[str, Any], None]] = None,
+        label: Optional[str] = None
+    ) -> tuple[str, str]:
+        """
+        Ставит задачу суммаризации в очередь и дожидается результата.
 
-    async def process_task(self, article_text: str, comments_text: str) -> tuple[str, str]:
-        future = get_event_loop().create_future()
-        await self.__queue.put((article_text, comments_text, future))
+        :param article_text: Текст статьи.
+        :param comments_text: Список комментариев.
+        :param priority: Класс приоритета задачи (AUTHENTICATED, ANONYMOUS или PREFETCH).
+        :param owner: Владелец задачи для честного разделения очереди (например, id пользователя).
+        :param on_progress: Получатель промежуточных результатов: вызывается с типом события
+                            ('article_summary', 'analysis', 'clusters') и его данными.
+        :param label: Название задачи в логе (например, URL статьи).
+        :return: Резюме статьи и результат обработки комментариев.
+        """
+        future: Future = get_event_loop().create_future()
+        await self.__slots.acquire()
+        cost = max(1, len(article_text))
+        self.__scheduler.put((article_text, comments_text, on_progress, label, future), priority, owner, cost)
         try:
             result = await future
             return result
+        except LLMUnavailableError as e:
+            raise SummarizerUnavailable(f"Модель суммаризации недоступна: {e}.")
         except Exception as e:
             raise APIException(f"Program got some issues during summary: {e}", code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def stats(self) -> dict:
+        return {
+            "workers": len(self.__workers),
+            "busy_workers": self.__busy_workers,
+            "queued": self.__scheduler.qsize(),
+            "processed": self.__processed,
+            "failed": self.__failed,
+            "partial": self.__partial,
+            "dropped": self.__dropped,
+            "cancelled": self.__cancelled,
+            "tokens": dict(self.__tokens),
+            "summarizer": self.__summarizer.stats(),
+            "fallback_summarizer": self.__fallback_summarizer.stats() if self.__fallback_summarizer else None,
+            "fallbacks": self.__fallbacks,
+            "stages": {stage: {"limit": self.__stage_limits[stage], **stage_stats}
+                       for stage, stage_stats in self.__stage_stats.items()},
+            "priorities": self.__scheduler.stats(),
+        }
+
+
+TASK_QUEUE_SETTINGS = {
+    # Бэкенд суммаризации: 'deepseek' или 'local' (для 'local' стоит поднять workers и stage_limits['llm']
+    # до LOCAL_SUMMARIZER_SETTINGS['max_batch_size'], иначе батчи не заполнятся).
+    "summarizer": getenv('SUMMARIZER_BACKEND', 'deepseek'),
+    # Запасной бэкенд на время недоступности основного: '' (нет), 'deepseek' или 'local'.
+    "fallback_summarizer": getenv('SUMMARIZER_FALLBACK', ''),
+    "maxsize": 32,  # Максимальное количество задач, ожидающих свободного воркера.
+    "workers": 4,  # Количество задач, обрабатываемых одновременно.
+    "priority_weights": {
+        TaskQueue.AUTHENTICATED: 8,  # Задач авторизованных пользователей за один круг планировщика.
+        TaskQueue.ANONYMOUS: 4,  # Задач анонимных пользователей за один круг планировщика.
+        TaskQueue.PREFETCH: 1,  # Задач предзагрузки за один круг планировщика.
+    },
+    # Символов текста статей пользователя за один визит планировщика: больше типичной статьи Хабра
+    # (10-40 тыс. символов), чтобы она уходила в работу с первого визита, без холостых кругов.
+    "quantum": 50000,
+    "stage_limits": {
+        "llm": 4,  # Одновременные запросы к DeepSeek.
+        "sentiment": 2,  # Одновременные запросы к API анализа тональности.
+        "clustering": 2,  # Одновременные запросы к API кластеризации.
+    },
+    "stage_timeouts": {
+        # Таймаут суммаризации статьи каждым бэкендом (в секундах). Не меньше худшего случая одного запроса
+        # LLMClient: LLM_CLIENT_SETTINGS['timeout'] * (max_retries + 1) и паузы между попытками (~244 с).
+        "llm": 300,
+        "sentiment": 30,  # Таймаут анализа тональности комментариев (в секундах).
+        "clustering": 60,  # Таймаут кластеризации комментариев (в секундах).
+    },
+}
 
-task_queue = TaskQueue()
+task_queue = TaskQueue(
+    maxsize=TASK_QUEUE_SETTINGS['maxsize'],
+    workers=TASK_QUEUE_SETTINGS['workers'],
+    priority_weights=TASK_QUEUE_SETTINGS['priority_weights'],
+    quantum=TASK_QUEUE_SETTINGS['quantum'],
+    stage_limits=TASK_QUEUE_SETTINGS['stage_limits'],
+    stage_timeouts=TASK_QUEUE_SETTINGS['stage_timeouts'],
+    summarizer=get_summarizer(TASK_QUEUE_SETTINGS['summarizer']),
+    fallback_summarizer=get_summarizer(TASK_QUEUE_SETTINGS['fallback_summarizer'])
+    if TASK_QUEUE_SETTINGS['fallback_summarizer'] else None,
+)
@@ -1,3 +1,723 @@
-from django.test import TestCase
+import asyncio
+import importlib.util
+import os
+import sys
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+import httpx
+from asgiref.sync import sync_to_async
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.exceptions import Throttled
+from .admission import AdmissionController, admission_controller
+from .DeepSeekModel import DeepSeek
+from .http_cache import DiskHTTPCache
+from .habr_parser import HabrParseError, normalize_article_url, parser
+from .jobs import JOB_WORKER_SETTINGS, SummaryJobWorker, cancel_job
+from .llm_cache import LLMResponseCache
+from .llm_client import LLMClient, LLMUnavailableError
+from .models import LLMResponse, Summary, SummaryJob
+from .pipeline import Stage, run_stage_graph
+from .services import _content_hash, get_summary
+from .single_flight import SingleFlight
+from .summarizers import BaseSummarizer, LocalSummarizer
+from .task_queue import TASK_QUEUE_SETTINGS, FairScheduler, SummarizerUnavailable, TaskQueue
+from .text_preprocessing import TextPreprocessor
 
-# Create your tests here.
+
+ARTICLE_URL = 'https://habr.com/ru/articles/1/'
+
+
+class SingleFlightTests(SimpleTestCase):
+
+    async def test_concurrent_calls_with_same_key_share_one_call(self):
+        flights, release, calls = SingleFlight(), asyncio.Event(), []
+
+        async def work(url):
+            calls.append(url)
+            await release.wait()
+            return f'резюме {url}'
+
+        waiters = [asyncio.create_task(flights.run(ARTICLE_URL, work, ARTICLE_URL)) for _ in range(5)]
+        other = asyncio.create_task(flights.run('other', work, 'other'))
+        await asyncio.sleep(0)
+        release.set()
+        self.assertEqual(await asyncio.gather(*waiters), [f'резюме {ARTICLE_URL}'] * 5)
+        self.assertEqual(await other, 'резюме other')
+        self.assertEqual(sorted(calls), sorted([ARTICLE_URL, 'other']))
+        self.assertEqual(flights.stats(), {'in_flight': 0, 'calls': 6, 'shared': 4, 'cancelled': 0})
+
+    async def test_error_is_shared_and_next_call_runs_again(self):
+        flights, release, calls = SingleFlight(), asyncio.Event(), []
+
+        async def work():
+            calls.append(1)
+            await release.wait()
+            raise ValueError('статья не найдена')
+
+        waiters = [asyncio.create_task(flights.run('key', work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(len(calls), 1)
+        with self.assertRaises(ValueError):
+            await flights.run('key', work)  # Ошибка не закэширована: вызов выполняется заново
+        self.assertEqual(len(calls), 2)
+
+    async def test_shared_waiter_gets_result_after_other_waiter_is_cancelled(self):
+        flights, release, calls = SingleFlight(), asyncio.Event(), []
+
+        async def work():
+            calls.append(1)
+            await release.wait()
+            return 'резюме'
+
+        first = asyncio.create_task(flights.run('key', work))
+        second = asyncio.create_task(flights.run('key', work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        self.assertEqual(await second, 'резюме')
+        self.assertTrue(first.cancelled())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flights.stats()['shared'], 1)
+        self.assertEqual(flights.stats()['cancelled'], 0)
+
+    async def test_last_waiter_cancel_cancels_shared_call(self):
+        flights, started, work_cancelled = SingleFlight(), asyncio.Event(), asyncio.Event()
+
+        async def work():
+            started.set()
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                work_cancelled.set()
+                raise
+
+        waiter = asyncio.create_task(flights.run('key', work))
+        await started.wait()
+        waiter.cancel()
+        await asyncio.wait_for(work_cancelled.wait(), 1)
+        self.assertEqual(flights.stats()['cancelled'], 1)
+        await asyncio.sleep(0)
+        self.assertEqual(flights.stats()['in_flight'], 0)
+
+
+class FairSchedulerTests(SimpleTestCase):
+
+    async def get_all(self, scheduler: FairScheduler) -> list:
+        return [await scheduler.get() for _ in range(scheduler.qsize())]
+
+    async def test_owners_share_class_and_classes_follow_weights(self):
+        scheduler = FairScheduler({'authenticated': 2, 'prefetch': 1}, quantum=1)
+        for number in range(1, 4):
+            scheduler.put(f'user1-{number}', 'authenticated', owner='user:1')
+        scheduler.put('user2-1', 'authenticated', owner='user:2')
+        scheduler.put('prefetch-1', 'prefetch')
+        self.assertEqual(await self.get_all(scheduler),
+                         ['user1-1', 'user2-1', 'prefetch-1', 'user1-2', 'user1-3'])
+
+    async def test_expensive_task_waits_for_deficit(self):
+        scheduler = FairScheduler({'anonymous': 1}, quantum=2)
+        scheduler.put('long', 'anonymous', owner='ip:1', cost=4)
+        scheduler.put('short-1', 'anonymous', owner='ip:2', cost=1)
+        scheduler.put('short-2', 'anonymous', owner='ip:2', cost=1)
+        self.assertEqual(await self.get_all(scheduler), ['short-1', 'short-2', 'long'])
+
+    async def test_typical_article_fits_one_quantum(self):
+        # Стоимость задачи - длина статьи в символах: типичная статья уходит с первого визита к владельцу,
+        # а статья длиннее quantum ждёт, пока другие владельцы получат свою долю.
+        quantum = TASK_QUEUE_SETTINGS['quantum']
+        scheduler = FairScheduler({'anonymous': 1}, quantum=quantum)
+        scheduler.put('typical', 'anonymous', owner='ip:1', cost=30000)
+        scheduler.put('huge', 'anonymous', owner='ip:2', cost=2 * quantum)
+        scheduler.put('short-1', 'anonymous', owner='ip:3', cost=5000)
+        scheduler.put('short-2', 'anonymous', owner='ip:3', cost=5000)
+        self.assertEqual(await self.get_all(scheduler), ['typical', 'short-1', 'short-2', 'huge'])
+
+
+class LocalSummarizerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.summarizer = LocalSummarizer('model', max_batch_size=8, max_wait=0.01, max_input_tokens=100)
+        self.summarizer.model = object()  # Без torch: генерация подменяется в тестах
+        self.generated = []
+
+    def generate(self, texts: list[str]) -> list[str]:
+        self.generated.append(texts)
+        return [f'резюме {len(text)}' for text in texts]
+
+    async def test_long_article_is_summarized_in_parts(self):
+        paragraphs = '\n\n'.join(f'Абзац {number}. ' + 'слово ' * 40 for number in range(5))
+        try:
+            with mock.patch.object(self.summarizer, '_generate', side_effect=self.generate):
+                summary = await self.summarizer.summarize_text(paragraphs)
+        finally:
+            await self.summarizer.close()
+        self.assertEqual(len(self.generated), 2)  # Части статьи - одним батчем, затем резюме частей
+        self.assertGreater(len(self.generated[0]), 1)
+        self.assertTrue(all(len(text) <= 300 for text in self.generated[0]))
+        self.assertEqual(self.generated[1], ['\n\n'.join(f'резюме {len(text)}' for text in self.generated[0])])
+        self.assertEqual(summary, f'резюме {len(self.generated[1][0])}')
+        self.assertEqual(self.summarizer.stats()['chunked'], 1)
+
+    async def test_task_queue_close_closes_summarizer_and_start_reopens_it(self):
+        fallback = LocalSummarizer('fallback')
+        fallback.model = object()
+        queue = TaskQueue(workers=1, summarizer=self.summarizer, fallback_summarizer=fallback)
+        await queue.start()
+        await queue.close()
+        self.assertIsNone(self.summarizer._executor)
+        self.assertIsNone(fallback._executor)
+        try:
+            with mock.patch.object(self.summarizer, '_generate', side_effect=self.generate):
+                summary = await self.summarizer.summarize_text('Короткая статья.')
+        finally:
+            await self.summarizer.close()
+        self.assertEqual(summary, f'резюме {len("Короткая статья.")}')
+
+
+class DiskHTTPCacheTests(SimpleTestCase):
+
+    async def store(self, cache: DiskHTTPCache, url: str, etag: str, body: bytes) -> None:
+        async def chunks():
+            yield body
+
+        async for _ in cache.store_stream(url, {'ETag': etag}, 'utf-8', chunks()):
+            pass
+
+    async def test_failed_metadata_write_keeps_previous_entry(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = DiskHTTPCache(directory, max_size=1024)
+            url = 'https://habr.com/ru/articles/1/'
+            await self.store(cache, url, '"v1"', b'old')
+            with mock.patch('api.http_cache.json.dump', side_effect=OSError('диск заполнен')):
+                with self.assertRaises(OSError):
+                    await self.store(cache, url, '"v2"', b'new')
+            entry = await cache.lookup(url)
+            self.assertEqual(entry.etag, '"v1"')  # Старые метаданные не перезаписаны наполовину
+            self.assertEqual([path for path in os.listdir(directory) if path.endswith('.tmp')], [])
+
+
+SENTIMENT_BATCHER_PATH = Path(__file__).resolve().parents[2] / 'SentimentAnalyzerModelAPI' / 'SentimentBatcher.py'
+
+
+class FakeSentimentAnalyzer:
+    """
+    Анализатор тональности без модели: метка - сам текст комментария.
+    """
+
+    def __init__(self):
+        self.passes = []
+
+    def predict_labels(self, texts: list) -> list:
+        self.passes.append(list(texts))
+        return list(texts)
+
+    @staticmethod
+    def count_labels(labels: list) -> dict:
+        return {label: labels.count(label) for label in ('negative', 'neutral', 'positive')}
+
+
+@skipUnless(SENTIMENT_BATCHER_PATH.exists(), 'сервис анализа тональности не входит в этот образ')
+class SentimentBatcherTests(SimpleTestCase):
+
+    def setUp(self):
+        # Модуль сервиса анализа тональности загружается без torch: модель подменена FakeSentimentAnalyzer.
+        model_module = SimpleNamespace(SentimentAnalyzer=FakeSentimentAnalyzer,
+                                       sentiment_analyzer_model=FakeSentimentAnalyzer())
+        spec = importlib.util.spec_from_file_location('sentiment_batcher_under_test', SENTIMENT_BATCHER_PATH)
+        module = importlib.util.module_from_spec(spec)
+        with mock.patch.dict(sys.modules, {'SentimentAnalyzerModel': model_module}):
+            spec.loader.exec_module(module)
+        self.analyzer = FakeSentimentAnalyzer()
+        self.batcher = module.SentimentBatcher(self.analyzer, max_batch_size=4, max_wait=0.05)
+
+    async def test_request_that_does_not_fit_is_carried_to_next_batch(self):
+        requests = [['positive'] * 3, ['negative'] * 2, ['neutral']]
+        try:
+            results = await asyncio.gather(*(self.batcher.get_sentiment_distribution(texts) for texts in requests))
+        finally:
+            await self.batcher.close()
+        self.assertEqual(results, [self.analyzer.count_labels(texts) for texts in requests])
+        # Второй запрос не влез в первый батч (3 + 2 > 4) и ушёл первым во втором, вместе с третьим.
+        self.assertEqual(self.analyzer.passes, [['positive'] * 3, ['neutral', 'negative', 'negative']])
+        self.assertEqual(self.batcher.stats()['batches'], 2)
+
+    async def test_request_larger_than_batch_is_split_into_passes(self):
+        texts = ['positive'] * 5 + ['negative']
+        try:
+            result = await self.batcher.get_sentiment_distribution(texts)
+        finally:
+            await self.batcher.close()
+        self.assertEqual(result, {'negative': 1, 'neutral': 0, 'positive': 5})
+        self.assertEqual([len(texts) for texts in self.analyzer.passes], [4, 2])
+        self.assertEqual(self.batcher.stats()['batches'], 1)
+
+
+class BrokenStream:
+    """
+    Поток ответа LLM, соединение которого обрывается после первого куска.
+    """
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def __aiter__(self):
+        yield 'начало'
+        raise httpx.ReadError('соединение разорвано')
+
+
+class LLMClientTests(SimpleTestCase):
+
+    async def test_broken_stream_is_recorded_and_unavailable(self):
+        client = LLMClient('key', 'http://llm.invalid', failure_threshold=1)
+        try:
+            with mock.patch.object(client, '_create', new=mock.AsyncMock(return_value=BrokenStream())):
+                with self.assertRaises(LLMUnavailableError):
+                    async with client.stream(model='model', messages=[]) as stream:
+                        async for _ in stream:
+                            pass
+        finally:
+            await client.close()
+        self.assertEqual(client.failures, 1)
+        self.assertEqual(client.breaker.state, client.breaker.OPEN)
+        self.assertEqual(client.in_flight, 0)
+
+
+class SlowSummarizer(BaseSummarizer):
+    name = 'slow'
+
+    async def summarize_text(self, text: str) -> str:
+        await asyncio.Event().wait()
+
+
+class FixedSummarizer(BaseSummarizer):
+    name = 'fixed'
+
+    async def summarize_text(self, text: str) -> str:
+        return 'резюме запасного бэкенда'
+
+
+class SummarizerTimeoutTests(SimpleTestCase):
+
+    async def process(self, fallback_summarizer=None) -> tuple[str, str]:
+        queue = TaskQueue(workers=1, stage_timeouts={'llm': 0.05}, summarizer=SlowSummarizer(), preprocessor=None,
+                          fallback_summarizer=fallback_summarizer)
+        await queue.start()
+        try:
+            return await queue.process_task('Текст статьи.', [])
+        finally:
+            await queue.close()
+
+    async def test_llm_timeout_falls_back(self):
+        self.assertEqual(await self.process(FixedSummarizer()), ('резюме запасного бэкенда', ''))
+
+    async def test_llm_timeout_without_fallback_is_unavailable(self):
+        with self.assertRaises(SummarizerUnavailable):
+            await self.process()
+
+
+class StageGraphTests(SimpleTestCase):
+
+    @staticmethod
+    async def hang(*results):
+        await asyncio.Event().wait()
+
+    async def test_optional_stage_timeout_skips_dependents_only(self):
+        async def article():
+            return 'резюме'
+
+        async def sentiment():
+            await asyncio.Event().wait()
+
+        async def clustering(sentiments):
+            raise AssertionError('стадия не должна запускаться')
+
+        results, errors = await run_stage_graph([
+            Stage('article', article),
+            Stage('sentiment', sentiment, timeout=0.01, required=False),
+            Stage('clustering', clustering, required=False, depends_on=('sentiment',)),
+        ])
+        self.assertEqual(results, {'article': 'резюме', 'sentiment': None, 'clustering': None})
+        self.assertEqual(set(errors), {'sentiment', 'clustering'})
+        self.assertIn('Таймаут', errors['sentiment'])
+
+    async def test_optional_stage_error_is_reported(self):
+        async def sentiment():
+            raise ValueError('сервис вернул 500')
+
+        results, errors = await run_stage_graph([Stage('sentiment', sentiment, required=False)])
+        self.assertEqual(results, {'sentiment': None})
+        self.assertEqual(errors, {'sentiment': 'ValueError: сервис вернул 500'})
+
+    async def test_required_stage_timeout_cancels_other_stages(self):
+        other_cancelled = asyncio.Event()
+
+        async def other():
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                other_cancelled.set()
+                raise
+
+        with self.assertRaises(TimeoutError):
+            await run_stage_graph([
+                Stage('article', self.hang, timeout=0.01),
+                Stage('sentiment', other, required=False),
+            ])
+        self.assertTrue(other_cancelled.is_set())
+
+    async def test_independent_stages_run_concurrently(self):
+        both_started = asyncio.Barrier(2)
+
+        async def stage(name):
+            await both_started.wait()  # Последовательное выполнение здесь упёрлось бы в таймаут
+            return name
+
+        results, errors = await run_stage_graph([
+            Stage('first', lambda: stage('first'), timeout=1),
+            Stage('second', lambda: stage('second'), timeout=1),
+            Stage('third', lambda first, second: asyncio.sleep(0, f'{first}+{second}'), depends_on=('first', 'second')),
+        ])
+        self.assertEqual(results, {'first': 'first', 'second': 'second', 'third': 'first+second'})
+        self.assertEqual(errors, {})
+
+
+class MapReduceTests(SimpleTestCase):
+
+    async def test_article_longer_than_preprocessing_budget_is_map_reduced(self):
+        model = DeepSeek(api_key='key', base_url='http://llm.invalid', chunk_tokens=100)
+        prompts = []
+
+        async def complete(messages, max_tokens, **kwargs):
+            prompts.append(messages[-1]['content'])
+            return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=SimpleNamespace(
+                content=f'резюме {len(prompts)}'))])
+
+        model.client = SimpleNamespace(complete=complete, is_closed=lambda: False, close=mock.AsyncMock(), stats=dict)
+        queue = TaskQueue(workers=1, summarizer=model, preprocessor=TextPreprocessor(max_tokens=200))
+        paragraphs = [f'Абзац {number}: ' + 'сервис обрабатывает запросы асинхронно. ' * 3 for number in range(12)]
+        await queue.start()
+        try:
+            summary, _ = await queue.process_task('\n'.join(paragraphs), [])
+        finally:
+            await queue.close()
+        chunk_prompts = [prompt for prompt in prompts if 'часть' in prompt.split('\n')[0]]
+        self.assertGreater(len(chunk_prompts), 2)
+        self.assertEqual(len(prompts), len(chunk_prompts) + 1)  # Части, затем одно объединение
+        # Середина статьи не вырезана предобработкой, а попала в одну из частей.
+        self.assertTrue(any(paragraphs[6].strip() in prompt for prompt in chunk_prompts))
+        self.assertEqual(summary, f'резюме {len(prompts)}')
+
+
+class LLMResponseCacheTests(TestCase):
+    messages = [{'role': 'system', 'content': 'Кратко перескажи статью.'}, {'role': 'user', 'content': 'Текст.'}]
+
+    def setUp(self):
+        self.cache = LLMResponseCache(ttl=60, max_size=1024)
+
+    def test_key_is_stable_and_covers_request_parameters(self):
+        key = self.cache.key('deepseek-chat', 0.3, 500, self.messages)
+        reordered = [dict(reversed(message.items())) for message in self.messages]
+        self.assertEqual(key, self.cache.key('deepseek-chat', 0.3, 500, reordered))
+        self.assertEqual(key, LLMResponseCache.key('deepseek-chat', 0.3, 500, self.messages))  # SHA-256, а не hash(): одинаков во всех процессах
+        self.assertEqual(len({
+            key,
+            self.cache.key('deepseek-reasoner', 0.3, 500, self.messages),
+            self.cache.key('deepseek-chat', 0.7, 500, self.messages),
+            self.cache.key('deepseek-chat', 0.3, 100, self.messages),
+            self.cache.key('deepseek-chat', 0.3, 500, self.messages[1:]),
+        }), 5)
+
+    async def test_stored_response_is_returned_until_it_expires(self):
+        key = self.cache.key('deepseek-chat', 0.3, 500, self.messages)
+        await self.cache.set(key, 'deepseek-chat', 'резюме', SimpleNamespace(prompt_tokens=20, completion_tokens=5))
+        self.assertEqual(await self.cache.get(key), 'резюме')
+        self.assertEqual(self.cache.stats()['tokens_saved'], 25)
+        await LLMResponse.objects.filter(key=key).aupdate(created_at=timezone.now() - timedelta(seconds=61))
+        self.assertIsNone(await self.cache.get(key))
+        self.assertFalse(await LLMResponse.objects.filter(key=key).aexists())
+        self.assertEqual(self.cache.stats()['expired'], 1)
+
+    async def test_repeated_request_does_not_reach_api(self):
+        model = DeepSeek(api_key='key', base_url='http://llm.invalid', cache=self.cache)
+        await model.client.close()
+        complete = mock.AsyncMock(return_value=SimpleNamespace(usage=None, choices=[
+            SimpleNamespace(message=SimpleNamespace(content='резюме'))]))
+        model.client = SimpleNamespace(complete=complete, close=mock.AsyncMock())
+        self.assertEqual(await model.summarize_text('Текст статьи.'), 'резюме')
+        self.assertEqual(await model.summarize_text('Текст статьи.'), 'резюме')
+        complete.assert_awaited_once()
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+
+class SummaryReuseTests(TestCase):
+    article = {'title': 'Статья', 'text': 'Текст статьи.'}
+
+    async def create_summary(self, comments: list[str]) -> Summary:
+        return await Summary.objects.acreate(
+            url=normalize_article_url(ARTICLE_URL), text_hash=_content_hash(self.article['text'], comments),
+            title='Статья', article_summary='прежнее резюме', comments_summary='',
+            checked_at=timezone.now() - timedelta(days=2)
+        )
+
+    def test_content_hash_is_stable_and_separates_comments(self):
+        self.assertEqual(_content_hash('текст', ['a', 'b']), _content_hash('текст', ['a', 'b']))
+        self.assertEqual(_content_hash('текст', None), _content_hash('текст', []))
+        self.assertNotEqual(_content_hash('текст', ['ab']), _content_hash('текст', ['a', 'b']))
+        self.assertNotEqual(_content_hash('текст', ['a']), _content_hash('текст', ['a', 'a']))
+
+    async def test_unchanged_article_reuses_summary_without_models(self):
+        stored = await self.create_summary(['комментарий'])
+        with mock.patch.object(parser, 'parsing_article', return_value=(self.article, ['комментарий'])) as parsing, \
+                mock.patch('api.services.task_queue.process_task') as process_task:
+            summary = await get_summary(ARTICLE_URL)
+        parsing.assert_awaited_once()
+        process_task.assert_not_called()
+        self.assertEqual(summary.pk, stored.pk)
+        await stored.arefresh_from_db()
+        self.assertGreater(stored.checked_at, timezone.now() - timedelta(minutes=1))
+
+    async def test_new_comment_creates_new_summary(self):
+        stored = await self.create_summary(['комментарий'])
+        with mock.patch.object(parser, 'parsing_article',
+                               return_value=(self.article, ['комментарий', 'новый комментарий'])), \
+                mock.patch('api.services.task_queue.process_task',
+                           return_value=('новое резюме', '{}')) as process_task:
+            summary = await get_summary(ARTICLE_URL)
+        process_task.assert_awaited_once()
+        self.assertNotEqual(summary.pk, stored.pk)
+        self.assertEqual(summary.article_summary, 'новое резюме')
+        self.assertEqual(await Summary.objects.acount(), 2)
+
+
+class SummaryJobWorkerTests(TestCase):
+
+    def setUp(self):
+        self.worker = SummaryJobWorker(concurrency=1, poll_interval=0.05, lease_time=60, max_attempts=3)
+
+    async def claim(self) -> SummaryJob:
+        return await sync_to_async(self.worker._claim_job)()
+
+    async def start_processing(self, job: SummaryJob) -> asyncio.Task:
+        processing = asyncio.create_task(self.worker._process(job))
+        while job.id not in self.worker._running:
+            await asyncio.sleep(0)
+        return processing
+
+    async def test_expired_queued_job_is_dropped(self):
+        expired = await SummaryJob.objects.acreate(url=ARTICLE_URL, deadline=timezone.now() - timedelta(seconds=1))
+        queued = await SummaryJob.objects.acreate(url=ARTICLE_URL)
+        self.assertEqual((await self.claim()).id, queued.id)
+        await expired.arefresh_from_db()
+        self.assertEqual(expired.status, SummaryJob.CANCELLED)
+        self.assertEqual(expired.attempts, 0)
+        self.assertEqual(self.worker.stats()['expired'], 1)
+
+    async def test_prefetch_job_is_claimed_after_user_jobs(self):
+        await SummaryJob.objects.acreate(url=ARTICLE_URL, priority='prefetch')
+        user_job = await SummaryJob.objects.acreate(url=ARTICLE_URL, priority='anonymous', owner='ip:127.0.0.1')
+        self.assertEqual((await self.claim()).id, user_job.id)
+
+    @mock.patch('api.jobs.get_summary', new=lambda *args: asyncio.Event().wait())
+    async def test_worker_shutdown_requeues_job(self):
+        await SummaryJob.objects.acreate(url=ARTICLE_URL)
+        job = await self.claim()
+        processing = await self.start_processing(job)
+        processing.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await processing
+        await job.arefresh_from_db()
+        self.assertEqual(job.status, SummaryJob.QUEUED)
+        self.assertEqual(job.attempts, 0)
+        self.assertEqual(self.worker.stats()['cancelled'], 0)
+
+    @mock.patch('api.jobs.get_summary', new=lambda *args: asyncio.Event().wait())
+    async def test_client_disconnect_cancels_job(self):
+        await SummaryJob.objects.acreate(url=ARTICLE_URL)
+        job = await self.claim()
+        processing = await self.start_processing(job)
+        self.assertTrue(await cancel_job(job, "Клиент отключился, не дождавшись результата."))
+        self.worker.cancel(job.id)
+        await processing
+        await job.arefresh_from_db()
+        self.assertEqual(job.status, SummaryJob.CANCELLED)
+        self.assertEqual(self.worker.stats()['cancelled'], 1)
+
+    @mock.patch('api.jobs.get_summary', new=lambda *args: asyncio.Event().wait())
+    async def test_running_job_is_interrupted_at_deadline(self):
+        await SummaryJob.objects.acreate(url=ARTICLE_URL, deadline=timezone.now() + timedelta(seconds=0.2))
+        job = await self.claim()
+        await asyncio.wait_for(self.worker._process(job), 5)
+        await job.arefresh_from_db()
+        self.assertEqual(job.status, SummaryJob.CANCELLED)
+        self.assertEqual(self.worker.stats()['expired'], 1)
+
+
+class SummaryJobLeaseTests(TestCase):
+
+    async def claim(self, worker: SummaryJobWorker) -> SummaryJob:
+        await SummaryJob.objects.acreate(url=ARTICLE_URL)
+        return await sync_to_async(worker._claim_job)()
+
+    async def take_over(self, job: SummaryJob) -> None:
+        # Аренда истекла, и задачу забрал другой воркер.
+        await SummaryJob.objects.filter(pk=job.pk).aupdate(attempts=job.attempts + 1)
+
+    @mock.patch('api.jobs.get_summary', new=lambda *args: asyncio.Event().wait())
+    async def test_lease_is_renewed_while_job_runs(self):
+        worker = SummaryJobWorker(concurrency=1, poll_interval=0.05, lease_time=0.15, max_attempts=3)
+        job = await self.claim(worker)
+        processing = asyncio.create_task(worker._process(job))
+        await asyncio.sleep(0.3)
+        self.assertFalse(processing.done())
+        self.assertIsNone(await sync_to_async(worker._claim_job)())
+        processing.cancel()
+        await asyncio.gather(processing, return_exceptions=True)
+
+    @mock.patch('api.jobs.get_summary', new=lambda *args: asyncio.Event().wait())
+    async def test_worker_that_lost_lease_stops(self):
+        worker = SummaryJobWorker(concurrency=1, poll_interval=0.05, lease_time=0.06, max_attempts=3)
+        job = await self.claim(worker)
+        await self.take_over(job)
+        await asyncio.wait_for(worker._process(job), 5)
+        self.assertEqual(worker.stats()['cancelled'], 1)
+
+    async def test_stale_worker_does_not_overwrite_result(self):
+        worker = SummaryJobWorker(concurrency=1, poll_interval=0.05, lease_time=60, max_attempts=3)
+        job = await self.claim(worker)
+        summary = await Summary.objects.acreate(url=ARTICLE_URL, text_hash='0' * 64, title='Статья',
+                                                article_summary='резюме', comments_summary='',
+                                                checked_at=timezone.now())
+
+        async def get_summary(*args):
+            await self.take_over(job)
+            return summary
+
+        with mock.patch('api.jobs.get_summary', new=get_summary):
+            await worker._process(job)
+        await job.arefresh_from_db()
+        self.assertEqual(job.status, SummaryJob.RUNNING)
+        self.assertIsNone(job.summary_id)
+        self.assertEqual(worker.stats()['processed'], 0)
+
+
+class ParserCancellationTests(TestCase):
+
+    def setUp(self):
+        for patch in (mock.patch.object(parser, '_get_session', new=mock.AsyncMock()),
+                      mock.patch.object(parser, '_iter_comments', new=self.hang_comments)):
+            patch.start()
+        self.addCleanup(mock.patch.stopall)
+
+    async def hang(self, *args):
+        await asyncio.Event().wait()
+
+    async def hang_comments(self, *args):
+        await asyncio.Event().wait()
+        yield 'комментарий'
+
+    async def test_cancellation_during_parsing_article_propagates(self):
+        with mock.patch.object(parser, '_extract', new=self.hang):
+            parsing = asyncio.create_task(parser.parsing_article(ARTICLE_URL))
+            await asyncio.sleep(0.01)
+            parsing.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await parsing
+
+    async def test_timeout_during_parsing_article_is_parse_error(self):
+        with mock.patch.object(parser, '_extract', new=mock.AsyncMock(side_effect=asyncio.TimeoutError)):
+            with self.assertRaises(HabrParseError):
+                await parser.parsing_article(ARTICLE_URL)
+
+    async def test_deadline_during_parsing_cancels_job(self):
+        worker = SummaryJobWorker(concurrency=1, poll_interval=0.05, lease_time=60, max_attempts=3)
+        await SummaryJob.objects.acreate(url=ARTICLE_URL, deadline=timezone.now() + timedelta(seconds=0.2))
+        job = await sync_to_async(worker._claim_job)()
+        with mock.patch.object(parser, '_extract', new=self.hang):
+            await asyncio.wait_for(worker._process(job), 5)
+        await job.arefresh_from_db()
+        self.assertEqual(job.status, SummaryJob.CANCELLED)
+
+
+class AdmissionTests(TestCase):
+
+    async def test_full_queue_is_rejected_with_retry_after(self):
+        controller = AdmissionController(max_depth=2, default_job_time=30)
+        await controller.submit(ARTICLE_URL)
+        running = await controller.submit(ARTICLE_URL)
+        await SummaryJob.objects.filter(pk=running.pk).aupdate(status=SummaryJob.RUNNING)
+        with self.assertRaises(Throttled) as rejected:
+            await controller.submit(ARTICLE_URL)
+        self.assertEqual(rejected.exception.wait, 30)  # Место освободится, когда завершится выполняемая задача
+        self.assertEqual(await SummaryJob.objects.acount(), 2)
+        self.assertEqual(controller.stats(), {'admitted': 2, 'rejected': 1})
+
+    async def test_count_and_insert_run_under_advisory_lock_on_postgresql(self):
+        controller = AdmissionController(max_depth=2, default_job_time=30, lock_id=42)
+        postgresql = mock.MagicMock(vendor='postgresql')
+        with mock.patch('api.admission.connection', postgresql):
+            await controller.submit(ARTICLE_URL)
+        cursor = postgresql.cursor.return_value.__enter__.return_value
+        cursor.execute.assert_called_once_with("SELECT pg_advisory_xact_lock(%s)", [42])
+
+    async def test_create_returns_429_with_retry_after_when_queue_is_full(self):
+        await SummaryJob.objects.acreate(url=ARTICLE_URL)
+        with mock.patch.object(admission_controller, 'max_depth', 1):
+            response = await self.async_client.post('/api/v1/create/', {'url': ARTICLE_URL},
+                                                    content_type='application/json')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(await SummaryJob.objects.acount(), 1)
+
+
+class RequestDeadlineTests(TestCase):
+
+    async def test_create_returns_504_when_deadline_passes(self):
+        with mock.patch.dict(JOB_WORKER_SETTINGS, request_deadline=0):
+            response = await self.async_client.post('/api/v1/create/', {'url': ARTICLE_URL},
+                                                    content_type='application/json')
+        self.assertEqual(response.status_code, 504)
+        job = await SummaryJob.objects.aget(url=ARTICLE_URL)
+        self.assertEqual(job.status, SummaryJob.CANCELLED)
+
+
+class EventStreamTests(TestCase):
+    accept_event_stream = {'accept': 'text/event-stream'}
+
+    async def first_event(self, response) -> bytes:
+        events = aiter(response.streaming_content)
+        try:
+            return await anext(events)
+        finally:
+            await events.aclose()
+
+    async def test_stream_accepts_event_stream(self):
+        response = await self.async_client.post('/api/v1/stream/', {'url': ARTICLE_URL},
+                                                content_type='application/json', headers=self.accept_event_stream)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertTrue((await self.first_event(response)).startswith(b'event: status\n'))
+        self.assertTrue(await SummaryJob.objects.filter(url=ARTICLE_URL).aexists())
+
+    async def test_job_events_accept_event_stream(self):
+        job = await SummaryJob.objects.acreate(url=ARTICLE_URL)
+        response = await self.async_client.get(f'/api/v1/jobs/{job.id}/events/', headers=self.accept_event_stream)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertTrue((await self.first_event(response)).startswith(b'event: status\n'))
+
+    async def test_stream_validation_error_is_an_event(self):
+        response = await self.async_client.post('/api/v1/stream/', {'url': 'https://example.com/'},
+                                                content_type='application/json', headers=self.accept_event_stream)
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.content.startswith(b'event: error\ndata: {"url"'))
@@ -0,0 +1,236 @@
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
+from .chunking import estimate_tokens
+
+
+UNICODE_SPACES_PATTERN = re.compile(r'[\u00a0\u2000-\u200b\u202f\u205f\u3000\ufeff]')
+SPACES_PATTERN = re.compile(r'[ \t]+')
+CYRILLIC_PATTERN = re.compile(r'[а-яё]', re.IGNORECASE)
+# Строки кода: отступ, скобки в начале или в конце строки, ключевые слова в начале строки.
+CODE_LINE_PATTERN = re.compile(
+    r'^(?: {2,}|\t)|^\s*(?:#|//|/\*|\*/|[}\])])|[{}]\s*[,;]?\s*$|\)\s*;\s*$'
+    r'|^\s*(?:import|from \S+ import|def|class|return|#include|package|using|const|let|var|func|fn|public|private'
+    r'|SELECT|INSERT|UPDATE|DELETE|CREATE)\b'
+)
+CODE_COMMENT_PATTERN = re.compile(r'^\s*(?:#|//|/\*|\*)')
+# get_text(separator='\n') разрывает абзац на строчных тегах (<strong>, <a>, <code>): такой кусок
+# начинается со знака препинания или с пробела, либо предыдущий кусок заканчивается пробелом.
+INLINE_CONTINUATION_PATTERN = re.compile(r'^(?:[.,;:!?)»%…]| (?! ))')
+BOILERPLATE_PATTERNS = (
+    r'^(?:рис(?:унок)?|изображение|иллюстрация|фото|скриншот|источник|image|figure|fig)\.?\s*\d*\s*[.:—-]',
+    r'^(?:скрытый текст|hidden text|читать далее|показать полностью|спойлер)$',
+    r'^(?:https?://|www\.)\S+$',
+    r'(?:делитесь|пишите|расскажите|поделитесь)[^.!?]*в\s+комментариях',
+    r'подписывайтесь|подпишитесь|нашем (?:telegram|телеграм)',
+    r'^спасибо за (?:внимание|прочтение)',
+)
+
+
+@dataclass
+class PreparedText:
+    """
+    Текст статьи после предобработки.
+    """
+    text: str
+    tokens: int  # Оценка токенов текста после предобработки
+    original_tokens: int  # Оценка токенов исходного текста
+    code_lines_dropped: int = 0
+    boilerplate_lines_dropped: int = 0
+    truncated: bool = False
+
+
+class TextPreprocessor:
+
+    def __init__(
+        self,
+        max_code_lines: int = 10,
+        max_tokens: Optional[int] = 40000,
+        tail_share: float = 0.2,
+        boilerplate_patterns: tuple[str, ...] = BOILERPLATE_PATTERNS
+    ) -> None:
+        """
+        Предобработка текста статьи перед суммаризацией.
+
+        Текст статьи приходит из get_text(separator='\\n') и содержит лишние пробелы,
+        разорванные строчными тегами абзацы, листинги кода, подписи к картинкам и
+        призывы подписаться. Всё это оплачивается как входные токены и удлиняет ответ
+        DeepSeek, но не нужно для резюме. Предобработка:
+            - заменяет неразрывные и прочие юникодные пробелы обычными, схлопывает пробелы;
+            - склеивает куски абзацев, разорванные строчными тегами;
+            - удаляет служебные строки (подписи к рисункам, "Читать далее", голые ссылки,
+              призывы писать в комментариях и подписываться);
+            - оставляет от листинга кода первые max_code_lines строк;
+            - ограничивает текст бюджетом max_tokens токенов: сохраняются начало статьи и
+              её конец (доля tail_share бюджета), где обычно находятся выводы.
+
+        :param max_code_lines: Сколько строк листинга кода оставлять.
+        :param max_tokens: Бюджет входных токенов на статью (None - без ограничения).
+        :param tail_share: Доля бюджета, отдаваемая концу статьи при сокращении.
+        :param boilerplate_patterns: Регулярные выражения служебных строк (без учёта регистра).
+        """
+        self.max_code_lines = max_code_lines
+        self.max_tokens = max_tokens
+        self.tail_share = tail_share
+        self.boilerplate_pattern = re.compile('|'.join(f'(?:{pattern})' for pattern in boilerplate_patterns),
+                                              re.IGNORECASE)
+
+    @staticmethod
+    def _is_code_line(line: str) -> bool:
+        if not CODE_LINE_PATTERN.search(line):
+            return False
+        # Русский текст - признак прозы, если это не комментарий в коде и не строка с отступом.
+        return not CYRILLIC_PATTERN.search(line) or line.startswith(('  ', '\t')) or bool(CODE_COMMENT_PATTERN.match(line))
+
+    def _join_inline_fragments(self, lines: list[str], is_code: list[bool]) -> tuple[list[str], list[bool]]:
+        joined_lines, joined_is_code = [], []
+        for line, code in zip(lines, is_code):
+            if (joined_lines and not code and not joined_is_code[-1] and joined_lines[-1]
+                    and (joined_lines[-1].endswith(' ') or INLINE_CONTINUATION_PATTERN.match(line))):
+                joined_lines[-1] += line
+            else:
+                joined_lines.append(line)
+                joined_is_code.append(code)
+        return joined_lines, joined_is_code
+
+    def _collapse_code(self, lines: list[str], is_code: list[bool]) -> tuple[list[str], int]:
+        # Листинг - подряд идущие строки кода, пустые строки внутри листинга к нему относятся.
+        result, dropped, index = [], 0, 0
+        while index < len(lines):
+            if not is_code[index]:
+                result.append(lines[index])
+                index += 1
+                continue
+            end = index
+            while end < len(lines) and (is_code[end] or not lines[end].strip()):
+                end += 1
+            listing = [line for line in lines[index:end] if line.strip()]
+            result.extend(listing[:self.max_code_lines])
+            if len(listing) > self.max_code_lines:
+                dropped += len(listing) - self.max_code_lines
+                result.append(f"[… пропущено строк кода: {len(listing) - self.max_code_lines}]")
+            index = end
+        return result, dropped
+
+    def _truncate(self, paragraphs: list[str]) -> list[str]:
+        tail_budget = int(self.max_tokens * self.tail_share)
+        tail, tail_tokens = [], 0
+        for paragraph in reversed(paragraphs):
+            tokens = estimate_tokens(paragraph) + 1
+            if tail_tokens + tokens > tail_budget:
+                break
+            tail.append(paragraph)
+            tail_tokens += tokens
+        head, head_tokens = [], 0
+        for paragraph in paragraphs[:len(paragraphs) - len(tail)]:
+            tokens = estimate_tokens(paragraph) + 1
+            if head_tokens + tokens > self.max_tokens - tail_tokens:
+                break
+            head.append(paragraph)
+            head_tokens += tokens
+        return head + ["[… часть статьи пропущена]"] + tail[::-1]
+
+    def prepare(self, text: str, truncate: bool = True) -> PreparedText:
+        """
+        Готовит текст статьи к отправке в модель суммаризации.
+
+        :param text: Текст статьи (абзацы разделены переводом строки).
+        :param truncate: Сокращать ли текст до бюджета max_tokens. Бэкенду, который сам суммаризирует
+                         длинный текст по частям (BaseSummarizer.splits_long_text), текст передаётся целиком.
+        :return: Подготовленный текст и оценки количества токенов до и после.
+        """
+        original_tokens = estimate_tokens(text)
+        lines = UNICODE_SPACES_PATTERN.sub(' ', text.replace('\r\n', '\n')).split('\n')
+        lines, is_code = self._join_inline_fragments(lines, [self._is_code_line(line) for line in lines])
+        kept_lines, kept_is_code, boilerplate_dropped = [], [], 0
+        for line, code in zip(lines, is_code):
+            if not code and self.boilerplate_pattern.search(line.strip()):
+                boilerplate_dropped += 1
+                continue
+            kept_lines.append(line)
+            kept_is_code.append(code)
+        lines, code_dropped = self._collapse_code(kept_lines, kept_is_code)
+        paragraphs = [paragraph for line in lines if (paragraph := SPACES_PATTERN.sub(' ', line).strip())]
+        prepared_text, truncated = '\n'.join(paragraphs), False
+        if truncate and self.max_tokens is not None and estimate_tokens(prepared_text) > self.max_tokens:
+            prepared_text, truncated = '\n'.join(self._truncate(paragraphs)), True
+        return PreparedText(prepared_text, estimate_tokens(prepared_text), original_tokens,
+                            code_dropped, boilerplate_dropped, truncated)
+
+
+@dataclass
+class TokenUsage:
+    """
+    Токены, израсходованные запросами к модели суммаризации (по данным API).
+    """
+    requests: int = 0
+    cache_hits: int = 0  # Ответы из кэша (LLMResponseCache), токены не тратились
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    def add(self, usage: Any) -> None:
+        """
+        Учитывает поле usage ответа OpenAI-совместимого API (None, если API его не вернуло).
+        """
+        self.requests += 1
+        if usage is not None:
+            self.prompt_tokens += usage.prompt_tokens
+            self.completion_tokens += usage.completion_tokens
+
+
+_token_usage: ContextVar[Optional[TokenUsage]] = ContextVar("token_usage", default=None)
+
+
+@contextmanager
+def track_token_usage() -> Iterator[TokenUsage]:
+    """
+    Считает токены всех запросов к модели, сделанных внутри блока, в том числе из дочерних задач.
+
+    Пример использования:
+        with track_token_usage() as usage:
+            await deepseek_model.summarize_text(text)
+        logging.info(f"Токенов на входе: {usage.prompt_tokens}")
+    """
+    usage = TokenUsage()
+    token = _token_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _token_usage.reset(token)
+
+
+def record_token_usage(usage: Any) -> None:
+    """
+    Учитывает токены ответа модели в текущем блоке track_token_usage (вне блока ничего не делает).
+
+    :param usage: Поле usage ответа OpenAI-совместимого API.
+    """
+    tracker = _token_usage.get()
+    if tracker is not None:
+        tracker.add(usage)
+
+
+def record_cache_hit() -> None:
+    """
+    Учитывает ответ модели, взятый из кэша, в текущем блоке track_token_usage.
+    """
+    tracker = _token_usage.get()
+    if tracker is not None:
+        tracker.cache_hits += 1
+
+
+PREPROCESSING_SETTINGS = {
+    "max_code_lines": 10,  # Сколько строк листинга кода отправлять в модель.
+    # Бюджет входных токенов на статью (~120 тыс. символов), остальное вырезается из середины.
+    # Не действует для бэкендов, суммаризирующих длинный текст по частям (DeepSeek, LocalSummarizer).
+    "max_tokens": 40000,
+    "tail_share": 0.2,  # Доля бюджета для конца статьи (выводы) при сокращении.
+}
+
+text_preprocessor = TextPreprocessor(
+    max_code_lines=PREPROCESSING_SETTINGS['max_code_lines'],
+    max_tokens=PREPROCESSING_SETTINGS['max_tokens'],
+    tail_share=PREPROCESSING_SETTINGS['tail_share'],
+)
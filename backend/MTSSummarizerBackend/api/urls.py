@@ -1,12 +1,18 @@
 from django.urls import path
-from .views import (ArticleCreateView, ArticleDetailView, ArticleListView, 
-                    ArticleLatestListView, QueueStatusView)
+from .views import (ArticleCreateView, ArticleDetailView, ArticleListView, ArticleStreamView,
+                    ArticleLatestListView, QueueStatusView, MetricsView, SummaryJobCreateView,
+                    SummaryJobDetailView, SummaryJobEventsView)
 
 
 urlpatterns = [
     path('v1/status/', QueueStatusView.as_view(), name='status'),
     path('v1/create/', ArticleCreateView.as_view(), name='create'),
+    path('v1/stream/', ArticleStreamView.as_view(), name='stream'),
     path('v1/article/<int:article_id>/', ArticleDetailView.as_view(), name='detail'),
     path('v1/list/', ArticleListView.as_view(), name='list'),
-    path('v1/latest/', ArticleLatestListView.as_view(), name='latest')
+    path('v1/latest/', ArticleLatestListView.as_view(), name='latest'),
+    path('v1/metrics/', MetricsView.as_view(), name='metrics'),
+    path('v1/jobs/', SummaryJobCreateView.as_view(), name='job-create'),
+    path('v1/jobs/<uuid:job_id>/', SummaryJobDetailView.as_view(), name='job-detail'),
+    path('v1/jobs/<uuid:job_id>/events/', SummaryJobEventsView.as_view(), name='job-events')
 ]
@@ -1,15 +1,29 @@
+import asyncio
+import json
 from adrf.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.filters import SearchFilter
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.settings import api_settings
 from asgiref.sync import sync_to_async
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from .serializers import (ArticleDataBaseSerializer, ArticleSerialiser, ArticleListSerializer, 
-                          ArticleLatestSerializer, QueueStatusSerializer)
-from .models import Article
+                          ArticleLatestSerializer, QueueStatusSerializer, SummaryJobSerializer,
+                          SummaryJobCreateSerializer)
+from .models import Article, SummaryJob
 from .habr_parser import parser
+from .admission import admission_controller
+from .jobs import cancel_job, request_deadline, request_owner, summary_job_worker
+from .prefetch import latest_articles_prefetcher
+from .progress import summary_progress
+from .renderers import EventStreamRenderer
+from .services import summary_flights
+from .swr_cache import latest_articles_cache
+from .llm_cache import llm_response_cache
 from .task_queue import task_queue
 
 
@@ -27,7 +41,7 @@ class ArticleCreateView(APIView):
             if is_authenticated:
                 await serializer.asave(user=request.user)
             else:
-                await serializer.asave()
+                await serializer.asave(owner=request_owner(request))
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -69,7 +83,8 @@ class ArticleDetailView(APIView):
     article_obj = None
 
     async def async_dispatch(self, request, *args, **kwargs):
-        self.article_obj = await sync_to_async(get_object_or_404)(klass=self.model, pk=kwargs['article_id'])
+        self.article_obj = await sync_to_async(get_object_or_404)(klass=self.model.objects.select_related('summary'),
+                                                                  pk=kwargs['article_id'])
         return await super().async_dispatch(request, *args, **kwargs)
 
     async def get(self, request,  *args, **kwargs):
@@ -86,7 +101,7 @@ class ArticleLatestListView(APIView):
     serializer_class = ArticleLatestSerializer
 
     async def get(self, request, *args, **kwargs):
-        articles = await parser.parsing_latest_articles()
+        articles = await latest_articles_cache.get()
         serializer = self.serializer_class(data=articles, many=True)
         if serializer.is_valid():
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -98,8 +113,151 @@ class QueueStatusView(APIView):
     serializer_class = QueueStatusSerializer
 
     async def get(self, request, *args, **kwargs):
-        is_available = await task_queue.is_available()
-        serializer = self.serializer_class(data={"is_available": is_available})
+        queue_state = await admission_controller.get_state()
+        serializer = self.serializer_class(data=queue_state)
         if serializer.is_valid():
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class MetricsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    async def get(self, request, *args, **kwargs):
+        metrics = {
+            "http_cache": parser.http_cache.stats() if parser.http_cache is not None else None,
+            "latest_articles_cache": latest_articles_cache.stats(),
+            "proxy_pool": parser.proxy_pool.stats() if parser.proxy_pool is not None else None,
+            "host_rate_limiter": parser.host_limiter.stats() if parser.host_limiter is not None else None,
+            "prefetch": latest_articles_prefetcher.stats(),
+            "task_queue": task_queue.stats(),
+            "llm_cache": llm_response_cache.stats() if llm_response_cache is not None else None,
+            "summary_flights": summary_flights.stats(),
+            "summary_progress": summary_progress.stats(),
+            "summary_job_worker": summary_job_worker.stats(),
+            "admission": admission_controller.stats(),
+        }
+        return Response(metrics, status=status.HTTP_200_OK)
+
+
+class SummaryJobCreateView(APIView):
+    permission_classes = (AllowAny,)
+    serializer_class = SummaryJobCreateSerializer
+
+    async def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data)
+        if serializer.is_valid():
+            user = request.user if request.user.is_authenticated else None
+            job = await serializer.asave(user=user, owner=request_owner(request))
+            headers = {"Location": reverse('job-detail', kwargs={'job_id': job.id})}
+            return Response(serializer.data, status=status.HTTP_202_ACCEPTED, headers=headers)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class SummaryJobMixin:
+    """
+    Получение задачи суммаризации: задачу пользователя видит только он сам,
+    анонимную задачу - любой, кто знает её id.
+    """
+
+    async def get_job(self, request, job_id) -> SummaryJob:
+        job = await SummaryJob.objects.select_related('summary').filter(pk=job_id).afirst()
+        if job is None or (job.user_id is not None and job.user_id != request.user.id):
+            raise Http404
+        return job
+
+
+class SummaryJobDetailView(SummaryJobMixin, APIView):
+    permission_classes = (AllowAny,)
+    serializer_class = SummaryJobSerializer
+
+    async def get(self, request, job_id, *args, **kwargs):
+        job = await self.get_job(request, job_id)
+        return Response(self.serializer_class(job).data, status=status.HTTP_200_OK)
+
+
+class SummaryJobEventsMixin(SummaryJobMixin):
+    """
+    Поток Server-Sent Events задачи суммаризации:
+        - status: при каждом изменении статуса задачи (данные как в SummaryJobSerializer);
+        - title: заголовок статьи, как только статья распарсена;
+        - article_summary: очередной кусок резюме {"offset": ..., "text": ...} по мере генерации,
+          клиент заменяет текст резюме начиная с offset (offset 0 - генерация началась заново);
+        - analysis, clusters: результаты анализа тональности и кластеризации комментариев.
+    Поток закрывается после завершения задачи.
+    """
+    serializer_class = SummaryJobSerializer
+    renderer_classes = (*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer)
+    poll_interval = 1.0
+    stream_interval = 0.25  # Период проверки промежуточных результатов выполняемой задачи
+    keepalive_interval = 15.0
+
+    @staticmethod
+    def event_stream_response(events) -> StreamingHttpResponse:
+        response = StreamingHttpResponse(events, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Отключает буферизацию ответа в nginx
+        return response
+
+    @staticmethod
+    def event(name: str, data) -> str:
+        return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    async def events(self, job: SummaryJob, cancel_on_disconnect: bool = False):
+        last_status, idle, sent_progress = None, 0.0, {}
+        try:
+            while True:
+                for name, value in job.progress.items():
+                    if name == 'article_summary':
+                        sent_summary = sent_progress.get(name, "")
+                        offset = len(sent_summary) if value.startswith(sent_summary) else 0
+                        if value[offset:]:
+                            yield self.event(name, {"offset": offset, "text": value[offset:]})
+                            idle = 0.0
+                    elif value != sent_progress.get(name):
+                        yield self.event(name, value)
+                        idle = 0.0
+                sent_progress = job.progress
+                if job.status != last_status:
+                    yield self.event('status', self.serializer_class(job).data)
+                    last_status, idle = job.status, 0.0
+                if job.status in SummaryJob.FINISHED_STATUSES:
+                    return
+                if idle >= self.keepalive_interval:
+                    yield ": keepalive\n\n"
+                    idle = 0.0
+                interval = self.stream_interval if job.status == SummaryJob.RUNNING else self.poll_interval
+                await asyncio.sleep(interval)
+                idle += interval
+                job = await SummaryJob.objects.select_related('summary').aget(pk=job.pk)
+        except (asyncio.CancelledError, GeneratorExit):
+            if cancel_on_disconnect:
+                # Результат задачи нужен только этому потоку: клиент отключился - задача отменяется.
+                await asyncio.shield(cancel_job(job, "Клиент отключился, не дождавшись результата."))
+            raise
+
+
+class SummaryJobEventsView(SummaryJobEventsMixin, APIView):
+    permission_classes = (AllowAny,)
+
+    async def get(self, request, job_id, *args, **kwargs):
+        job = await self.get_job(request, job_id)
+        return self.event_stream_response(self.events(job))
+
+
+class ArticleStreamView(SummaryJobEventsMixin, APIView):
+    """
+    Суммаризация статьи с потоковой выдачей: ставит задачу суммаризации и сразу отвечает
+    потоком её событий (см. SummaryJobEventsMixin), так что резюме появляется у клиента
+    по мере генерации. Результат, как и у ArticleCreateView, сохраняется в историю
+    авторизованного пользователя. Отключение клиента отменяет задачу.
+    """
+    permission_classes = (AllowAny,)
+
+    async def post(self, request, *args, **kwargs):
+        serializer = SummaryJobCreateSerializer(data=request.data)
+        if serializer.is_valid():
+            user = request.user if request.user.is_authenticated else None
+            job = await serializer.asave(user=user, deadline=request_deadline(), owner=request_owner(request))
+            return self.event_stream_response(self.events(job, cancel_on_disconnect=True))
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,83 @@
+"""
+Бенчмарк потокового парсинга комментариев.
+
+Для страниц комментариев разного размера сравнивает пиковое потребление памяти
+(tracemalloc) и время двух режимов:
+    - list: страница читается целиком и передаётся парсеру комментариев одним куском;
+    - stream: HabrParser.parsing_comment_stream, страница читается кусками.
+
+Стенд-ин habr.com запускается в отдельном процессе, чтобы его аллокации
+не попадали в замер.
+
+Запуск (из папки MTSSummarizerBackend):
+    python -m benchmarks.comments_stream --sizes 100 1000 10000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import time
+import tracemalloc
+from api.habr_parser import HabrParser
+from .habr_stub import HabrStubServer
+
+
+def run_stub_server(comments_per_article: int, ports: multiprocessing.Queue) -> None:
+    async def serve() -> None:
+        server = HabrStubServer(comments_per_article=comments_per_article)
+        base_url = await server.start()
+        ports.put(base_url)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+async def parse(habr_parser: HabrParser, comment_url: str, stream: bool) -> int:
+    if stream:
+        comments_amount = 0
+        async for _ in habr_parser.parsing_comment_stream(comment_url):
+            comments_amount += 1
+        return comments_amount
+    session = await habr_parser._get_session()
+    async with habr_parser._fetch(session, comment_url) as (charset, chunks):
+        html = b"".join([chunk async for chunk in chunks]).decode(charset, errors="replace")
+    stream_parser = habr_parser.extractor.comments_stream_parser()
+    return len(stream_parser.feed(html) + stream_parser.close())
+
+
+async def measure(habr_parser: HabrParser, comment_url: str, stream: bool) -> tuple[int, float, int]:
+    # Время и память меряются отдельными прогонами: tracemalloc сильно замедляет аллокации.
+    started = time.perf_counter()
+    comments_amount = await parse(habr_parser, comment_url, stream)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    await parse(habr_parser, comment_url, stream)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return comments_amount, elapsed, peak
+
+
+async def main(sizes: list[int]) -> None:
+    print(f"{'comments':>10}{'mode':>8}{'time, s':>10}{'peak, MiB':>12}")
+    for size in sizes:
+        ports = multiprocessing.Queue()
+        server_process = multiprocessing.Process(target=run_stub_server, args=(size, ports), daemon=True)
+        server_process.start()
+        try:
+            comment_url = f"{ports.get(timeout=30)}/ru/articles/1/comments/"
+            habr_parser = HabrParser(attemps=1, host_rate=None)
+            await habr_parser.start()
+            for stream in (False, True):
+                comments_amount, elapsed, peak = await measure(habr_parser, comment_url, stream)
+                print(f"{comments_amount:>10}{'stream' if stream else 'list':>8}{elapsed:>10.3f}{peak / 2 ** 20:>12.2f}")
+            await habr_parser.close()
+        finally:
+            server_process.terminate()
+            server_process.join()
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000],
+                                 help="Количество комментариев на странице.")
+    arguments = argument_parser.parse_args()
+    asyncio.run(main(arguments.sizes))
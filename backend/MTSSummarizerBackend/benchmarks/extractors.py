@@ -0,0 +1,96 @@
+"""
+Бенчмарк бэкендов извлечения данных из HTML-страниц Хабра.
+
+На сохранённых страницах из benchmarks/fixtures сравнивает скорость бэкендов
+из api.habr_extractors и проверяет, что их результат совпадает с эталонным
+извлечением на BeautifulSoup. Комментарии разбираются потоковым парсером бэкенда
+(comments_stream_parser) и сверяются с выборкой COMMENT_SELECTOR по полному дереву.
+Страница комментариев размножается, чтобы получить "тяжёлую" страницу популярной статьи.
+
+Запуск (из папки MTSSummarizerBackend):
+    python -m benchmarks.extractors --comments-scale 200 --repeat 20
+"""
+import argparse
+import statistics
+import sys
+import time
+from functools import partial
+from pathlib import Path
+from bs4 import BeautifulSoup
+from api.habr_extractors import COMMENT_SELECTOR, EXTRACTORS, BaseExtractor, BeautifulSoupExtractor, get_extractor
+
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+COMMENTS_TREE_OPEN = '<div class="tm-comments__tree">'
+COMMENT_THREAD_CLOSE = '</section>'
+
+
+def load_fixture(name: str) -> str:
+    return (FIXTURES_DIR / name).read_text(encoding="utf-8")
+
+
+def scale_comments(html: str, scale: int) -> str:
+    """Повторяет ветки комментариев scale раз."""
+    start = html.index(COMMENTS_TREE_OPEN) + len(COMMENTS_TREE_OPEN)
+    end = html.rindex(COMMENT_THREAD_CLOSE) + len(COMMENT_THREAD_CLOSE)
+    return html[:start] + html[start:end] * scale + html[end:]
+
+
+def reference_comments(html: str) -> list[str]:
+    soup = BeautifulSoup(html, "html.parser")
+    return [comment.text.strip() for comment in soup.select(COMMENT_SELECTOR) if comment.text.strip()]
+
+
+def stream_comments(extractor: BaseExtractor, html: str) -> list[str]:
+    stream_parser = extractor.comments_stream_parser()
+    return stream_parser.feed(html) + stream_parser.close()
+
+
+def measure(function, *args, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main(comments_scale: int, repeat: int) -> int:
+    pages = {
+        "article": (load_fixture("article.html"),),
+        "comments": (scale_comments(load_fixture("comments.html"), comments_scale),),
+        "latest_articles": (load_fixture("latest.html"), 5),
+    }
+    reference = BeautifulSoupExtractor()
+    expected = {method: getattr(reference, method)(*args) for method, args in pages.items() if method != "comments"}
+    expected["comments"] = reference_comments(*pages["comments"])
+    print(f"Размер страницы комментариев: {len(pages['comments'][0]) / 1024:.0f} KiB, "
+          f"комментариев: {len(expected['comments'])}")
+
+    mismatches = 0
+    print(f"{'backend':<12}{'page':<17}{'median, ms':>12}{'speedup':>9}  output")
+    baseline = {}
+    for name in EXTRACTORS:
+        try:
+            extractor = get_extractor(name)
+        except ImportError as e:
+            print(f"{name:<12}пропущен: {e}")
+            continue
+        for method, args in pages.items():
+            function = getattr(extractor, method) if method != "comments" else partial(stream_comments, extractor)
+            matches = function(*args) == expected[method]
+            mismatches += not matches
+            elapsed = measure(function, *args, repeat=repeat)
+            baseline.setdefault(method, elapsed)
+            print(f"{name:<12}{method:<17}{elapsed * 1000:>12.2f}{baseline[method] / elapsed:>8.1f}x  "
+                  f"{'совпадает' if matches else 'ОТЛИЧАЕТСЯ'}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--comments-scale", type=int, default=200,
+                                 help="Во сколько раз размножить ветки комментариев.")
+    argument_parser.add_argument("--repeat", type=int, default=20, help="Количество замеров на каждую страницу.")
+    arguments = argument_parser.parse_args()
+    sys.exit(main(arguments.comments_scale, arguments.repeat))
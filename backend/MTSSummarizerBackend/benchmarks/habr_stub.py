@@ -0,0 +1,160 @@
+"""
+Локальный стенд-ин habr.com для бенчмарков парсера.
+
+Отдаёт страницы статьи, комментариев и списка статей компании в разметке Хабра
+и считает количество установленных TCP-соединений (в проде каждое новое соединение
+означает TCP- и TLS-рукопожатие с habr.com). Поддерживает ETag и ответы 304,
+а также ограничение частоты запросов с ответами 429 и заголовком Retry-After.
+"""
+import asyncio
+import hashlib
+from typing import Optional
+from aiohttp import web
+from api.rate_limiter import TokenBucket
+
+
+ARTICLE_TEMPLATE = """<!DOCTYPE html>
+<html lang="ru">
+<head><title>Статья {article_id} / Хабр</title></head>
+<body>
+<div class="tm-article-body">
+<div class="article-formatted-body article-formatted-body_version-2">
+<div xmlns="http://www.w3.org/1999/xhtml">{paragraphs}</div>
+</div>
+</div>
+</body>
+</html>
+"""
+
+COMMENTS_TEMPLATE = """<!DOCTYPE html>
+<html lang="ru">
+<head><title>Комментарии к статье {article_id} / Хабр</title></head>
+<body>
+<div class="tm-comments-wrapper__wrapper">{comments}</div>
+</body>
+</html>
+"""
+
+COMMENT_TEMPLATE = """
+<section class="tm-comment-thread">
+<article class="tm-comment-thread__comment">
+<div class="tm-comment__body-content tm-comment__body-content_v2">
+<div xmlns="http://www.w3.org/1999/xhtml"><p>Комментарий {index} к статье {article_id}: полностью согласен с автором.</p></div>
+</div>
+</article>
+</section>"""
+
+LATEST_TEMPLATE = """<!DOCTYPE html>
+<html lang="ru">
+<head><title>Статьи / Хабр</title></head>
+<body>
+<div class="tm-articles-list">{articles}</div>
+</body>
+</html>
+"""
+
+LATEST_ITEM_TEMPLATE = """
+<article class="tm-articles-list__item" id="{article_id}">
+<span class="tm-article-datetime-published"><time datetime="2025-06-01T10:00:00.000Z" title="2025-06-01, 13:00">{article_id} минут назад</time></span>
+<h2 class="tm-title tm-title_h2"><a href="/ru/companies/ru_mts/articles/{article_id}/" class="tm-title__link"><span>Статья {article_id}</span></a></h2>
+</article>"""
+
+
+class HabrStubServer:
+    """
+    Стенд-ин habr.com на aiohttp.web.
+
+    :param comments_per_article: Количество комментариев на странице комментариев.
+    :param paragraphs_per_article: Количество абзацев в тексте статьи.
+    :param latency: Искусственная задержка ответа (в секундах).
+    :param rate_limit: Допустимая частота запросов (в секунду), сверх неё отдаётся 429 (None - без ограничения).
+    :param retry_after: Значение заголовка Retry-After в ответах 429 (в секундах).
+    """
+
+    def __init__(
+        self,
+        comments_per_article: int = 20,
+        paragraphs_per_article: int = 20,
+        latency: float = 0.0,
+        rate_limit: Optional[float] = None,
+        retry_after: int = 1
+    ) -> None:
+        self.comments_per_article = comments_per_article
+        self.paragraphs_per_article = paragraphs_per_article
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self._bucket = TokenBucket(rate_limit, rate_limit) if rate_limit else None
+        self.requests = 0
+        self.not_modified = 0
+        self.throttled = 0
+        self._transports = set()
+        self._runner = None
+        self.base_url = None
+
+    @property
+    def connections(self) -> int:
+        """Количество различных TCP-соединений, по которым пришли запросы."""
+        return len(self._transports)
+
+    def reset(self) -> None:
+        self.requests = 0
+        self.not_modified = 0
+        self.throttled = 0
+        self._transports.clear()
+        if self.rate_limit:
+            self._bucket = TokenBucket(self.rate_limit, self.rate_limit)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_get("/ru/companies/ru_mts/articles/", self._latest)
+        app.router.add_get("/ru/companies/ru_mts/articles/page{page:\\d+}/", self._latest)
+        app.router.add_get("/ru/{section:articles|news|companies/ru_mts/articles}/{article_id:\\d+}/", self._article)
+        app.router.add_get("/ru/{section:articles|news|companies/ru_mts/articles}/{article_id:\\d+}/comments/", self._comments)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def article_url(self, article_id: int) -> str:
+        return f"{self.base_url}/ru/articles/{article_id}/"
+
+    async def _respond(self, request: web.Request, body: str) -> web.Response:
+        self.requests += 1
+        self._transports.add(request.transport)
+        if self._bucket is not None:
+            if self._bucket.delay():
+                self.throttled += 1
+                return web.Response(status=429, headers={"Retry-After": str(self.retry_after)})
+            await self._bucket.acquire()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        etag = f'"{hashlib.md5(body.encode()).hexdigest()}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(text=body, content_type="text/html", headers={"ETag": etag})
+
+    async def _article(self, request: web.Request) -> web.Response:
+        article_id = request.match_info["article_id"]
+        paragraphs = "".join(f"<p>Абзац {i} статьи {article_id}.</p>" for i in range(self.paragraphs_per_article))
+        return await self._respond(request, ARTICLE_TEMPLATE.format(article_id=article_id, paragraphs=paragraphs))
+
+    async def _comments(self, request: web.Request) -> web.Response:
+        article_id = request.match_info["article_id"]
+        comments = "".join(COMMENT_TEMPLATE.format(index=i, article_id=article_id)
+                           for i in range(self.comments_per_article))
+        return await self._respond(request, COMMENTS_TEMPLATE.format(article_id=article_id, comments=comments))
+
+    async def _latest(self, request: web.Request) -> web.Response:
+        first_article_id = 900000 - 20 * (int(request.match_info.get("page", 1)) - 1)
+        articles = "".join(LATEST_ITEM_TEMPLATE.format(article_id=first_article_id - i) for i in range(20))
+        return await self._respond(request, LATEST_TEMPLATE.format(articles=articles))
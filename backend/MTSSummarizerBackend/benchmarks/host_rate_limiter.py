@@ -0,0 +1,64 @@
+"""
+Бенчмарк ограничителя частоты запросов к хосту.
+
+Стенд-ин habr.com отвечает 429 с заголовком Retry-After, если запросов больше
+--server-rate в секунду. Парсер разбирает пачку статей с повторами на 429:
+    - без ограничителя (host_rate=None): запросы уходят сразу, а после 429
+      попадают в экспоненциальные повторы aiohttp_retry;
+    - с ограничителем api.rate_limiter.HostRateLimiter: запросы равномерно
+      распределяются во времени, а 429 приостанавливает все запросы к хосту на Retry-After.
+
+Запуск (из папки MTSSummarizerBackend):
+    python -m benchmarks.host_rate_limiter --articles 100 --server-rate 40 --client-rate 35
+"""
+import argparse
+import asyncio
+import time
+from api.habr_parser import HabrParser
+from .habr_stub import HabrStubServer
+
+
+async def run(
+    server: HabrStubServer,
+    articles: int,
+    concurrency: int,
+    host_rate: float | None
+) -> tuple[float, int, HabrParser]:
+    habr_parser = HabrParser(attemps=10, statuses=[429], host_rate=host_rate, host_burst=host_rate or 10)
+    await habr_parser.start()
+    failures = 0
+    started = time.perf_counter()
+    try:
+        article_urls = [server.article_url(article_id) for article_id in range(articles)]
+        async for _, (article, comments) in habr_parser.parsing_articles(article_urls, concurrency=concurrency):
+            failures += article is None or comments is None
+    finally:
+        await habr_parser.close()
+    return time.perf_counter() - started, failures, habr_parser
+
+
+async def main(articles: int, concurrency: int, server_rate: float, client_rate: float) -> None:
+    server = HabrStubServer(rate_limit=server_rate)
+    await server.start()
+    print(f"{'mode':<12}{'time, s':>9}{'req/s':>8}{'http req':>10}{'429':>6}{'failures':>10}{'wait p95, s':>13}")
+    try:
+        for mode, host_rate in (("no limiter", None), ("limiter", client_rate)):
+            server.reset()
+            elapsed, failures, habr_parser = await run(server, articles, concurrency, host_rate)
+            host_stats = habr_parser.host_limiter.stats() if habr_parser.host_limiter is not None else {}
+            wait_p95 = max((stats["wait_p95"] for stats in host_stats.values()), default=0.0)
+            successful = server.requests - server.throttled
+            print(f"{mode:<12}{elapsed:>9.2f}{successful / elapsed:>8.1f}{server.requests:>10}"
+                  f"{server.throttled:>6}{failures:>10}{wait_p95:>13.3f}")
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--articles", type=int, default=100, help="Количество статей для парсинга.")
+    argument_parser.add_argument("--concurrency", type=int, default=20, help="Количество статей, обрабатываемых одновременно.")
+    argument_parser.add_argument("--server-rate", type=float, default=40, help="Допустимая частота запросов стенд-ина (в секунду).")
+    argument_parser.add_argument("--client-rate", type=float, default=35, help="Частота запросов ограничителя парсера (в секунду).")
+    arguments = argument_parser.parse_args()
+    asyncio.run(main(arguments.articles, arguments.concurrency, arguments.server_rate, arguments.client_rate))
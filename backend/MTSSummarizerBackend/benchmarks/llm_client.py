@@ -0,0 +1,117 @@
+"""
+Бенчмарк клиента LLM (api.llm_client.LLMClient) при перегрузке и недоступности DeepSeek.
+
+Сравниваются два клиента DeepSeek.summarize_text:
+    - openai.AsyncOpenAI с настройками по умолчанию (без ограничения одновременных запросов,
+      два повтора после ошибок) - как было до LLMClient;
+    - LLMClient: не больше --max-in-flight одновременных запросов, повторы с разбросом и
+      паузой по Retry-After, предохранитель.
+
+Сценарии на стенд-ине DeepSeek (benchmarks/models_stub.py):
+    - overload: стенд-ин обслуживает не больше --capacity запросов одновременно, остальным
+      отвечает 429 с Retry-After; --requests статей суммаризируются одновременно;
+    - outage: стенд-ин отвечает 503 на все запросы; измеряется, как быстро задачи получают
+      ошибку (и могут перейти на запасной бэкенд или прежнее резюме), и сколько запросов
+      уходит в лежащий API.
+
+Запуск (из папки MTSSummarizerBackend):
+    python -m benchmarks.llm_client --requests 40 --capacity 4 --llm-latency 0.5
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+import openai
+from api.DeepSeekModel import DeepSeek
+from api.llm_client import LLM_CLIENT_SETTINGS, LLMClient
+from .models_stub import ModelsStubServer
+
+
+class PlainClient:
+    """
+    openai.AsyncOpenAI с настройками по умолчанию за интерфейсом LLMClient.
+    """
+
+    def __init__(self, api_key: str, base_url: str) -> None:
+        self.client = openai.AsyncOpenAI(api_key=api_key, base_url=base_url)
+
+    async def complete(self, **kwargs):
+        return await self.client.chat.completions.create(**kwargs)
+
+    async def close(self) -> None:
+        await self.client.close()
+
+    def stats(self) -> dict:
+        return {}
+
+
+async def run(model: DeepSeek, requests: int) -> tuple[list[float], list[float], Counter, float]:
+    succeeded, failed, errors = [], [], Counter()
+
+    async def one(number: int) -> None:
+        started = time.perf_counter()
+        try:
+            await model.summarize_text(f"Статья {number}: команда перевела сервис на асинхронную обработку запросов.")
+            succeeded.append(time.perf_counter() - started)
+        except Exception as e:
+            failed.append(time.perf_counter() - started)
+            errors[type(e).__name__] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(number) for number in range(requests)))
+    return succeeded, failed, errors, time.perf_counter() - started
+
+
+def p(values: list[float], percent: int) -> str:
+    if not values:
+        return "-"
+    values = sorted(values)
+    return f"{values[min(len(values) - 1, int(len(values) * percent / 100))]:.2f}"
+
+
+async def main(requests: int, capacity: int, llm_latency: float, retry_after: float, max_in_flight: int) -> None:
+    models = ModelsStubServer(llm_latency=llm_latency, llm_capacity=capacity, llm_retry_after=retry_after)
+    await models.start()
+    clients = {
+        "openai default": lambda: PlainClient("stub", models.llm_url),
+        "LLMClient": lambda: LLMClient("stub", models.llm_url,
+                                       **(LLM_CLIENT_SETTINGS | {"max_in_flight": max_in_flight})),
+    }
+    print(f"Статей: {requests}, задержка DeepSeek: {llm_latency} с, ёмкость: {capacity}, Retry-After: {retry_after} с, "
+          f"max_in_flight LLMClient: {max_in_flight}")
+    print(f"{'scenario':<10}{'client':<16}{'ok':>5}{'failed':>8}{'time, s':>9}{'ok p50':>8}{'ok p95':>8}"
+          f"{'fail p50':>10}{'API calls':>11}{'429':>6}{'503':>6}  errors")
+    try:
+        for scenario in ("overload", "outage"):
+            models.llm_available = scenario != "outage"
+            for name, make_client in clients.items():
+                model = DeepSeek(api_key="stub", base_url=models.llm_url)
+                await model.client.close()
+                model.client = make_client()
+                models.reset()
+                try:
+                    succeeded, failed, errors, elapsed = await run(model, requests)
+                finally:
+                    await model.close()
+                calls = models.requests["llm"] + models.requests["llm_throttled"] + models.requests["llm_unavailable"]
+                print(f"{scenario:<10}{name:<16}{len(succeeded):>5}{len(failed):>8}{elapsed:>9.2f}"
+                      f"{p(succeeded, 50):>8}{p(succeeded, 95):>8}{p(failed, 50):>10}{calls:>11}"
+                      f"{models.requests['llm_throttled']:>6}{models.requests['llm_unavailable']:>6}  {dict(errors)}")
+                if isinstance(model.client, LLMClient):
+                    print(f"{'':<26}предохранитель: {model.client.breaker.stats()}")
+    finally:
+        await models.close()
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--requests", type=int, default=40, help="Количество одновременных суммаризаций.")
+    argument_parser.add_argument("--capacity", type=int, default=4,
+                                 help="Одновременных запросов, которые выдерживает стенд-ин DeepSeek.")
+    argument_parser.add_argument("--llm-latency", type=float, default=0.5, help="Задержка ответа DeepSeek (в секундах).")
+    argument_parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After ответа 429 (в секундах).")
+    argument_parser.add_argument("--max-in-flight", type=int, default=4,
+                                 help="Ограничение одновременных запросов LLMClient.")
+    arguments = argument_parser.parse_args()
+    asyncio.run(main(arguments.requests, arguments.capacity, arguments.llm_latency, arguments.retry_after,
+                     arguments.max_in_flight))
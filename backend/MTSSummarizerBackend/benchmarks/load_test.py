@@ -0,0 +1,212 @@
+"""
+Сквозной нагрузочный тест POST /api/v1/create/ на локальных стенд-инах.
+
+В одном процессе запускаются:
+    - стенд-ин habr.com (benchmarks/habr_stub.py), куда парсер отправляет запросы вместо https://habr.com;
+    - стенд-ины DeepSeek и API моделей (benchmarks/models_stub.py) с настраиваемыми задержками;
+    - настоящее ASGI-приложение (MTSSummarizerBackend.asgi) под uvicorn с воркерами задач суммаризации.
+Клиент отправляет --requests запросов на суммаризацию разных статей, не больше --concurrency
+одновременно, и выводит пропускную способность, задержки p50/p95/p99, ответы с ошибками и
+время ожидания на каждой стадии: очередь задач в базе, парсинг, планировщик TaskQueue,
+ожидание и выполнение стадий llm, sentiment и clustering. Сравнение этих чисел до и после
+изменения ловит регрессии TaskQueue и HabrParser до деплоя.
+
+Нужна база данных из настроек Django (PostgreSQL, как в проде, с применёнными миграциями).
+Задачи и резюме, созданные тестом, удаляются после него. Ограничение частоты
+запросов DRF на время теста отключается.
+
+Запуск (из папки MTSSummarizerBackend):
+    python -m benchmarks.load_test --requests 200 --concurrency 20 --llm-latency 2.0
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+from collections import Counter
+import django
+from django.conf import settings
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "MTSSummarizerBackend.settings")
+django.setup()
+settings.REST_FRAMEWORK["DEFAULT_THROTTLE_CLASSES"] = []  # Все запросы теста идут с одного адреса
+
+# Используют модели и настройки DRF, поэтому импортируются после django.setup()
+import aiohttp  # noqa: E402
+import uvicorn  # noqa: E402
+from rest_framework.settings import api_settings  # noqa: E402
+import api.services  # noqa: E402
+from api.DeepSeekModel import DeepSeek  # noqa: E402
+from api.habr_extractors import HABR_URL  # noqa: E402
+from api.habr_parser import HabrParser  # noqa: E402
+from api.jobs import summary_job_worker  # noqa: E402
+from api.models import Summary, SummaryJob  # noqa: E402
+from api.task_queue import TASK_QUEUE_SETTINGS, TaskQueue  # noqa: E402
+from MTSSummarizerBackend.asgi import application  # noqa: E402
+from .habr_stub import HabrStubServer  # noqa: E402
+from .models_stub import ModelsStubServer  # noqa: E402
+
+api_settings.reload()
+
+
+class StubHabrParser(HabrParser):
+    """
+    HabrParser, отправляющий запросы к https://habr.com на стенд-ин и замеряющий время парсинга статьи.
+    """
+
+    def __init__(self, habr_base_url: str, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.habr_base_url = habr_base_url
+        self.parse_times = []
+
+    def _request(self, session, url, headers):
+        return super()._request(session, url.replace(HABR_URL, self.habr_base_url, 1), headers)
+
+    async def parsing_article(self, article_url):
+        started = time.perf_counter()
+        try:
+            return await super().parsing_article(article_url)
+        finally:
+            self.parse_times.append(time.perf_counter() - started)
+
+
+def percentiles(values: list[float]) -> str:
+    if not values:
+        return f"{'-':>8}{'-':>8}{'-':>8}"
+    if len(values) == 1:
+        return f"{values[0]:>8.2f}" * 3
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return f"{cuts[49]:>8.2f}{cuts[94]:>8.2f}{cuts[98]:>8.2f}"
+
+
+async def drive(base_url: str, urls: list[str], concurrency: int) -> tuple[list[float], Counter, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], Counter()
+
+    async def one(session: aiohttp.ClientSession, url: str) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                async with session.post(f"{base_url}/api/v1/create/", json={"url": url}) as response:
+                    await response.read()
+                    statuses[response.status] += 1
+                    if response.status == 201:
+                        latencies.append(time.perf_counter() - started)
+            except aiohttp.ClientError as e:
+                statuses[type(e).__name__] += 1
+
+    started = time.perf_counter()
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=600)) as session:
+        await asyncio.gather(*(one(session, url) for url in urls))
+    return latencies, statuses, time.perf_counter() - started
+
+
+async def job_waits(urls: list[str]) -> tuple[list[float], list[float]]:
+    queue_waits, run_times = [], []
+    async for created_at, started_at, finished_at in SummaryJob.objects.filter(url__in=urls).values_list(
+            'created_at', 'started_at', 'finished_at'):
+        if started_at is not None:
+            queue_waits.append((started_at - created_at).total_seconds())
+            if finished_at is not None:
+                run_times.append((finished_at - started_at).total_seconds())
+    return queue_waits, run_times
+
+
+async def cleanup(urls: list[str]) -> None:
+    await SummaryJob.objects.filter(url__in=urls).adelete()
+    await Summary.objects.filter(url__in=urls).adelete()
+
+
+async def main(arguments: argparse.Namespace) -> None:
+    habr = HabrStubServer(comments_per_article=arguments.comments, paragraphs_per_article=arguments.paragraphs,
+                          latency=arguments.habr_latency)
+    models = ModelsStubServer(
+        llm_latency=arguments.llm_latency,
+        sentiment_latency=arguments.sentiment_latency,
+        clustering_latency=arguments.clustering_latency,
+        llm_prompt_token_latency=arguments.llm_prompt_token_latency,
+        llm_output_token_latency=arguments.llm_output_token_latency,
+        llm_output_tokens=arguments.llm_output_tokens
+    )
+    habr_base_url = await habr.start()
+    await models.start()
+    parser = StubHabrParser(habr_base_url, host_rate=arguments.habr_rate)
+    task_queue = TaskQueue(
+        maxsize=TASK_QUEUE_SETTINGS['maxsize'],
+        workers=arguments.workers or TASK_QUEUE_SETTINGS['workers'],
+        priority_weights=TASK_QUEUE_SETTINGS['priority_weights'],
+        quantum=TASK_QUEUE_SETTINGS['quantum'],
+        stage_limits=TASK_QUEUE_SETTINGS['stage_limits'],
+        stage_timeouts=TASK_QUEUE_SETTINGS['stage_timeouts'],
+        sentiment_url=models.sentiment_url,
+        clustering_url=models.clustering_url,
+        summarizer=DeepSeek(api_key="stub", base_url=models.llm_url)
+    )
+    api.services.parser, api.services.task_queue = parser, task_queue
+    await parser.start()
+    await task_queue.start()
+    summary_job_worker.start()
+    # lifespan="off": предзагрузка статей и обновление кэша последних статей в тесте не нужны.
+    server = uvicorn.Server(uvicorn.Config(application, host="127.0.0.1", port=0, lifespan="off", log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    first_article = random.randint(10 ** 6, 10 ** 7)  # Статей с такими номерами нет в базе от прошлых запусков
+    urls = [f"{HABR_URL}/ru/articles/{first_article + index}/" for index in range(arguments.requests)]
+    try:
+        latencies, statuses, elapsed = await drive(f"http://127.0.0.1:{port}", urls, arguments.concurrency)
+        queue_waits, run_times = await job_waits(urls)
+        stats = task_queue.stats()
+    finally:
+        server.should_exit = True
+        await serving
+        await summary_job_worker.close()
+        await task_queue.close()
+        await parser.close()
+        await cleanup(urls)
+        await habr.close()
+        await models.close()
+
+    print(f"Запросов: {arguments.requests}, одновременно: {arguments.concurrency}, воркеров TaskQueue: {stats['workers']}, "
+          f"задержки стенд-инов: {models.latencies}, habr.com: {arguments.habr_latency}")
+    print(f"Успешно: {len(latencies)} за {elapsed:.1f} с, {len(latencies) / elapsed:.2f} запросов/с; "
+          f"ответы: {dict(statuses)}")
+    print(f"{'stage':<28}{'p50, s':>8}{'p95, s':>8}{'p99, s':>8}")
+    print(f"{'request':<28}{percentiles(latencies)}")
+    print(f"{'job queue wait':<28}{percentiles(queue_waits)}")
+    print(f"{'job run':<28}{percentiles(run_times)}")
+    print(f"{'parse article':<28}{percentiles(parser.parse_times)}")
+    scheduler = stats["priorities"][TaskQueue.ANONYMOUS]
+    print(f"{'task queue wait':<28}{scheduler['wait_p50']:>8.2f}{scheduler['wait_p95']:>8.2f}{'-':>8}"
+          f"  (max {scheduler['wait_max']:.2f})")
+    print(f"{'stage':<28}{'calls':>8}{'avg wait, s':>13}{'avg run, s':>12}{'timeouts':>10}{'failures':>10}")
+    for stage, stage_stats in stats["stages"].items():
+        calls = stage_stats["calls"] or 1
+        print(f"{stage:<28}{stage_stats['calls']:>8}{stage_stats['wait_total'] / calls:>13.2f}"
+              f"{stage_stats['run_total'] / calls:>12.2f}{stage_stats['timeouts']:>10}{stage_stats['failures']:>10}")
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--requests", type=int, default=100, help="Количество запросов (разных статей).")
+    argument_parser.add_argument("--concurrency", type=int, default=10, help="Количество одновременных запросов.")
+    argument_parser.add_argument("--workers", type=int, help="Воркеров TaskQueue (по умолчанию из TASK_QUEUE_SETTINGS).")
+    argument_parser.add_argument("--llm-latency", type=float, default=1.0, help="Задержка ответа DeepSeek (в секундах).")
+    argument_parser.add_argument("--llm-prompt-token-latency", type=float, default=0.0,
+                                 help="Время чтения одного токена запроса DeepSeek (в секундах).")
+    argument_parser.add_argument("--llm-output-token-latency", type=float, default=0.0,
+                                 help="Время генерации одного токена ответа DeepSeek (в секундах).")
+    argument_parser.add_argument("--llm-output-tokens", type=int, default=25, help="Длина ответа DeepSeek (в токенах).")
+    argument_parser.add_argument("--sentiment-latency", type=float, default=0.1,
+                                 help="Задержка ответа API анализа тональности (в секундах).")
+    argument_parser.add_argument("--clustering-latency", type=float, default=0.2,
+                                 help="Задержка ответа API кластеризации (в секундах).")
+    argument_parser.add_argument("--habr-latency", type=float, default=0.05, help="Задержка ответа habr.com (в секундах).")
+    argument_parser.add_argument("--habr-rate", type=float, default=None,
+                                 help="Ограничение частоты запросов парсера к habr.com (в секунду, по умолчанию без него).")
+    argument_parser.add_argument("--paragraphs", type=int, default=20, help="Абзацев в статье.")
+    argument_parser.add_argument("--comments", type=int, default=20, help="Комментариев к статье.")
+    asyncio.run(main(argument_parser.parse_args()))
@@ -0,0 +1,149 @@
+"""
+Бенчмарк локального бэкенда суммаризации (api.summarizers.LocalSummarizer) на CPU.
+
+Для модели в fp32 и в int8 и для каждого размера батча отправляет --samples статей
+одновременно (не больше --concurrency запросов сразу) и измеряет пропускную способность
+и задержку. Если передан --dataset (JSON Lines с полями 'text' и 'summary', например
+валидационная выборка дообучения), для каждой конфигурации считаются ROUGE-1/2/L
+(F1 по словам, без стемминга) и сравниваются с метриками из models/summary_model.json.
+Без датасета статьи берутся из benchmarks/fixtures/article.html, и ROUGE не считается.
+
+Нужны пакеты из requirements-local.txt и скачанная модель (Model_link в models/summary_model.json).
+
+Запуск (из папки MTSSummarizerBackend):
+    python -m benchmarks.local_summarizer --model-path /models/summary_model --dataset val.jsonl --samples 64
+"""
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import time
+from collections import Counter
+from pathlib import Path
+from api.habr_extractors import BeautifulSoupExtractor
+from api.summarizers import LOCAL_SUMMARIZER_SETTINGS, LocalSummarizer
+from .extractors import load_fixture
+
+
+# Корень репозитория; в Docker-образе папки models нет, и путь передаётся через --reference-metrics.
+REFERENCE_METRICS = Path(__file__).resolve().parents[1].parent.parent / "models" / "summary_model.json"
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def words(text: str) -> list[str]:
+    return WORD_PATTERN.findall(text.lower())
+
+
+def f1(overlap: int, predicted: int, reference: int) -> float:
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / predicted, overlap / reference
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_n(predicted: list[str], reference: list[str], n: int) -> float:
+    predicted_ngrams = Counter(zip(*(predicted[i:] for i in range(n))))
+    reference_ngrams = Counter(zip(*(reference[i:] for i in range(n))))
+    overlap = sum((predicted_ngrams & reference_ngrams).values())
+    return f1(overlap, sum(predicted_ngrams.values()), sum(reference_ngrams.values()))
+
+
+def rouge_l(predicted: list[str], reference: list[str]) -> float:
+    # Длина наибольшей общей подпоследовательности слов, динамика по одной строке таблицы.
+    lengths = [0] * (len(reference) + 1)
+    for predicted_word in predicted:
+        previous_diagonal = 0
+        for index, reference_word in enumerate(reference, start=1):
+            previous_diagonal, lengths[index] = lengths[index], (
+                previous_diagonal + 1 if predicted_word == reference_word else max(lengths[index], lengths[index - 1])
+            )
+    return f1(lengths[-1], len(predicted), len(reference))
+
+
+def rouge(predictions: list[str], references: list[str]) -> dict[str, float]:
+    scores = {"Rouge-1": [], "Rouge-2": [], "Rouge-L": []}
+    for prediction, reference in zip(predictions, references):
+        predicted, expected = words(prediction), words(reference)
+        scores["Rouge-1"].append(rouge_n(predicted, expected, 1))
+        scores["Rouge-2"].append(rouge_n(predicted, expected, 2))
+        scores["Rouge-L"].append(rouge_l(predicted, expected))
+    return {metric: statistics.fmean(values) for metric, values in scores.items()}
+
+
+def load_samples(dataset: str | None, samples: int) -> tuple[list[str], list[str] | None]:
+    if dataset is None:
+        article_text = BeautifulSoupExtractor().article(load_fixture("article.html"))["text"]
+        return [article_text] * samples, None
+    texts, summaries = [], []
+    with open(dataset, encoding="utf-8") as dataset_file:
+        for line in dataset_file:
+            if len(texts) == samples:
+                break
+            sample = json.loads(line)
+            texts.append(sample["text"])
+            summaries.append(sample["summary"])
+    return texts, summaries
+
+
+async def measure(summarizer: LocalSummarizer, texts: list[str], concurrency: int) -> tuple[list[str], float, list[float]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(text: str) -> str:
+        async with semaphore:
+            started = time.perf_counter()
+            summary = await summarizer.summarize_text(text)
+            latencies.append(time.perf_counter() - started)
+            return summary
+
+    started = time.perf_counter()
+    summaries = await asyncio.gather(*(one(text) for text in texts))
+    return summaries, time.perf_counter() - started, latencies
+
+
+async def main(model_path: str, dataset: str | None, samples: int, batch_sizes: list[int], concurrency: int,
+               num_threads: int | None, reference_path: Path = REFERENCE_METRICS) -> None:
+    texts, references = load_samples(dataset, samples)
+    reference_metrics = json.loads(reference_path.read_text(encoding="utf-8"))["metrics"]
+    print(f"Статей: {len(texts)}, одновременных запросов: {concurrency}, "
+          f"max_input_tokens: {LOCAL_SUMMARIZER_SETTINGS['max_input_tokens']}, "
+          f"max_new_tokens: {LOCAL_SUMMARIZER_SETTINGS['max_new_tokens']}")
+    print(f"Метрики из {reference_path.name}: {reference_metrics}")
+    print(f"{'weights':>8}{'batch':>7}{'articles/s':>12}{'p50, s':>9}{'p95, s':>9}{'avg batch':>11}"
+          f"{'Rouge-1':>9}{'Rouge-2':>9}{'Rouge-L':>9}")
+    for quantize in (False, True):
+        for batch_size in batch_sizes:
+            summarizer = LocalSummarizer(**(LOCAL_SUMMARIZER_SETTINGS | {
+                "model_path": model_path, "max_batch_size": batch_size, "quantize": quantize,
+                "num_threads": num_threads,
+            }))
+            try:
+                await summarizer.start()
+                await summarizer.summarize_text(texts[0])  # Прогрев
+                summarizer.batches = summarizer.summarized = 0
+                summaries, elapsed, latencies = await measure(summarizer, texts, concurrency)
+            finally:
+                await summarizer.close()
+            latencies.sort()
+            scores = rouge(summaries, references) if references else {}
+            print(f"{'int8' if quantize else 'fp32':>8}{batch_size:>7}{len(texts) / elapsed:>12.2f}"
+                  f"{statistics.median(latencies):>9.2f}{latencies[int(len(latencies) * 0.95) - 1]:>9.2f}"
+                  f"{summarizer.stats()['avg_batch_size']:>11.1f}"
+                  + "".join(f"{scores[metric]:>9.4f}" if scores else f"{'-':>9}" for metric in reference_metrics))
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--model-path", default=LOCAL_SUMMARIZER_SETTINGS["model_path"],
+                                 help="Путь к модели суммаризации (по умолчанию LOCAL_SUMMARY_MODEL_PATH).")
+    argument_parser.add_argument("--dataset", help="JSON Lines с полями 'text' и 'summary' для подсчёта ROUGE.")
+    argument_parser.add_argument("--samples", type=int, default=32, help="Количество статей.")
+    argument_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8], help="Размеры батча.")
+    argument_parser.add_argument("--concurrency", type=int, default=16, help="Одновременных запросов.")
+    argument_parser.add_argument("--num-threads", type=int, help="Потоков torch (по умолчанию по количеству ядер).")
+    argument_parser.add_argument("--reference-metrics", type=Path, default=REFERENCE_METRICS,
+                                 help="JSON с эталонными метриками модели (по умолчанию models/summary_model.json).")
+    arguments = argument_parser.parse_args()
+    asyncio.run(main(arguments.model_path, arguments.dataset, arguments.samples, arguments.batch_sizes,
+                     arguments.concurrency, arguments.num_threads, arguments.reference_metrics))
@@ -0,0 +1,112 @@
+"""
+Бенчмарк суммаризации длинных статей: один запрос против map-reduce по частям.
+
+Для статей разной длины (в токенах, по оценке api/chunking.py) измеряется время
+DeepSeek.summarize_text при суммаризации одним запросом и по частям с разным
+бюджетом части (chunk_tokens) и числом одновременных запросов (map_concurrency).
+
+DeepSeek заменён локальным OpenAI-совместимым стенд-ином (benchmarks/models_stub.py),
+у которого время ответа растёт с длиной запроса (чтение) и ответа (генерация),
+а запрос длиннее контекста отклоняется, как у настоящего API.
+
+Запуск (из папки MTSSummarizerBackend):
+    python -m benchmarks.map_reduce --lengths 2000 8000 32000 96000 --chunk-tokens 4000 8000 --concurrency 4 8
+
+Результаты с параметрами по умолчанию (chunk_tokens x map_concurrency):
+      tokens          single          6000x4         56000x4
+        2879        3.12 (1)        2.84 (1)        2.83 (1)
+        8637        3.98 (1)        5.30 (4)        3.98 (1)
+       16317        5.52 (1)        7.78 (6)        5.55 (1)
+       32637        8.79 (1)      11.05 (10)        8.79 (1)
+       64317    контекст (1)      17.36 (18)       10.31 (4)
+       96958    контекст (1)      23.72 (27)       10.36 (5)
+Части меньше контекста замедляют статьи, которые поместились бы в один запрос, поэтому
+SUMMARIZER_SETTINGS['chunk_tokens'] выбран у границы контекста (56000).
+"""
+import argparse
+import asyncio
+import time
+import openai
+from api.chunking import estimate_tokens
+from api.DeepSeekModel import SUMMARIZER_SETTINGS, DeepSeek
+from .models_stub import ModelsStubServer
+
+
+SINGLE_PROMPT = 10 ** 9  # chunk_tokens, при котором статья всегда суммаризируется одним запросом
+PARAGRAPH = ("Команда перевела сервис на асинхронную обработку запросов и измерила задержки под нагрузкой. "
+             "Узким местом оказалась сериализация ответов, после её оптимизации пропускная способность выросла. ")
+
+
+def make_article(tokens: int) -> str:
+    """
+    Генерирует статью примерно из tokens токенов: разделы с заголовками по пять абзацев.
+    """
+    lines, section = [], 0
+    while estimate_tokens("\n".join(lines)) < tokens:
+        section += 1
+        lines.append(f"Раздел {section}")
+        lines.extend(PARAGRAPH * 3 for _ in range(5))
+    return "\n".join(lines)
+
+
+async def measure(server: ModelsStubServer, text: str, chunk_tokens: int, concurrency: int) -> tuple[str, int]:
+    server.reset()
+    summarizer = DeepSeek(api_key="stub", base_url=server.llm_url, chunk_tokens=chunk_tokens,
+                          map_concurrency=concurrency)
+    started = time.perf_counter()
+    try:
+        await summarizer.summarize_text(text)
+    except openai.BadRequestError:
+        return "контекст", server.requests["llm"] + server.requests["llm_rejected"]
+    finally:
+        await summarizer.client.close()
+    return f"{time.perf_counter() - started:.2f}", server.requests["llm"]
+
+
+async def main(lengths: list[int], chunk_tokens: list[int], concurrency: list[int], prompt_token_latency: float,
+               output_token_latency: float, output_tokens: int, context_tokens: int) -> None:
+    server = ModelsStubServer(
+        llm_latency=0.2,
+        llm_prompt_token_latency=prompt_token_latency,
+        llm_output_token_latency=output_token_latency,
+        llm_output_tokens=output_tokens,
+        llm_context_tokens=context_tokens
+    )
+    await server.start()
+    configurations = [("single", SINGLE_PROMPT, 1)]
+    configurations += [(f"{tokens}x{parallel}", tokens, parallel) for tokens in chunk_tokens for parallel in concurrency]
+    print(f"Стенд-ин DeepSeek: {prompt_token_latency * 1000:.2f} мс на токен запроса, "
+          f"{output_token_latency * 1000:.1f} мс на токен ответа, ответ до {output_tokens} токенов, "
+          f"контекст {context_tokens} токенов")
+    print("Время суммаризации, с (в скобках - запросов к DeepSeek); конфигурация map-reduce: chunk_tokens x map_concurrency")
+    print(f"{'tokens':>8}" + "".join(f"{name:>16}" for name, _, _ in configurations))
+    try:
+        for length in lengths:
+            text = make_article(length)
+            row = f"{estimate_tokens(text):>8}"
+            for _, tokens, parallel in configurations:
+                latency, requests = await measure(server, text, tokens, parallel)
+                row += f"{f'{latency} ({requests})':>16}"
+            print(row)
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--lengths", type=int, nargs="+", default=[2000, 8000, 16000, 32000, 64000, 96000],
+                                 help="Длины статей (в токенах).")
+    argument_parser.add_argument("--chunk-tokens", type=int, nargs="+",
+                                 default=[6000, SUMMARIZER_SETTINGS['chunk_tokens']],
+                                 help="Бюджеты части для map-reduce (в токенах).")
+    argument_parser.add_argument("--concurrency", type=int, nargs="+", default=[SUMMARIZER_SETTINGS['map_concurrency']],
+                                 help="Одновременные запросы суммаризации частей.")
+    argument_parser.add_argument("--prompt-token-latency", type=float, default=0.0002,
+                                 help="Время чтения одного токена запроса (в секундах).")
+    argument_parser.add_argument("--output-token-latency", type=float, default=0.01,
+                                 help="Время генерации одного токена ответа (в секундах).")
+    argument_parser.add_argument("--output-tokens", type=int, default=200, help="Длина ответа (в токенах).")
+    argument_parser.add_argument("--context-tokens", type=int, default=64000, help="Размер контекста (в токенах).")
+    arguments = argument_parser.parse_args()
+    asyncio.run(main(arguments.lengths, arguments.chunk_tokens, arguments.concurrency, arguments.prompt_token_latency,
+                     arguments.output_token_latency, arguments.output_tokens, arguments.context_tokens))
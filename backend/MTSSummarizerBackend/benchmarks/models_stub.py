@@ -0,0 +1,211 @@
+"""
+Локальные стенд-ины внешних моделей для бенчмарков очереди задач.
+
+Один aiohttp-сервер отдаёт:
+    - OpenAI-совместимый /v1/chat/completions (вместо DeepSeek), в том числе потоковый (stream=True);
+    - /api/v1/analyze-comments-sentiment/ (вместо SentimentAnalyzerModelAPI);
+    - /api/v1/get-comments-clusters/ (вместо CommentClusteringModelAPI).
+Задержка каждого сервиса задаётся отдельно, сервер считает запросы и максимальное
+количество одновременных запросов к каждому сервису. Задержку DeepSeek можно сделать
+зависящей от длины запроса и ответа, а запросы длиннее контекста - отклонять. Перегрузку
+DeepSeek можно имитировать ограничением одновременных запросов (сверх него - ответ 429 с
+Retry-After), а сбой - флагом llm_available (ответ 503 на все запросы).
+"""
+import asyncio
+import json
+import time
+from collections import Counter
+from typing import Optional
+from aiohttp import web
+from api.chunking import estimate_tokens
+
+
+class ModelsStubServer:
+    """
+    Стенд-ин DeepSeek и API моделей на aiohttp.web.
+
+    :param llm_latency: Задержка ответа DeepSeek (в секундах).
+    :param sentiment_latency: Задержка ответа API анализа тональности (в секундах).
+    :param clustering_latency: Задержка ответа API кластеризации (в секундах).
+    :param llm_prompt_token_latency: Время чтения одного токена запроса DeepSeek до первого токена ответа (в секундах).
+    :param llm_output_token_latency: Время генерации одного токена ответа DeepSeek (в секундах).
+    :param llm_output_tokens: Длина ответа DeepSeek в токенах (не больше max_tokens запроса).
+    :param llm_context_tokens: Размер контекста DeepSeek в токенах; на более длинный запрос стенд-ин отвечает 400.
+    :param llm_capacity: Максимум одновременных запросов к DeepSeek; сверх него стенд-ин отвечает 429.
+    :param llm_retry_after: Значение заголовка Retry-After ответа 429 (в секундах, None - без заголовка).
+    """
+
+    def __init__(
+        self,
+        llm_latency: float = 0.5,
+        sentiment_latency: float = 0.1,
+        clustering_latency: float = 0.2,
+        llm_prompt_token_latency: float = 0.0,
+        llm_output_token_latency: float = 0.0,
+        llm_output_tokens: int = 25,
+        llm_context_tokens: Optional[int] = None,
+        llm_capacity: Optional[int] = None,
+        llm_retry_after: Optional[float] = 1.0
+    ) -> None:
+        self.latencies = {"llm": llm_latency, "sentiment": sentiment_latency, "clustering": clustering_latency}
+        self.llm_prompt_token_latency = llm_prompt_token_latency
+        self.llm_output_token_latency = llm_output_token_latency
+        self.llm_output_tokens = llm_output_tokens
+        self.llm_context_tokens = llm_context_tokens
+        self.llm_capacity = llm_capacity
+        self.llm_retry_after = llm_retry_after
+        self.llm_available = True  # False - DeepSeek «лежит» и отвечает 503
+        self.requests = Counter()
+        self.max_in_flight = Counter()
+        self._in_flight = Counter()
+        self._runner = None
+        self.base_url = None
+
+    def reset(self) -> None:
+        self.requests.clear()
+        self.max_in_flight.clear()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._chat_completions)
+        app.router.add_post("/api/v1/analyze-comments-sentiment/", self._sentiment)
+        app.router.add_post("/api/v1/get-comments-clusters/", self._clustering)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @property
+    def llm_url(self) -> str:
+        return f"{self.base_url}/v1"
+
+    @property
+    def sentiment_url(self) -> str:
+        return f"{self.base_url}/api/v1/analyze-comments-sentiment/"
+
+    @property
+    def clustering_url(self) -> str:
+        return f"{self.base_url}/api/v1/get-comments-clusters/"
+
+    async def _serve(self, service: str, latency: Optional[float] = None) -> None:
+        self.requests[service] += 1
+        self._in_flight[service] += 1
+        self.max_in_flight[service] = max(self.max_in_flight[service], self._in_flight[service])
+        try:
+            await asyncio.sleep(self.latencies[service] if latency is None else latency)
+        finally:
+            self._in_flight[service] -= 1
+
+    def _llm_timing(self, body: dict) -> tuple[int, int, float, float]:
+        # Токены оцениваются как в api/chunking.py. Чтение запроса задерживает первый токен ответа,
+        # генерация (llm_latency плюс время на каждый токен ответа) распределяется между токенами.
+        prompt_tokens = estimate_tokens("".join(message["content"] for message in body["messages"]))
+        completion_tokens = min(body.get("max_tokens") or self.llm_output_tokens, self.llm_output_tokens)
+        prefill = prompt_tokens * self.llm_prompt_token_latency
+        generation = self.latencies["llm"] + completion_tokens * self.llm_output_token_latency
+        return prompt_tokens, completion_tokens, prefill, generation
+
+    def _context_exceeded(self, prompt_tokens: int) -> Optional[web.Response]:
+        if self.llm_context_tokens is None or prompt_tokens <= self.llm_context_tokens:
+            return None
+        self.requests["llm_rejected"] += 1
+        return web.json_response({"error": {
+            "message": f"This model's maximum context length is {self.llm_context_tokens} tokens. "
+                       f"However, you requested {prompt_tokens} tokens.",
+            "type": "invalid_request_error",
+        }}, status=400)
+
+    def _unavailable(self) -> Optional[web.Response]:
+        if not self.llm_available:
+            self.requests["llm_unavailable"] += 1
+            return web.json_response({"error": {"message": "Service Unavailable", "type": "server_error"}}, status=503)
+        if self.llm_capacity is not None and self._in_flight["llm"] >= self.llm_capacity:
+            self.requests["llm_throttled"] += 1
+            headers = {"Retry-After": f"{self.llm_retry_after:g}"} if self.llm_retry_after is not None else None
+            return web.json_response({"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                                     status=429, headers=headers)
+        return None
+
+    async def _chat_completions(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        prompt_tokens, completion_tokens, prefill, generation = self._llm_timing(body)
+        for rejection in (self._unavailable(), self._context_exceeded(prompt_tokens)):
+            if rejection is not None:
+                return rejection
+        if body.get("stream"):
+            usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                     "total_tokens": prompt_tokens + completion_tokens}
+            return await self._stream_chat_completions(request, body, prefill, generation, usage)
+        await self._serve("llm", prefill + generation)
+        prompt = body["messages"][-1]["content"]
+        return web.json_response({
+            "id": f"chatcmpl-{self.requests['llm']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": f"Резюме: {prompt[-100:]}"},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+    async def _stream_chat_completions(self, request: web.Request, body: dict, prefill: float,
+                                       generation: float, usage: dict) -> web.StreamResponse:
+        # Первый токен приходит после чтения запроса и первой доли генерации, остальные - по одной доле.
+        prompt = body["messages"][-1]["content"]
+        tokens = f"Резюме: {prompt[-100:]}".split(" ")
+        self.requests["llm"] += 1
+        self._in_flight["llm"] += 1
+        self.max_in_flight["llm"] = max(self.max_in_flight["llm"], self._in_flight["llm"])
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        try:
+            await asyncio.sleep(prefill)
+            for index, token in enumerate(tokens):
+                await asyncio.sleep(generation / len(tokens))
+                chunk = {
+                    "id": f"chatcmpl-{self.requests['llm']}",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body["model"],
+                    "choices": [{"index": 0, "delta": {"content": token if not index else f" {token}"},
+                                 "finish_reason": None}],
+                }
+                await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+            if (body.get("stream_options") or {}).get("include_usage"):
+                chunk = {
+                    "id": f"chatcmpl-{self.requests['llm']}",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body["model"],
+                    "choices": [],
+                    "usage": usage,
+                }
+                await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            await response.write(b"data: [DONE]\n\n")
+        except ConnectionResetError:
+            pass  # Клиент отменил запрос
+        finally:
+            self._in_flight["llm"] -= 1
+        return response
+
+    async def _sentiment(self, request: web.Request) -> web.Response:
+        comments_list = (await request.json())["comments_list"]
+        await self._serve("sentiment")
+        return web.json_response({"positive": len(comments_list), "neutral": 0, "negative": 0})
+
+    async def _clustering(self, request: web.Request) -> web.Response:
+        comments_list = (await request.json())["comments_list"]
+        await self._serve("clustering")
+        return web.json_response([{"Все комментарии": comments_list[:3]}])
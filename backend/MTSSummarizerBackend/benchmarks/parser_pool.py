@@ -0,0 +1,80 @@
+"""
+Бенчмарк общего пула соединений HabrParser.
+
+Сравнивает два режима на локальном стенд-ине habr.com:
+    - session-per-call: пул открывается и закрывается на каждый вызов parsing_article;
+    - shared pool: один пул на всё время жизни процесса (parser.start() в ASGI lifespan).
+
+Запуск (из папки MTSSummarizerBackend):
+    python -m benchmarks.parser_pool --requests 200 --concurrency 10
+"""
+import argparse
+import asyncio
+import time
+from api.habr_parser import HabrParser
+from .habr_stub import HabrStubServer
+
+
+async def run_session_per_call(server: HabrStubServer, requests: int, concurrency: int) -> float:
+    # Экземпляры создаются заранее: конструктор UserAgent дорогой и не относится к сетевому слою.
+    parsers = asyncio.Queue()
+    for _ in range(concurrency):
+        parsers.put_nowait(HabrParser(attemps=1, host_rate=None))
+
+    async def one(article_id: int) -> None:
+        habr_parser = await parsers.get()
+        try:
+            await habr_parser.start()
+            await habr_parser.parsing_article(server.article_url(article_id))
+        finally:
+            await habr_parser.close()
+            parsers.put_nowait(habr_parser)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(article_id) for article_id in range(requests)))
+    return time.perf_counter() - started
+
+
+async def run_shared_pool(server: HabrStubServer, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    habr_parser = HabrParser(attemps=1, host_rate=None)
+    await habr_parser.start()
+
+    async def one(article_id: int) -> None:
+        async with semaphore:
+            await habr_parser.parsing_article(server.article_url(article_id))
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(article_id) for article_id in range(requests)))
+    finally:
+        await habr_parser.close()
+    return time.perf_counter() - started
+
+
+async def main(requests: int, concurrency: int, latency: float) -> None:
+    server = HabrStubServer(latency=latency)
+    await server.start()
+    try:
+        results = {}
+        for name, runner in (("session-per-call", run_session_per_call), ("shared pool", run_shared_pool)):
+            server.reset()
+            elapsed = await runner(server, requests, concurrency)
+            results[name] = (elapsed, server.requests, server.connections)
+    finally:
+        await server.close()
+
+    print(f"{'mode':<18}{'time, s':>10}{'http req':>10}{'conns':>8}{'conns/article':>15}")
+    for name, (elapsed, http_requests, connections) in results.items():
+        print(f"{name:<18}{elapsed:>10.3f}{http_requests:>10}{connections:>8}{connections / requests:>15.3f}")
+    saved = results["session-per-call"][2] - results["shared pool"][2]
+    print(f"Сэкономлено рукопожатий: {saved} ({saved / requests:.3f} на статью)")
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--requests", type=int, default=200, help="Количество статей для парсинга.")
+    argument_parser.add_argument("--concurrency", type=int, default=10, help="Количество одновременных запросов.")
+    argument_parser.add_argument("--latency", type=float, default=0.005, help="Задержка ответа стенд-ина (в секундах).")
+    arguments = argument_parser.parse_args()
+    asyncio.run(main(arguments.requests, arguments.concurrency, arguments.latency))
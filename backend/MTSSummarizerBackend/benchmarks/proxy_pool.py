@@ -0,0 +1,156 @@
+"""
+Бенчмарк пула прокси на локальных фейковых прокси.
+
+Поднимает стенд-ин habr.com и несколько фейковых HTTP-прокси с разным поведением
+(здоровые, медленные, "мигающие" с ответами 503 и мёртвые) и сравнивает
+задержку парсинга статей при двух стратегиях выбора прокси:
+    - random: случайный прокси на весь запрос со всеми повторами (как было раньше);
+    - health: api.proxy_pool.ProxyPool - выбор по здоровью, свой прокси на каждую попытку,
+      временное исключение сбоящих прокси.
+
+Запуск (из папки MTSSummarizerBackend):
+    python -m benchmarks.proxy_pool --requests 300 --concurrency 10
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import aiohttp
+from aiohttp import web
+from api.habr_parser import HabrParser
+from api.proxy_pool import ProxyPool
+from .habr_stub import HabrStubServer
+
+
+PROXY_BEHAVIOURS = [
+    # (название, задержка в секундах, доля ответов 503)
+    ("healthy-1", 0.01, 0.0),
+    ("healthy-2", 0.01, 0.0),
+    ("slow", 0.5, 0.0),
+    ("flaky", 0.01, 0.6),
+    ("dead", None, None),
+]
+
+
+class FakeProxy:
+    """
+    Фейковый HTTP-прокси: пересылает запросы на стенд-ин habr.com с заданной задержкой и долей ошибок.
+    """
+
+    def __init__(self, upstream: str, latency: float, error_rate: float) -> None:
+        self.upstream = upstream
+        self.latency = latency
+        self.error_rate = error_rate
+        self._runner = None
+        self._session = None
+
+    async def start(self) -> str:
+        self._session = aiohttp.ClientSession()
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self._forward)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        return f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    async def close(self) -> None:
+        await self._runner.cleanup()
+        await self._session.close()
+
+    async def _forward(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+        if random.random() < self.error_rate:
+            return web.Response(status=503)
+        async with self._session.get(self.upstream + request.rel_url.path, headers=request.headers) as response:
+            return web.Response(body=await response.read(), status=response.status, content_type="text/html")
+
+
+class RandomProxyPool(ProxyPool):
+    """Прежняя стратегия: random.choice без учёта здоровья, один прокси на все попытки."""
+
+    def select(self, amount: int) -> list:
+        return [random.choice(self.proxies)] * amount
+
+
+async def start_proxies(upstream: str) -> tuple[list[FakeProxy], list[tuple[str, None]]]:
+    fake_proxies, proxies = [], []
+    for name, latency, error_rate in PROXY_BEHAVIOURS:
+        if latency is None:
+            # Мёртвый прокси: порт, который никто не слушает.
+            fake_proxy = FakeProxy(upstream, 0, 0)
+            url = await fake_proxy.start()
+            await fake_proxy.close()
+        else:
+            fake_proxy = FakeProxy(upstream, latency, error_rate)
+            url = await fake_proxy.start()
+            fake_proxies.append(fake_proxy)
+        proxies.append((url, None))
+    return fake_proxies, proxies
+
+
+async def run(strategy: str, proxies: list, server: HabrStubServer, requests: int, concurrency: int) -> tuple[list[float], int]:
+    habr_parser = HabrParser(
+        proxies=proxies,
+        attemps=3,
+        statuses=[503],
+        exceptions=[aiohttp.ClientConnectionError],
+        proxy_rate=1000,
+        proxy_burst=1000,
+        host_rate=None
+    )
+    if strategy == "random":
+        habr_parser.proxy_pool = RandomProxyPool(proxies, rate=1000, burst=1000)
+    await habr_parser.start()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one(article_id: int) -> None:
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                article, comments = await habr_parser.parsing_article(server.article_url(article_id))
+                failures += article is None or comments is None
+            except Exception:
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(article_id) for article_id in range(requests)))
+    await habr_parser.close()
+    if strategy == "health":
+        for url, proxy_stats in habr_parser.proxy_pool.stats().items():
+            print(f"    {url}: {proxy_stats}")
+    return latencies, failures
+
+
+def percentile(values: list[float], percent: float) -> float:
+    return statistics.quantiles(values, n=100)[int(percent) - 1]
+
+
+async def main(requests: int, concurrency: int) -> None:
+    server = HabrStubServer()
+    await server.start()
+    fake_proxies, proxies = await start_proxies(server.base_url)
+    try:
+        results = {}
+        for strategy in ("random", "health"):
+            print(f"{strategy}:")
+            results[strategy] = await run(strategy, proxies, server, requests, concurrency)
+    finally:
+        for fake_proxy in fake_proxies:
+            await fake_proxy.close()
+        await server.close()
+    print(f"{'strategy':<10}{'p50, s':>9}{'p95, s':>9}{'p99, s':>9}{'failures':>10}")
+    for strategy, (latencies, failures) in results.items():
+        print(f"{strategy:<10}{percentile(latencies, 50):>9.3f}{percentile(latencies, 95):>9.3f}"
+              f"{percentile(latencies, 99):>9.3f}{failures:>10}")
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--requests", type=int, default=300, help="Количество статей для парсинга.")
+    argument_parser.add_argument("--concurrency", type=int, default=10, help="Количество одновременных запросов.")
+    arguments = argument_parser.parse_args()
+    asyncio.run(main(arguments.requests, arguments.concurrency))
@@ -0,0 +1,96 @@
+"""
+Бенчмарк пропускной способности очереди задач суммаризации в зависимости от количества воркеров.
+
+DeepSeek и API моделей заменены локальными стенд-инами с фиксированной задержкой
+(benchmarks/models_stub.py), поэтому результат показывает только, насколько
+задачи перекрываются по времени. Стадии задачи выполняются одновременно, поэтому
+задержка одной задачи равна самой долгой стадии, а не их сумме.
+
+Запуск (из папки MTSSummarizerBackend):
+    python -m benchmarks.task_queue --jobs 16 --workers 1 2 4 8
+
+Частичные результаты при зависшей кластеризации (таймаут стадии меньше её задержки):
+    python -m benchmarks.task_queue --clustering-latency 5 --clustering-timeout 0.3
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from api.DeepSeekModel import DeepSeek
+from api.task_queue import TaskQueue
+from .models_stub import ModelsStubServer
+
+
+COMMENTS = [f"Комментарий {i}" for i in range(20)]
+
+
+async def run(
+    server: ModelsStubServer,
+    jobs: int,
+    workers: int,
+    stage_limits: dict[str, int],
+    stage_timeouts: dict[str, float]
+) -> tuple[float, list[float], int]:
+    task_queue = TaskQueue(
+        maxsize=jobs,
+        workers=workers,
+        stage_limits=stage_limits,
+        stage_timeouts=stage_timeouts,
+        sentiment_url=server.sentiment_url,
+        clustering_url=server.clustering_url,
+        summarizer=DeepSeek(api_key="stub", base_url=server.llm_url)
+    )
+    await task_queue.start()
+    latencies = []
+
+    async def one(job: int) -> None:
+        started = time.perf_counter()
+        await task_queue.process_task(f"Текст статьи {job}.", COMMENTS)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(job) for job in range(jobs)))
+    finally:
+        await task_queue.close()
+    return time.perf_counter() - started, latencies, task_queue.stats()["partial"]
+
+
+async def main(
+    jobs: int,
+    workers_list: list[int],
+    stage_limit: int | None,
+    clustering_latency: float,
+    clustering_timeout: float | None
+) -> None:
+    server = ModelsStubServer(clustering_latency=clustering_latency)
+    await server.start()
+    stage_timeouts = {"clustering": clustering_timeout}
+    print(f"Задержки стенд-инов: {server.latencies}, таймауты стадий: {stage_timeouts}, задач: {jobs}")
+    print(f"{'workers':>8}{'time, s':>9}{'jobs/s':>8}{'p50, s':>8}{'partial':>9}{'max in flight (llm/sent/clust)':>32}")
+    try:
+        for workers in workers_list:
+            server.reset()
+            limit = stage_limit or workers
+            stage_limits = {stage: limit for stage in TaskQueue.STAGES}
+            elapsed, latencies, partial = await run(server, jobs, workers, stage_limits, stage_timeouts)
+            in_flight = "/".join(str(server.max_in_flight[stage]) for stage in TaskQueue.STAGES)
+            print(f"{workers:>8}{elapsed:>9.2f}{jobs / elapsed:>8.2f}{statistics.median(latencies):>8.2f}{partial:>9}"
+                  f"{in_flight:>32}")
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--jobs", type=int, default=16, help="Количество задач суммаризации.")
+    argument_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Количества воркеров.")
+    argument_parser.add_argument("--stage-limit", type=int, default=None,
+                                 help="Ограничение одновременных запросов к каждому сервису (по умолчанию равно числу воркеров).")
+    argument_parser.add_argument("--clustering-latency", type=float, default=0.2,
+                                 help="Задержка ответа API кластеризации (в секундах).")
+    argument_parser.add_argument("--clustering-timeout", type=float, default=None,
+                                 help="Таймаут стадии кластеризации (в секундах, по умолчанию без таймаута).")
+    arguments = argument_parser.parse_args()
+    asyncio.run(main(arguments.jobs, arguments.workers, arguments.stage_limit,
+                     arguments.clustering_latency, arguments.clustering_timeout))
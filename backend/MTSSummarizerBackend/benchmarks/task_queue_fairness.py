@@ -0,0 +1,91 @@
+"""
+Бенчмарк честности очереди задач суммаризации при смешанной нагрузке.
+
+Один авторизованный пользователь ставит сразу много задач, предзагрузка ставит
+свою пачку, а несколько интерактивных пользователей (авторизованных и анонимных)
+приходят по одному запросу чуть позже. Сравниваются задержки интерактивных
+пользователей при FIFO (все задачи в одном классе от одного владельца) и при
+планировании по классам приоритета и пользователям (FairScheduler).
+
+DeepSeek и API моделей заменены локальными стенд-инами (benchmarks/models_stub.py).
+
+Запуск (из папки MTSSummarizerBackend):
+    python -m benchmarks.task_queue_fairness --heavy 20 --prefetch 10 --users 8
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from api.DeepSeekModel import DeepSeek
+from api.task_queue import TaskQueue
+from .models_stub import ModelsStubServer
+
+
+ARTICLE_TEXT = "Текст статьи. " * 400  # ~5,6 тыс. символов
+COMMENTS = [f"Комментарий {i}" for i in range(20)]
+
+
+def percentile(values: list[float], share: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+async def run(server: ModelsStubServer, fair: bool, heavy: int, prefetch: int, users: int,
+              workers: int, interval: float) -> dict[str, list[float]]:
+    task_queue = TaskQueue(
+        maxsize=heavy + prefetch + users,
+        workers=workers,
+        sentiment_url=server.sentiment_url,
+        clustering_url=server.clustering_url,
+        summarizer=DeepSeek(api_key="stub", base_url=server.llm_url)
+    )
+    await task_queue.start()
+    latencies = {"heavy": [], "prefetch": [], "interactive": []}
+
+    async def one(kind: str, priority: str, owner: str, delay: float = 0.0) -> None:
+        await asyncio.sleep(delay)
+        if not fair:
+            priority, owner = TaskQueue.ANONYMOUS, None
+        started = time.perf_counter()
+        await task_queue.process_task(ARTICLE_TEXT, COMMENTS, priority, owner)
+        latencies[kind].append(time.perf_counter() - started)
+
+    jobs = [one("heavy", TaskQueue.AUTHENTICATED, "heavy") for _ in range(heavy)]
+    jobs += [one("prefetch", TaskQueue.PREFETCH, None) for _ in range(prefetch)]
+    jobs += [one("interactive", TaskQueue.AUTHENTICATED if user % 2 else TaskQueue.ANONYMOUS, f"user-{user}",
+                 delay=0.1 + user * interval)
+             for user in range(users)]
+    try:
+        await asyncio.gather(*jobs)
+    finally:
+        await task_queue.close()
+    return latencies
+
+
+async def main(heavy: int, prefetch: int, users: int, workers: int, interval: float) -> None:
+    server = ModelsStubServer()
+    await server.start()
+    print(f"Задержки стенд-инов: {server.latencies}, воркеров: {workers}, "
+          f"задач: тяжёлый пользователь {heavy}, предзагрузка {prefetch}, интерактивные пользователи {users}")
+    print(f"{'scheduler':>10}{'interactive p50, s':>20}{'interactive p95, s':>20}{'heavy p95, s':>14}{'prefetch p95, s':>17}")
+    try:
+        for fair in (False, True):
+            latencies = await run(server, fair, heavy, prefetch, users, workers, interval)
+            interactive = latencies["interactive"]
+            print(f"{'fair' if fair else 'fifo':>10}{statistics.median(interactive):>20.2f}"
+                  f"{percentile(interactive, 0.95):>20.2f}{percentile(latencies['heavy'], 0.95):>14.2f}"
+                  f"{percentile(latencies['prefetch'], 0.95):>17.2f}")
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--heavy", type=int, default=20, help="Задач тяжёлого пользователя.")
+    argument_parser.add_argument("--prefetch", type=int, default=10, help="Задач предзагрузки.")
+    argument_parser.add_argument("--users", type=int, default=8, help="Интерактивных пользователей (по одной задаче).")
+    argument_parser.add_argument("--workers", type=int, default=4, help="Количество воркеров очереди.")
+    argument_parser.add_argument("--interval", type=float, default=0.2,
+                                 help="Интервал между приходом интерактивных пользователей (в секундах).")
+    arguments = argument_parser.parse_args()
+    asyncio.run(main(arguments.heavy, arguments.prefetch, arguments.users, arguments.workers, arguments.interval))
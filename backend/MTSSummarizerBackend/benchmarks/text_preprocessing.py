@@ -0,0 +1,54 @@
+"""
+Бенчмарк предобработки текста статьи перед суммаризацией.
+
+Текст извлекается из сохранённой страницы статьи (benchmarks/fixtures/article.html)
+так же, как в парсере, и размножается: каждая копия получает листинг кода длиной
+--code-lines строк. Для каждого размера статьи выводится оценка входных токенов до и
+после api.text_preprocessing.TextPreprocessor и время предобработки.
+
+Запуск (из папки MTSSummarizerBackend):
+    python -m benchmarks.text_preprocessing --scales 1 10 100 1000 --code-lines 40
+"""
+import argparse
+import time
+from api.habr_extractors import BeautifulSoupExtractor
+from api.text_preprocessing import PREPROCESSING_SETTINGS, TextPreprocessor
+from .extractors import load_fixture
+
+
+def code_listing(lines: int) -> str:
+    return "\n".join(f"    result_{line} = transform(items[{line}], options={{'strict': True}})"
+                     for line in range(lines))
+
+
+def main(scales: list[int], code_lines: int, repeat: int) -> None:
+    article_text = BeautifulSoupExtractor().article(load_fixture("article.html"))["text"]
+    section = f"{article_text}\ndef transform_all(items, options):\n{code_listing(code_lines)}\n    return result"
+    preprocessor = TextPreprocessor(
+        max_code_lines=PREPROCESSING_SETTINGS["max_code_lines"],
+        max_tokens=PREPROCESSING_SETTINGS["max_tokens"],
+        tail_share=PREPROCESSING_SETTINGS["tail_share"]
+    )
+    print(f"Настройки: {PREPROCESSING_SETTINGS}, строк кода на раздел: {code_lines}")
+    print(f"{'scale':>6}{'chars':>10}{'tokens':>9}{'prepared':>10}{'saved':>8}{'code':>7}{'boilerplate':>13}"
+          f"{'truncated':>11}{'time, ms':>10}")
+    for scale in scales:
+        text = "\n".join([section] * scale)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            prepared = preprocessor.prepare(text)
+        elapsed = (time.perf_counter() - started) / repeat
+        saved = 1 - prepared.tokens / prepared.original_tokens
+        print(f"{scale:>6}{len(text):>10}{prepared.original_tokens:>9}{prepared.tokens:>10}{saved:>8.0%}"
+              f"{prepared.code_lines_dropped:>7}{prepared.boilerplate_lines_dropped:>13}{str(prepared.truncated):>11}"
+              f"{elapsed * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100, 1000],
+                                 help="Количество копий статьи в тексте.")
+    argument_parser.add_argument("--code-lines", type=int, default=40, help="Строк кода в листинге каждой копии.")
+    argument_parser.add_argument("--repeat", type=int, default=5, help="Повторов замера.")
+    arguments = argument_parser.parse_args()
+    main(arguments.scales, arguments.code_lines, arguments.repeat)
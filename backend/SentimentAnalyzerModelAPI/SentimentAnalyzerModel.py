@@ -55,6 +55,18 @@ class SentimentAnalyzer:
             >>> analyzer.analyze_batch(["Хорошо", "Плохо"])
             {'negative': 1, 'neutral': 0, 'positive': 1}
         """
+        return self.count_labels(self.predict_labels(texts))
+    
+    def predict_labels(self, texts: list) -> list:
+        """
+        Определяет тональность каждого текста за один проход модели.
+        
+        Args:
+            texts: Список строк для анализа
+            
+        Returns:
+            Список меток ("negative", "neutral" или "positive") в порядке текстов
+        """
         # Токенизация текстов
         inputs = self.tokenizer(
             texts,
@@ -70,11 +82,21 @@ class SentimentAnalyzer:
         
         # Определение классов
         predicted_classes = argmax(outputs.logits, dim=1).tolist()
+        return [self.id2label[class_id].lower() for class_id in predicted_classes]
+    
+    @staticmethod
+    def count_labels(labels: list) -> dict:
+        """
+        Подсчитывает количество текстов каждой тональности.
         
-        # Подсчет результатов
+        Args:
+            labels: Список меток тональности
+            
+        Returns:
+            Словарь {"negative": int, "neutral": int, "positive": int}
+        """
         count_dict = {"negative": 0, "neutral": 0, "positive": 0}
-        for class_id in predicted_classes:
-            label = self.id2label[class_id].lower()
+        for label in labels:
             count_dict[label] += 1
         
         return count_dict
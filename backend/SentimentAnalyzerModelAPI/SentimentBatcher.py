@@ -0,0 +1,146 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from os import getenv
+from time import monotonic
+from typing import Optional
+from SentimentAnalyzerModel import SentimentAnalyzer, sentiment_analyzer_model
+
+
+class SentimentBatcher:
+    """
+    Планировщик динамических батчей для анализатора тональности.
+
+    Комментарии одновременных запросов объединяются в общие проходы модели: батч
+    уходит в модель, когда набралось max_batch_size комментариев или когда самый
+    старый запрос ждёт max_wait секунд. Пока модель занята батчем, новые запросы
+    копятся и уходят следующим батчем, поэтому под нагрузкой батчи заполняются сами,
+    а при низкой нагрузке запрос ждёт не больше max_wait.
+
+    Модель выполняется в отдельном потоке и не блокирует event loop uvicorn. Внутри
+    батча комментарии сортируются по длине и делятся на проходы по max_batch_size,
+    чтобы меньше тратить на выравнивание (padding) и ограничить память. Метки
+    тональности возвращаются каждому запросу в порядке его комментариев.
+
+    Attributes:
+        analyzer (SentimentAnalyzer): Анализатор тональности
+        max_batch_size (int): Максимальное количество комментариев в одном проходе модели
+        max_wait (float): Максимальное время ожидания заполнения батча (в секундах)
+
+    Example:
+        >>> batcher = SentimentBatcher(SentimentAnalyzer(), max_batch_size=64, max_wait=0.01)
+        >>> await batcher.get_sentiment_distribution(["Отличный сервис!", "Не понравилось"])
+        {'negative': 1, 'neutral': 0, 'positive': 1}
+    """
+
+    def __init__(self, analyzer: SentimentAnalyzer, max_batch_size: int = 64, max_wait: float = 0.01):
+        """
+        Args:
+            analyzer: Анализатор тональности
+            max_batch_size: Максимальное количество комментариев в одном проходе модели
+            max_wait: Максимальное время ожидания заполнения батча (в секундах)
+        """
+        self.analyzer = analyzer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sentiment-batcher")
+        self._pending: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._carried = None  # Запрос, не поместившийся в предыдущий батч
+        self.batches = 0
+        self.comments = 0
+        self.requests = 0
+
+    def _predict(self, texts: list) -> list:
+        # Тексты похожей длины в одном проходе - меньше выравнивания.
+        order = sorted(range(len(texts)), key=lambda index: len(texts[index]))
+        labels = [None] * len(texts)
+        for start in range(0, len(order), self.max_batch_size):
+            indexes = order[start:start + self.max_batch_size]
+            for index, label in zip(indexes, self.analyzer.predict_labels([texts[index] for index in indexes])):
+                labels[index] = label
+        return labels
+
+    async def _collect_batch(self) -> list:
+        batch, self._carried = [self._carried or await self._pending.get()], None
+        size = len(batch[0][0])
+        deadline = monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            try:
+                item = await asyncio.wait_for(self._pending.get(), deadline - monotonic())
+            except TimeoutError:
+                break
+            if size + len(item[0]) > self.max_batch_size:
+                self._carried = item  # Уйдёт первым в следующем батче
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [(texts, future) for texts, future in await self._collect_batch() if not future.done()]
+            if not batch:
+                continue  # Все ожидавшие запросы отменены
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                labels = await loop.run_in_executor(self._executor, self._predict, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.comments += len(texts)
+            self.requests += len(batch)
+            start = 0
+            for request_texts, future in batch:
+                if not future.done():
+                    future.set_result(self.analyzer.count_labels(labels[start:start + len(request_texts)]))
+                start += len(request_texts)
+
+    async def get_sentiment_distribution(self, texts: list) -> dict:
+        """
+        Анализирует комментарии запроса в общем батче с комментариями других запросов.
+
+        Args:
+            texts: Список строк для анализа
+
+        Returns:
+            Словарь {"negative": int, "neutral": int, "positive": int}
+        """
+        if not texts:
+            return self.analyzer.count_labels([])
+        if self._batcher is None or self._batcher.done():
+            self._pending, self._carried = asyncio.Queue(), None
+            self._batcher = asyncio.create_task(self._run_batches())
+        future = asyncio.get_running_loop().create_future()
+        await self._pending.put((texts, future))
+        return await future
+
+    async def close(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, return_exceptions=True)
+            self._batcher = None
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        """
+        Статистика батчей для подбора max_batch_size и max_wait.
+        """
+        return {
+            "queued": self._pending.qsize() if self._pending is not None else 0,
+            "batches": self.batches,
+            "requests": self.requests,
+            "comments": self.comments,
+            "avg_batch_size": self.comments / self.batches if self.batches else 0.0,
+            "avg_requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+        }
+
+
+sentiment_batcher = SentimentBatcher(
+    sentiment_analyzer_model,
+    max_batch_size=int(getenv('SENTIMENT_MAX_BATCH_SIZE', '64')),  # Комментариев в одном проходе модели
+    max_wait=float(getenv('SENTIMENT_MAX_WAIT', '0.01')),  # Ожидание заполнения батча (в секундах)
+)
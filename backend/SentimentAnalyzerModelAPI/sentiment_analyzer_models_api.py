@@ -2,7 +2,7 @@ from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict
-from SentimentAnalyzerModel import sentiment_analyzer_model
+from SentimentBatcher import sentiment_batcher
 
 
 class Request(BaseModel):
@@ -30,5 +30,11 @@ app.add_middleware(
 
 @app.post('/api/v1/analyze-comments-sentiment/', status_code=status.HTTP_201_CREATED)
 async def summary(request: Request) -> Responce:
-    result = sentiment_analyzer_model.get_sentiment_distribution(request.comments_list)
+    # Комментарии одновременных запросов анализируются общими батчами вне event loop.
+    result = await sentiment_batcher.get_sentiment_distribution(request.comments_list)
     return {"result": result}
+
+
+@app.get('/api/v1/stats/')
+async def stats() -> Dict[str, float]:
+    return sentiment_batcher.stats()
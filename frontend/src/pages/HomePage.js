@@ -16,7 +16,6 @@ const HomePage = () => {
   const [url, setUrl] = useState('');
   const [title, setTitle] = useState('');
   const [summary, setSummary] = useState('');
-  const [displayedSummary, setDisplayedSummary] = useState('');
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [metrics, setMetrics] = useState({});
@@ -35,12 +34,52 @@ const HomePage = () => {
       .catch(err => setRecentArticlesError(err.message));
   }, []);
 
+  const applySentiment = (analysis) => {
+    setClusters(analysis?.result || { positive: 0, neutral: 0, negative: 0 });
+  };
+
+  const applyClusters = (clustersResult) => {
+    const clustersArray = clustersResult?.result || [];
+    const clusterMap = {};
+    let foundValidCluster = false;
+
+    for (const clusterObj of clustersArray) {
+      if (clusterObj.keywords?.length && clusterObj.comments?.length) {
+        const key = clusterObj.keywords.join(', ');
+        clusterMap[key] = clusterObj.comments;
+        if (!foundValidCluster) foundValidCluster = true;
+      }
+    }
+
+    setClustersJson(clusterMap);
+    setKeywords(clustersArray[0]?.keywords || []);
+    setHasComments(foundValidCluster);
+  };
+
+  const applyCommentsSummary = (commentsSummary) => {
+    if (commentsSummary) {
+      let parsed;
+      try {
+        parsed = JSON.parse(commentsSummary);
+      } catch (e) {
+        console.error('Не удалось распарсить comments_summary:', e);
+        parsed = {};
+      }
+      applySentiment(parsed.analysis);
+      applyClusters(parsed.clusters);
+    } else {
+      setHasComments(false);
+      setClusters({ positive: 0, neutral: 0, negative: 0 });
+      setClustersJson({});
+      setKeywords([]);
+    }
+  };
+
   const handleAnalyze = async () => {
     if (!url.trim()) return;
 
     setLoading(true);
     setSummary('');
-    setDisplayedSummary('');
     setError('');
     setKeywords([]);
     setClusters({ positive: 0, neutral: 0, negative: 0 });
@@ -63,45 +102,39 @@ const HomePage = () => {
     });
 
     try {
-      const results = await api.createAnalysis(url, isAuthenticated);
-;
-
-      setSummary(results.article_summary || '');
-      setTitle(results.title || '');
-
-      if (results.comments_summary) {
-        let parsed;
-        try {
-          parsed = JSON.parse(results.comments_summary);
-        } catch (e) {
-          console.error('Не удалось распарсить comments_summary:', e);
-          parsed = {};
-        }
-
-        const sentimentAnalysis = parsed.analysis?.result || { positive: 0, neutral: 0, negative: 0 };
-        setClusters(sentimentAnalysis);
-
-        const clustersArray = parsed.clusters?.result || [];
-        const clusterMap = {};
-        let foundValidCluster = false;
+      let finished = false;
 
-        for (const clusterObj of clustersArray) {
-          if (clusterObj.keywords?.length && clusterObj.comments?.length) {
-            const key = clusterObj.keywords.join(', ');
-            clusterMap[key] = clusterObj.comments;
-            if (!foundValidCluster) foundValidCluster = true;
-          }
+      // Резюме и анализ комментариев показываются по мере готовности, итоговое событие status содержит весь результат
+      await api.streamAnalysis(url, isAuthenticated, (event, data) => {
+        switch (event) {
+          case 'title':
+            setTitle(data);
+            break;
+          case 'article_summary':
+            setSummary(prev => prev.slice(0, data.offset) + data.text);
+            break;
+          case 'analysis':
+            applySentiment(data);
+            break;
+          case 'clusters':
+            applyClusters(data);
+            break;
+          case 'status':
+            if (data.status === 'done' && data.summary) {
+              setTitle(data.summary.title || '');
+              setSummary(data.summary.article_summary || '');
+              applyCommentsSummary(data.summary.comments_summary);
+              finished = true;
+            } else if (data.status === 'failed' || data.status === 'cancelled') {
+              throw new Error(data.error || 'Ошибка анализа.');
+            }
+            break;
+          default:
+            break;
         }
+      });
 
-        setClustersJson(clusterMap);
-        setKeywords(clustersArray[0]?.keywords || []);
-        setHasComments(foundValidCluster);
-      } else {
-        setHasComments(false);
-        setClusters({ positive: 0, neutral: 0, negative: 0 });
-        setClustersJson({});
-        setKeywords([]);
-      }
+      if (!finished) throw new Error('Соединение прервано до завершения анализа.');
 
       // Обновляем историю, чтобы новая статья появилась в списке
       if (isAuthenticated && typeof refreshHistory === 'function') {
@@ -115,20 +148,6 @@ const HomePage = () => {
     }
   };
 
-  // Анимация показа summary по символам
-  useEffect(() => {
-    if (summary && !loading) {
-      let i = 0;
-      setDisplayedSummary('');
-      const interval = setInterval(() => {
-        setDisplayedSummary(prev => prev + summary[i]);
-        i++;
-        if (i >= summary.length) clearInterval(interval);
-      }, 20);
-      return () => clearInterval(interval);
-    }
-  }, [summary, loading]);
-
   return (
     <div className="home-page">
       <div className="hero-section">
@@ -168,7 +187,7 @@ const HomePage = () => {
           </div>
         )}
 
-        {!loading && displayedSummary && (
+        {(title || summary) && (
           <motion.div
             initial={{ opacity: 0 }}
             animate={{ opacity: 1 }}
@@ -187,7 +206,7 @@ const HomePage = () => {
                 </div>
               </div>
               <div className="summary-content">
-                <pre>{displayedSummary}</pre>
+                <pre>{summary}</pre>
               </div>
             </div>
 
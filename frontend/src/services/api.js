@@ -144,6 +144,33 @@ export async function authorizedFetch(url, options = {}, withAuth = true) {
   return res;
 }
 
+// Разбор потока Server-Sent Events из ответа fetch: onEvent вызывается для каждого события
+async function readEventStream(res, onEvent) {
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const frame = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      const dataLines = [];
+      for (const line of frame.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+      }
+      if (dataLines.length) onEvent(event, JSON.parse(dataLines.join('\n')));
+    }
+  }
+}
+
 export default {
   // Публичные (без авторизации) запросы
   checkQueueStatus: () => authorizedFetch('/api/v1/status/', {}, false),
@@ -163,6 +190,16 @@ export default {
       body: JSON.stringify({ url }),
     }, withAuth),
 
+  // Анализ статьи с потоковой выдачей: резюме приходит по мере генерации
+  streamAnalysis: async (url, withAuth = false, onEvent) => {
+    const res = await authorizedFetch('/api/v1/stream/', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+      body: JSON.stringify({ url }),
+    }, withAuth);
+    await readEventStream(res, onEvent);
+  },
+
   // История запросов — только с авторизацией
   getHistoryList: () => authorizedFetch('/api/v1/list/'),
 